@@ -0,0 +1,199 @@
+import sys
+import os
+import io
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime, timedelta
+import numpy as np
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_research import write_research_dir
+from ml.online_coordinator import OnlineCoordinator
+from processor.research_engine import ResearchEngine
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.run_simulation import run_simulation, SimulatedClock, SIMULATION_START
+from simulated_testing.cohort_simulation import PersonaCohort, run_cohort_simulation
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+LEVELS = ["low", "medium", "high"]
+
+def _quiet():
+    # The engine and the experts print progress on load
+    return contextlib.redirect_stdout(io.StringIO())
+
+def _best_of(fn, repeats):
+    """Smallest wall time of `repeats` calls (seconds) and the last call's result."""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_catalog(research_dir, decisions=1000, outcomes=10000, sim_days=30, cohort_days=5, seed=0, repeats=3):
+    """
+    Runs every benchmark against the research modules in `research_dir` and returns one
+    flat dict of measurements. Keys ending in `_per_sec` are throughputs (higher is better);
+    all other timings are latencies (lower is better).
+    """
+    rng = random.Random(seed)
+    with _quiet():
+        load_seconds, engine = _best_of(lambda: ResearchEngine(research_dir=research_dir, use_cache=False), repeats)
+        # Warm start from the compiled catalog cache (built by the first call)
+        cache_path = os.path.join(research_dir, ".catalog_cache.pkl")
+        ResearchEngine(research_dir=research_dir, cache_path=cache_path)
+        cached_load_seconds, _ = _best_of(lambda: ResearchEngine(research_dir=research_dir, cache_path=cache_path), repeats)
+        coordinator = OnlineCoordinator.in_memory(seed=seed)
+    catalog = engine.catalog
+    result = {"strategies": len(catalog), "modules": len(engine.modules), "load_seconds": load_seconds,
+              "cached_load_seconds": cached_load_seconds}
+
+    # Tag queries: every tag in the vocabulary, in turn
+    vocabulary = catalog.tag_vocabulary()
+    queries = max(10000, len(vocabulary))
+    start = time.perf_counter()
+    for i in range(queries):
+        catalog.with_tag(vocabulary[i % len(vocabulary)])
+    result["tag_query_us"] = (time.perf_counter() - start) / queries * 1e6
+
+    # select_strategy: first call compiles the catalog, the rest hit the compiled matrix
+    coordinator.preprocessor.clock = clock = SimulatedClock(SIMULATION_START)
+    start = time.perf_counter()
+    coordinator.compile(catalog)
+    result["compile_seconds"] = time.perf_counter() - start
+    latencies = np.empty(decisions)
+    chosen = []
+    for i in range(decisions):
+        clock.now = SIMULATION_START + timedelta(hours=i)
+        context = {"energy": rng.choice(LEVELS), "stress": rng.choice(LEVELS)}
+        start = time.perf_counter()
+        strategy = coordinator.select_strategy(context, catalog)
+        latencies[i] = time.perf_counter() - start
+        chosen.append(strategy["name"])
+    result["select_p50_ms"] = float(np.percentile(latencies, 50) * 1e3)
+    result["select_p99_ms"] = float(np.percentile(latencies, 99) * 1e3)
+
+    # log_outcome: replay outcomes for the strategies that were actually chosen
+    start = time.perf_counter()
+    for i in range(outcomes):
+        coordinator.log_outcome(chosen[i % len(chosen)], rng.random() < 0.5)
+    result["log_outcome_per_sec"] = outcomes / (time.perf_counter() - start)
+
+    # One persona through the full loop (5 events per simulated day)
+    user = UserPersona("Benchmark Persona", base_stress=0.6, base_energy=0.5)
+    start = time.perf_counter()
+    run_simulation(user, seed=seed, coordinator=coordinator.fork(seed), engine=engine, verbose=False, days=sim_days)
+    result["simulation_events_per_sec"] = sim_days * 5 / (time.perf_counter() - start)
+
+    # Vectorized cohort, sized so the (N x S) score matrices stay around 2M entries
+    n = min(1000, max(1, 2_000_000 // max(1, len(catalog))))
+    cohort = PersonaCohort.random(n, np.random.default_rng(seed))
+    start = time.perf_counter()
+    run_cohort_simulation(cohort, days=cohort_days, seed=seed, coordinator=coordinator.fork(seed),
+                          engine=engine, keep_daily=False)
+    result["cohort_size"] = n
+    result["cohort_events_per_sec"] = n * cohort_days * 5 / (time.perf_counter() - start)
+    return result
+
+def run_benchmarks(sizes=DEFAULT_SIZES, strategies_per_module=10, seed=0, **kwargs):
+    """
+    Generates a synthetic research corpus for each catalog size (see synthetic_research.py)
+    and benchmarks it. Returns a JSON-serializable report.
+    """
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "environment": environment(),
+              "settings": dict(kwargs, seed=seed, strategies_per_module=strategies_per_module), "results": []}
+    for size in sizes:
+        research_dir = tempfile.mkdtemp(prefix=f"bench_research_{size}_")
+        try:
+            write_research_dir(research_dir, size, strategies_per_module, seed)
+            result = bench_catalog(research_dir, seed=seed, **kwargs)
+        finally:
+            shutil.rmtree(research_dir, ignore_errors=True)
+        print(format_result(result))
+        report["results"].append(result)
+    return report
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "commit": commit}
+
+def compare(baseline, current, tolerance=0.2):
+    """
+    Matches results by catalog size and flags every measurement that got worse by more
+    than `tolerance` (0.2 = 20%) relative to the baseline report.
+    Returns: list of (strategies, metric, baseline value, current value).
+    """
+    base_by_size = {r["strategies"]: r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = base_by_size.get(result["strategies"])
+        if base is None:
+            continue
+        for metric, value in result.items():
+            if metric in ("strategies", "modules", "cohort_size") or metric not in base:
+                continue
+            if metric.endswith("_per_sec"):
+                worse = value < base[metric] * (1 - tolerance)
+            else:
+                worse = value > base[metric] * (1 + tolerance)
+            if worse:
+                regressions.append((result["strategies"], metric, base[metric], value))
+    return regressions
+
+def format_result(r):
+    return (f"{r['strategies']:>7} strategies | load {r['load_seconds']*1e3:8.1f} ms "
+            f"(cached {r['cached_load_seconds']*1e3:7.1f} ms) | "
+            f"tag query {r['tag_query_us']:6.2f} us | select p50 {r['select_p50_ms']:7.3f} ms "
+            f"p99 {r['select_p99_ms']:7.3f} ms | log_outcome {r['log_outcome_per_sec']:9.0f}/s | "
+            f"sim {r['simulation_events_per_sec']:8.0f} ev/s | cohort {r['cohort_events_per_sec']:9.0f} ev/s")
+
+def _sizes(text):
+    return [int(v) for v in text.split(",")]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmarks on synthetic research catalogs.")
+    parser.add_argument("--sizes", type=_sizes, default=DEFAULT_SIZES, help="Comma-separated catalog sizes (strategies)")
+    parser.add_argument("--per-module", type=int, default=10, help="Strategies per synthetic module")
+    parser.add_argument("--decisions", type=int, default=1000, help="select_strategy calls timed per size")
+    parser.add_argument("--outcomes", type=int, default=10000, help="log_outcome calls timed per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Results file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline results file; exit with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print(f"=== BENCHMARKING {len(args.sizes)} CATALOG SIZES ===")
+    report = run_benchmarks(args.sizes, args.per_module, args.seed, decisions=args.decisions, outcomes=args.outcomes)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    out_dir = os.path.dirname(os.path.abspath(out))
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        for size, metric, before, after in regressions:
+            print(f"  [!] Regression at {size} strategies: {metric} {before:.4g} -> {after:.4g}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
@@ -0,0 +1,57 @@
+import os
+import json
+import random
+
+# Tags the experts and the simulated personas react to, plus the common corpus tags
+CORE_TAGS = ["emotion", "reflection", "productivity", "curiosity", "trigger", "ability", "retention",
+             "novelty", "flow", "focus", "habit-formation", "motivation", "initiation", "planning"]
+FILLER_TAGS = ["template", "ui-design", "gamification", "engagement", "adaptive", "feedback",
+               "resilience", "learning", "consistency", "cognitive-load", "reward", "scaffolding"]
+DIFFICULTIES = ["Very Low", "Low", "Medium", "High"]
+
+def synthetic_module(index, n_strategies, rng: random.Random, extra_tags=50):
+    """
+    One research module following the research/ schema (see research_readme.md), with
+    `n_strategies` actionable strategies. Tags are drawn from the real corpus vocabulary
+    plus `extra_tags` synthetic ones, so tag index sizes grow with the catalog.
+    """
+    module_id = f"synthetic_{index:06d}"
+    vocabulary = CORE_TAGS + FILLER_TAGS + [f"topic-{i}" for i in range(extra_tags)]
+    strategies = []
+    for j in range(n_strategies):
+        strategies.append({
+            "name": f"Synthetic Strategy {index}.{j}",
+            "logic": f"IF [Context_{j % 7}] THEN [Action_{j % 11}]",
+            "application_in_app": "Generated for benchmarking; not a real intervention.",
+            "difficulty": rng.choice(DIFFICULTIES),
+            "tags": rng.sample(vocabulary, rng.randint(2, 5))
+        })
+    return {
+        "id": module_id,
+        "title": f"Synthetic Module {index}",
+        "authors": ["Benchmark Generator"],
+        "year": 2000 + index % 25,
+        "source_type": "Synthetic",
+        "core_concept": "Benchmark fixture",
+        "summary": "Machine-generated module used to measure how the engine scales with catalog size.",
+        "effectiveness_metrics": {"metric": "None", "value": "N/A", "description": "Synthetic data."},
+        "mechanisms": [{"name": "Synthetic", "description": "Placeholder mechanism."}],
+        "actionable_strategies": strategies
+    }
+
+def write_research_dir(directory, n_strategies, strategies_per_module=10, seed=0):
+    """
+    Fills `directory` with synthetic research modules holding `n_strategies` strategies in
+    total. The same arguments always produce the same files.
+    Returns: the number of modules written.
+    """
+    rng = random.Random(seed)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    n_modules = 0
+    for start in range(0, n_strategies, strategies_per_module):
+        module = synthetic_module(n_modules, min(strategies_per_module, n_strategies - start), rng)
+        with open(os.path.join(directory, f"{module['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(module, f)
+        n_modules += 1
+    return n_modules
@@ -0,0 +1,36 @@
+import sys
+import os
+import copy
+import tempfile
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_research import write_research_dir
+from benchmarks.run_benchmarks import bench_catalog, compare
+from processor.research_engine import ResearchEngine
+
+def test_synthetic_catalog_and_regression_check():
+    print("--- Testing Benchmark Suite ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        assert write_research_dir(tmp, 25, strategies_per_module=10, seed=1) == 3
+        engine = ResearchEngine(research_dir=tmp, use_cache=False)
+        assert len(engine.catalog) == 25 and len(engine.modules) == 3
+        assert all(s["source_id"].startswith("synthetic_") for s in engine.strategies)
+        assert engine.catalog.with_tag("curiosity") or engine.catalog.with_tag("emotion")
+
+        result = bench_catalog(tmp, decisions=20, outcomes=50, sim_days=2, cohort_days=1, repeats=1)
+    assert result["strategies"] == 25
+    assert result["select_p50_ms"] <= result["select_p99_ms"]
+    assert result["log_outcome_per_sec"] > 0 and result["simulation_events_per_sec"] > 0
+
+    baseline = {"results": [result]}
+    assert compare(baseline, baseline) == []
+    slower = copy.deepcopy(baseline)
+    slower["results"][0]["select_p99_ms"] *= 2
+    slower["results"][0]["log_outcome_per_sec"] /= 2
+    assert {r[1] for r in compare(baseline, slower)} == {"select_p99_ms", "log_outcome_per_sec"}
+    print("[PASS] Synthetic catalogs load and regressions are flagged.")
+
+if __name__ == "__main__":
+    test_synthetic_catalog_and_regression_check()
@@ -1,46 +1,143 @@
 import json
 import os
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Iterable, Iterator, Union, Callable
 from datetime import datetime
 
+# Time bin per hour of day: 0 Morning (5-11), 1 Afternoon (12-16), 2 Evening (17-21), 3 Night (22-4)
+HOUR_BINS = np.array([3] * 5 + [0] * 7 + [1] * 5 + [2] * 5 + [3] * 2, dtype=np.intp)
+
 class DataPreprocessor:
     """
     Responsible for cleaning, normalizing, and encoding data for the ML models.
     Converts raw JSON logs and strategies into efficient feature vectors.
     """
     
-    def __init__(self):
+    def __init__(self, clock: Callable[[], datetime] = None):
+        # Source of "now" for contexts without a timestamp (inject a fake clock for simulations)
+        self.clock = clock or datetime.now
         # Mappings for categorical data (One-Hot Encoding)
         self.context_tags = ["morning", "afternoon", "evening", "night", "tired", "energetic", "stressed", "bored"]
         self.strategy_tags = ["trigger", "ability", "motivation", "curiosity", "flow", "scaffolding", "retention"]
+        # 'low', 'medium', 'high' -> 0.0, 0.5, 1.0 for energy/stress labels
+        self.level_map = {"low": 0.0, "medium": 0.5, "high": 1.0}
+        # Reward shaping for batch ingestion (mirrors process_interaction_log; unknown outcomes -> 0.0)
+        self.outcome_rewards = {"completed": 1.0, "started": 0.2, "ignored": -0.1}
+        # Strategy encodings are pure functions of the strategy, cached by name during ingestion
+        self._strategy_cache: Dict[str, np.ndarray] = {}
         
-    def normalize_context(self, raw_context: Dict[str, Any]) -> np.ndarray:
+    def normalize_context(self, raw_context: Dict[str, Any], now: datetime = None) -> np.ndarray:
         """
         Converts a user context dict (e.g., {'time': 'morning', 'energy': 'low'}) 
         into a normalized feature vector.
+        The time features come from `now`, defaulting to the injected clock.
         """
+        hour = (now or self.clock()).hour
+        return self._context_vector(hour, raw_context)
+
+    def _context_vector(self, hour: int, raw_context: Dict[str, Any]) -> np.ndarray:
+        # Vector: [Morning, Afternoon, Evening, Night, Energy, Stress]
+        feature_vector = np.zeros(6)
+
         # 1. Time Encoding (Simple 4-bin)
-        time_vec = [0] * 4
-        hour = datetime.now().hour
-        if 5 <= hour < 12: time_vec[0] = 1 # Morning
-        elif 12 <= hour < 17: time_vec[1] = 1 # Afternoon
-        elif 17 <= hour < 22: time_vec[2] = 1 # Evening
-        else: time_vec[3] = 1 # Night
-        
+        feature_vector[HOUR_BINS[hour]] = 1
+
         # 2. State Encoding (Energy/Stress)
         # Map 'low', 'medium', 'high' to 0.0, 0.5, 1.0
-        energy_map = {"low": 0.0, "medium": 0.5, "high": 1.0}
-        stress_map = {"low": 0.0, "medium": 0.5, "high": 1.0}
-        
-        energy_val = energy_map.get(raw_context.get("energy", "medium"), 0.5)
-        stress_val = stress_map.get(raw_context.get("stress", "medium"), 0.5)
-        
-        # Combine
-        # Vector: [Morning, Afternoon, Evening, Night, Energy, Stress]
-        feature_vector = np.array(time_vec + [energy_val, stress_val])
+        feature_vector[4] = self.level_map.get(raw_context.get("energy", "medium"), 0.5)
+        feature_vector[5] = self.level_map.get(raw_context.get("stress", "medium"), 0.5)
         return feature_vector
 
+    def normalize_contexts(self, raw_contexts: List[Dict[str, Any]], now: datetime = None) -> np.ndarray:
+        """
+        Batch variant of `normalize_context`: encodes N context dicts into an (N x 6) matrix.
+        """
+        if not raw_contexts:
+            return np.zeros((0, 6))
+        now = np.datetime64((now or self.clock()).replace(tzinfo=None), "s")
+        return self.encode_contexts(
+            np.full(len(raw_contexts), now),
+            [c.get("energy", "medium") for c in raw_contexts],
+            [c.get("stress", "medium") for c in raw_contexts]
+        ).astype(float)
+
+    def encode_contexts(self, timestamps, energy, stress, utc_offset: float = None) -> np.ndarray:
+        """
+        Vectorized context encoding: returns an (N x 6) float32 matrix in the layout of
+        `normalize_context`.
+
+        Args:
+            timestamps: N timestamps. Either epoch seconds (converted with a fixed `utc_offset`
+                in seconds if given, otherwise to local time with the offset in effect at each
+                timestamp, see `_local_hours`), or datetime64 values / datetime objects / ISO
+                strings, taken as wall-clock time: their hour is used as written, even if
+                they carry a UTC offset.
+                None entries mean "now" (the injected clock).
+                Passing None instead of an array uses "now" for every row.
+            energy, stress: N labels ('low'/'medium'/'high', unknown -> 0.5) or N floats in [0, 1].
+        """
+        energy_values = self._levels(energy)
+        stress_values = self._levels(stress)
+        n = len(energy_values)
+        if timestamps is None:
+            hour_of_day = np.full(n, self.clock().hour, dtype=np.intp)
+        else:
+            hour_of_day = self._timestamp_hours(timestamps, utc_offset)
+
+        contexts = np.zeros((n, 6), dtype=np.float32)
+        contexts[np.arange(n), HOUR_BINS[hour_of_day]] = 1.0
+        contexts[:, 4] = energy_values
+        contexts[:, 5] = stress_values
+        return contexts
+
+    def _timestamp_hours(self, timestamps, utc_offset: float = None) -> np.ndarray:
+        """Hour of day (0-23) for each timestamp; see `encode_contexts` for accepted forms."""
+        stamps = np.asarray(timestamps)
+        if stamps.dtype == object:
+            # Mixed list (e.g. from JSON logs): split numbers, datetimes, strings and missing values
+            kinds = np.array([0 if t is None else 1 if isinstance(t, (int, float)) and not isinstance(t, bool)
+                              else 2 if isinstance(t, datetime) else 3 for t in stamps], dtype=np.intp)
+            out = np.full(len(stamps), self.clock().hour, dtype=np.intp)
+            if (kinds == 1).any():
+                out[kinds == 1] = self._timestamp_hours(stamps[kinds == 1].astype(np.float64), utc_offset)
+            if (kinds == 2).any():
+                # Wall-clock hour, whether or not the datetime carries a time zone
+                out[kinds == 2] = [t.hour for t in stamps[kinds == 2]]
+            if (kinds == 3).any():
+                out[kinds == 3] = self._timestamp_hours(stamps[kinds == 3].astype(str), utc_offset)
+            return out
+        if np.issubdtype(stamps.dtype, np.number):
+            seconds = stamps.astype(np.float64)
+            if utc_offset is not None:
+                return ((seconds + utc_offset) // 3600 % 24).astype(np.intp)
+            return self._local_hours(seconds)
+        if stamps.dtype.kind in "US":
+            # ISO strings: the wall-clock hour as written ("YYYY-MM-DDTHH" prefix), so a trailing
+            # UTC offset ("+02:00", "Z") does not shift it
+            stamps = stamps.astype("U13").astype("datetime64[h]")
+        stamps = stamps.astype("datetime64[s]")
+        return ((stamps - stamps.astype("datetime64[D]")).astype(np.int64) // 3600).astype(np.intp)
+
+    def _local_hours(self, seconds: np.ndarray) -> np.ndarray:
+        """
+        Local hour of each epoch timestamp, with the UTC offset in effect at that timestamp
+        (so DST and historical offset changes are honored). Time zone: the clock's if it
+        returns aware datetimes, otherwise the system's. Offsets are whole quarter hours,
+        so each distinct 15-minute bucket is converted once through `datetime.fromtimestamp`.
+        """
+        tz = self.clock().tzinfo
+        buckets, index = np.unique(seconds // 900, return_inverse=True)
+        hours = np.fromiter((datetime.fromtimestamp(b * 900, tz).hour for b in buckets),
+                            dtype=np.intp, count=len(buckets))
+        return hours[index.reshape(-1)]
+
+    def _levels(self, values) -> np.ndarray:
+        """Energy/stress column: floats are used as-is (clipped to [0, 1]), labels are looked up."""
+        values = np.asarray(values)
+        if np.issubdtype(values.dtype, np.number):
+            return np.clip(values.astype(np.float32), 0.0, 1.0)
+        return self._lookup_levels(values)
+
     def encode_strategy(self, strategy: Dict[str, Any]) -> np.ndarray:
         """
         Converts a strategy dict into a feature vector based on its tags and difficulty.
@@ -62,12 +159,27 @@ class DataPreprocessor:
         feature_vector = np.array(tag_vec + [diff_val])
         return feature_vector
 
+    def encode_strategies(self, strategies: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Encodes a list of strategies into an (S x F) feature matrix, one row per strategy.
+        Used to compile a strategy catalog once instead of re-encoding it on every decision.
+        """
+        if not strategies:
+            return np.zeros((0, len(self.strategy_tags) + 1))
+        return np.vstack([self.encode_strategy(s) for s in strategies]).astype(float)
+
     def process_interaction_log(self, log_entry: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, float]:
         """
         Processes a single interaction log for training.
         Returns: (Context_Vector, Strategy_Vector, Reward)
         """
-        context_vec = self.normalize_context(log_entry.get("context", {}))
+        # Logged timestamps (epoch seconds or ISO strings) take precedence over the clock
+        timestamp = log_entry.get("timestamp")
+        if timestamp is None:
+            context_vec = self.normalize_context(log_entry.get("context", {}))
+        else:
+            hour = int(self._timestamp_hours([timestamp])[0])
+            context_vec = self._context_vector(hour, log_entry.get("context", {}))
         strategy_vec = self.encode_strategy(log_entry.get("strategy", {}))
         
         # Reward shaping
@@ -80,6 +192,84 @@ class DataPreprocessor:
         
         return context_vec, strategy_vec, reward
 
+    def iter_interaction_batches(self, source: Union[str, Iterable[str]], chunk_size: int = 4096
+                                 ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Streams a JSONL interaction log in chunks for offline training.
+
+        Args:
+            source: Path to a JSONL file, or any iterable of JSON lines.
+            chunk_size: Max rows per yielded batch.
+
+        Yields: (Context_Matrix [n x 6], Strategy_Matrix [n x F], Rewards [n]) as float32.
+            The three arrays are views into buffers preallocated once and reused for
+            every chunk, so memory stays bounded by `chunk_size` regardless of log size.
+            Copy them if they need to outlive the next iteration.
+        """
+        n_strategy_features = len(self.strategy_tags) + 1
+        context_buf = np.zeros((chunk_size, 6), dtype=np.float32)
+        strategy_buf = np.zeros((chunk_size, n_strategy_features), dtype=np.float32)
+        reward_buf = np.zeros(chunk_size, dtype=np.float32)
+
+        entries = []
+        for entry in self._iter_log_entries(source):
+            entries.append(entry)
+            if len(entries) == chunk_size:
+                self._encode_chunk(entries, context_buf, strategy_buf, reward_buf)
+                yield context_buf, strategy_buf, reward_buf
+                entries = []
+        if entries:
+            n = len(entries)
+            self._encode_chunk(entries, context_buf, strategy_buf, reward_buf)
+            yield context_buf[:n], strategy_buf[:n], reward_buf[:n]
+
+    def _iter_log_entries(self, source: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                yield from self._iter_log_entries(f)
+            return
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[DataPreprocessor] Skipping malformed log line: {line[:80]}")
+
+    def _encode_chunk(self, entries: List[Dict[str, Any]], context_out: np.ndarray,
+                      strategy_out: np.ndarray, reward_out: np.ndarray):
+        """Encodes one chunk of log entries into the first len(entries) rows of the output buffers."""
+        n = len(entries)
+        contexts = [e.get("context", {}) for e in entries]
+
+        # Context: vectorized hour binning, label lookups on the distinct labels only
+        stamps = [e.get("timestamp") for e in entries]
+        context_out[:n] = self.encode_contexts(
+            None if all(t is None for t in stamps) else np.array(stamps, dtype=object),
+            [c.get("energy", "medium") for c in contexts],
+            [c.get("stress", "medium") for c in contexts]
+        )
+
+        # Strategy: cached encodings gathered by row
+        for i, entry in enumerate(entries):
+            strategy = entry.get("strategy", {})
+            name = strategy.get("name")
+            encoded = self._strategy_cache.get(name) if name is not None else None
+            if encoded is None:
+                encoded = self.encode_strategy(strategy)
+                if name is not None:
+                    self._strategy_cache[name] = encoded
+            strategy_out[i] = encoded
+
+        reward_out[:n] = [self.outcome_rewards.get(e.get("outcome", "ignored"), 0.0) for e in entries]
+
+    def _lookup_levels(self, labels: List[Any]) -> np.ndarray:
+        """Maps 'low'/'medium'/'high' labels to 0.0/0.5/1.0 (unknown -> 0.5), looking up each distinct label once."""
+        uniques, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        values = np.array([self.level_map.get(u, 0.5) for u in uniques], dtype=np.float32)
+        return values[inverse.reshape(-1)]
+
 if __name__ == "__main__":
     # Test the preprocessor
     processor = DataPreprocessor()
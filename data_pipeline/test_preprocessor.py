@@ -0,0 +1,123 @@
+import sys
+import os
+import json
+import time
+import warnings
+import numpy as np
+from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+
+# Add parent dir to path to import the data_pipeline package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_pipeline.preprocessor import DataPreprocessor
+
+def make_log(n):
+    outcomes = ["completed", "started", "ignored", "unknown"]
+    levels = ["low", "medium", "high"]
+    strategies = [
+        {"name": "Visual Timer", "tags": ["scaffolding"], "difficulty": "Low"},
+        {"name": "Curiosity Quiz", "tags": ["curiosity", "trigger"], "difficulty": "Medium"}
+    ]
+    return [{
+        "context": {"energy": levels[i % 3], "stress": levels[(i // 3) % 3]},
+        "strategy": strategies[i % 2],
+        "outcome": outcomes[i % 4]
+    } for i in range(n)]
+
+def test_streaming_batches_match_single_entry_path():
+    print("--- Testing Streaming Interaction Ingestion ---")
+    processor = DataPreprocessor()
+    log = make_log(25)
+    lines = [json.dumps(entry) for entry in log] + ["", "{not json"]
+
+    contexts, strategies, rewards = [], [], []
+    for ctx, strat, reward in processor.iter_interaction_batches(lines, chunk_size=10):
+        assert ctx.dtype == np.float32 and len(ctx) <= 10
+        contexts.append(ctx.copy())
+        strategies.append(strat.copy())
+        rewards.append(reward.copy())
+    assert [len(r) for r in rewards] == [10, 10, 5]
+
+    contexts, strategies, rewards = np.vstack(contexts), np.vstack(strategies), np.concatenate(rewards)
+    for i, entry in enumerate(log):
+        ctx_vec, strat_vec, reward = processor.process_interaction_log(entry)
+        assert np.allclose(contexts[i], ctx_vec)
+        assert np.allclose(strategies[i], strat_vec)
+        assert np.isclose(rewards[i], reward)
+    print("[PASS] Streamed chunks match process_interaction_log row for row.")
+
+def test_batch_context_encoding_with_timestamps():
+    print("--- Testing Batch Context Encoding ---")
+    evening = datetime(2024, 3, 1, 18, 30)
+    processor = DataPreprocessor(clock=lambda: evening)
+    assert processor.normalize_context({"energy": "low"}).tolist() == [0, 0, 1, 0, 0.0, 0.5]
+
+    # Epoch seconds (UTC offset given), wall-clock datetimes and ISO strings; labels or floats
+    hours = [0, 4, 5, 11, 12, 16, 17, 21, 22, 23]
+    epoch = np.array([86400.0 * 19783 + 3600 * h for h in hours])  # 2024-03-01 UTC
+    expected_bins = [3, 3, 0, 0, 1, 1, 2, 2, 3, 3]
+    levels = ["low", "medium", "high", "bogus", "low", "medium", "high", "low", "medium", "high"]
+    contexts = processor.encode_contexts(epoch, levels, np.linspace(0, 1, 10), utc_offset=0)
+    assert contexts.dtype == np.float32 and contexts.shape == (10, 6)
+    assert contexts[:, :4].argmax(axis=1).tolist() == expected_bins
+    assert (contexts[:, :4].sum(axis=1) == 1).all()
+    assert contexts[:, 4].tolist() == [0.0, 0.5, 1.0, 0.5, 0.0, 0.5, 1.0, 0.0, 0.5, 1.0]
+    assert np.allclose(contexts[:, 5], np.linspace(0, 1, 10))
+
+    wall_clock = [datetime(2024, 3, 1, h, 15) for h in hours]
+    for stamps in (wall_clock, np.array(wall_clock, dtype="datetime64[s]"), [d.isoformat() for d in wall_clock]):
+        assert processor.encode_contexts(stamps, levels, levels)[:, :4].argmax(axis=1).tolist() == expected_bins
+
+    # Each row matches the single-context path at the same time
+    for d, label in zip(wall_clock, levels):
+        row = processor.encode_contexts([d], [label], [label])[0]
+        assert np.allclose(row, processor.normalize_context({"energy": label, "stress": label}, now=d))
+
+    # Logged timestamps drive the time features in both ingestion paths
+    entry = {"timestamp": datetime(2024, 3, 1, 8).isoformat(), "context": {"energy": "high"},
+             "strategy": {"name": "Visual Timer"}, "outcome": "completed"}
+    ctx_vec, _, _ = processor.process_interaction_log(entry)
+    assert ctx_vec[:4].tolist() == [1, 0, 0, 0]
+    (ctx, _, _), = processor.iter_interaction_batches([json.dumps(entry), json.dumps({"context": {}})])
+    assert ctx[0, :4].tolist() == [1, 0, 0, 0] and ctx[1, :4].tolist() == [0, 0, 1, 0]
+    print("[PASS] Batch encoding bins hours and levels like the single-context path.")
+
+def test_local_hours_follow_dst_and_keep_wall_clock():
+    print("--- Testing Time Zones in Context Encoding ---")
+    berlin = ZoneInfo("Europe/Berlin")
+    # 08:00 Berlin wall-clock time in winter (UTC+1) and summer (UTC+2), plus the DST switch night
+    local = [datetime(2024, 1, 15, 8, tzinfo=berlin), datetime(2024, 7, 15, 8, tzinfo=berlin),
+             datetime(2024, 3, 31, 1, 30, tzinfo=berlin), datetime(2024, 3, 31, 3, 30, tzinfo=berlin)]
+    epoch = [d.timestamp() for d in local]
+
+    # A July clock must not shift January events: the offset is taken per timestamp
+    july = DataPreprocessor(clock=lambda: datetime(2024, 7, 1, 12, tzinfo=berlin))
+    assert july._timestamp_hours(np.array(epoch)).tolist() == [8, 8, 1, 3]
+    # Same with the system time zone and a naive clock
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/Berlin"
+    time.tzset()
+    try:
+        naive = DataPreprocessor(clock=lambda: datetime(2024, 7, 1, 12))
+        assert naive._timestamp_hours(np.array(epoch)).tolist() == [8, 8, 1, 3]
+        assert naive._timestamp_hours(epoch + [None]).tolist() == [8, 8, 1, 3, 12]
+    finally:
+        if previous is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = previous
+        time.tzset()
+
+    # Offset-bearing ISO strings and aware datetimes keep their wall-clock hour, without warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert july._timestamp_hours(["2024-01-15T08:00+02:00", "2024-01-15T08:00:00Z", "2024-01-15 21:05"]).tolist() == [8, 8, 21]
+        aware = [datetime(2024, 1, 15, 8, tzinfo=timezone(timedelta(hours=2))), "2024-01-15T17:00-05:00"]
+        assert july._timestamp_hours(aware).tolist() == [8, 17]
+    print("[PASS] Epoch timestamps use the offset at each instant; ISO offsets keep the wall-clock hour.")
+
+if __name__ == "__main__":
+    test_streaming_batches_match_single_entry_path()
+    test_batch_context_encoding_with_timestamps()
+    test_local_hours_follow_dst_and_keep_wall_clock()
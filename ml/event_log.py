@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import queue
+import atexit
+import hashlib
+import threading
+import weakref
+import numpy as np
+from typing import List, Iterator
+
+DEFAULT_EXPERTS = ["habit_optimizer", "stress_predictor", "curiosity_tuner", "flow_manager"]
+MANIFEST_NAME = "events.json"
+OUTCOME_FAILED, OUTCOME_COMPLETED = 0, 1
+
+# Open logs, closed at interpreter exit so buffered events reach disk before the daemon writer dies
+_LIVE_LOGS = weakref.WeakSet()
+
+@atexit.register
+def _close_live_logs():
+    for log in list(_LIVE_LOGS):
+        log.close()
+
+
+def user_key(user_id) -> int:
+    """Stable 64-bit key for a user id (0 is reserved for 'no user')."""
+    if user_id is None:
+        return 0
+    return int.from_bytes(hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class EventLog:
+    """
+    Append-only log of decision/outcome events in fixed-width binary records.
+
+    Each record holds: timestamp, user key, context vector, chosen strategy ID,
+    every expert's score for the chosen strategy, and the outcome. Records are
+    buffered in a preallocated array; full buffers are handed to a background
+    writer thread that appends them to rolling segment files (`events_000000.bin`, ...),
+    so the caller never waits on disk. Segments are raw arrays of `self.dtype` and can
+    be opened with np.memmap for analysis without any parsing. Open logs are closed
+    (flushed) at interpreter exit; a record torn by a crash is cut off on the next open.
+
+    Strategy IDs are the catalog's stable IDs (see StrategyCatalog). The manifest keeps the
+    ID -> name table and the catalog versions the log was written with (`register_strategies`),
+    so records stay interpretable after the corpus changes; a catalog that reuses a logged
+    ID for another strategy is rejected.
+    """
+
+    def __init__(self, log_dir: str = None, expert_names: List[str] = None, context_dim: int = 6,
+                 buffer_size: int = 4096, segment_records: int = 1 << 20):
+        if log_dir is None:
+            log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "events")
+        self.log_dir = log_dir
+        self.expert_names = list(expert_names or DEFAULT_EXPERTS)
+        self.buffer_size = buffer_size
+        self.segment_records = segment_records
+        self.dtype = np.dtype([
+            ("timestamp", "<f8"),
+            ("user", "<u8"),
+            ("context", "<f4", (context_dim,)),
+            ("strategy_id", "<i4"),
+            ("scores", "<f4", (len(self.expert_names),)),
+            ("outcome", "i1")
+        ])
+
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        self._manifest_lock = threading.Lock()
+        self._init_manifest()
+        self._truncate_torn_tail()
+
+        self._buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="event-log-writer", daemon=True)
+        self._writer.start()
+        self._closed = False
+        _LIVE_LOGS.add(self)
+
+    def _init_manifest(self):
+        manifest_path = os.path.join(self.log_dir, MANIFEST_NAME)
+        self.manifest = {"expert_names": self.expert_names, "dtype": self.dtype.descr,
+                         "catalog_versions": [], "strategies": {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                existing = json.load(f)
+            if existing.get("expert_names") != self.expert_names or \
+                    np.dtype([tuple(d) for d in existing["dtype"]]) != self.dtype:
+                raise ValueError(f"Event log at {self.log_dir} was written with a different schema")
+            self.manifest.update(existing)
+        else:
+            self._write_manifest()
+        self.strategy_names = {int(k): v for k, v in self.manifest["strategies"].items()}
+
+    def _write_manifest(self):
+        manifest_path = os.path.join(self.log_dir, MANIFEST_NAME)
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def register_strategies(self, strategy_ids, names, version: str = None):
+        """
+        Records the strategies (stable ID -> name) of a catalog about to be logged, and its
+        version. Raises ValueError if one of the IDs was logged for a different strategy name
+        (e.g. positional IDs from another strategy list), since its records would be misread.
+        """
+        with self._manifest_lock:
+            added = {}
+            for strategy_id, name in zip(strategy_ids, names):
+                strategy_id = int(strategy_id)
+                known = self.strategy_names.get(strategy_id, added.get(strategy_id))
+                if known is None:
+                    added[strategy_id] = name
+                elif known != name:
+                    raise ValueError(f"Strategy ID {strategy_id} is logged as {known!r} in {self.log_dir}, "
+                                     f"but this catalog uses it for {name!r}")
+            new_version = version is not None and version not in self.manifest["catalog_versions"]
+            if added or new_version:
+                self.strategy_names.update(added)
+                self.manifest["strategies"] = {str(k): v for k, v in sorted(self.strategy_names.items())}
+                if new_version:
+                    self.manifest["catalog_versions"].append(version)
+                self._write_manifest()
+
+    def _truncate_torn_tail(self):
+        """Cuts a partially written trailing record, so appends stay aligned to whole records."""
+        paths = self._segment_paths()
+        if paths:
+            size = os.path.getsize(paths[-1])
+            if size % self.dtype.itemsize:
+                print(f"[EventLog] Dropping a torn record at the end of {paths[-1]}")
+                os.truncate(paths[-1], size - size % self.dtype.itemsize)
+
+    def append(self, user_id, context_vector, strategy_id: int, scores, success: bool, timestamp: float = None):
+        """Buffers one event. Only touches memory; disk writes happen on the writer thread."""
+        with self._lock:
+            row = self._buffer[self._count]
+            row["timestamp"] = time.time() if timestamp is None else timestamp
+            row["user"] = user_key(user_id)
+            row["context"] = np.nan if context_vector is None else context_vector
+            row["strategy_id"] = strategy_id
+            row["scores"] = np.nan if scores is None else scores
+            row["outcome"] = OUTCOME_COMPLETED if success else OUTCOME_FAILED
+            self._count += 1
+            if self._count == self.buffer_size:
+                self._hand_off()
+
+    def _hand_off(self):
+        """Queue the filled part of the buffer for writing and start a fresh one (lock held)."""
+        if self._count:
+            self._queue.put(self._buffer[:self._count])
+            self._buffer = np.zeros(self.buffer_size, dtype=self.dtype)
+            self._count = 0
+
+    def flush(self):
+        """Hands off buffered events and waits until the writer has put them on disk."""
+        with self._lock:
+            self._hand_off()
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        _LIVE_LOGS.discard(self)
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+    def _segment_paths(self) -> List[str]:
+        return sorted(
+            os.path.join(self.log_dir, f) for f in os.listdir(self.log_dir)
+            if f.startswith("events_") and f.endswith(".bin")
+        )
+
+    def _write_loop(self):
+        while True:
+            records = self._queue.get()
+            try:
+                if records is None:
+                    return
+                self._write(records)
+            except Exception as e:
+                print(f"[EventLog] Error writing events: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, records: np.ndarray):
+        while len(records):
+            paths = self._segment_paths()
+            path = paths[-1] if paths else os.path.join(self.log_dir, "events_000000.bin")
+            used = os.path.getsize(path) // self.dtype.itemsize if os.path.exists(path) else 0
+            if used >= self.segment_records:
+                path = os.path.join(self.log_dir, f"events_{len(paths):06d}.bin")
+                used = 0
+            take = min(len(records), self.segment_records - used)
+            with open(path, 'ab') as f:
+                records[:take].tofile(f)
+            records = records[take:]
+
+    def segments(self) -> Iterator[np.ndarray]:
+        """Yields each on-disk segment as a read-only memory-mapped record array."""
+        for path in self._segment_paths():
+            n = os.path.getsize(path) // self.dtype.itemsize  # Ignores a torn trailing record
+            if n:
+                yield np.memmap(path, dtype=self.dtype, mode="r", shape=(n,))
+
+    def read_all(self) -> np.ndarray:
+        """All flushed events as one in-memory record array."""
+        parts = list(self.segments())
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
@@ -0,0 +1,133 @@
+import json
+import bisect
+from collections import deque
+from typing import Dict, Any, List, Tuple
+
+# Latency buckets in seconds (50us .. 1s)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative on export, like Prometheus)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-th observation (an estimate, not exact)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(b): c for b, c in zip(self.buckets + ("+Inf",), self.counts)},
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99)
+        }
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics: counters and latency histograms with optional labels.
+    Recording is a dict lookup plus an increment. A disabled registry turns every
+    call into a no-op, so instrumented code does not need its own guards.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram()
+        hist.observe(value)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of every metric, keyed by `name{label=value,...}`."""
+        return {
+            "counters": {_series(name, labels): v for (name, labels), v in sorted(self.counters.items())},
+            "histograms": {_series(name, labels): h.snapshot() for (name, labels), h in sorted(self.histograms.items())}
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Exports all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{_series(name, labels)} {value}")
+        for (name, labels), hist in sorted(self.histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip(hist.buckets + ("+Inf",), hist.counts):
+                cumulative += n
+                lines.append(f"{_series(name + '_bucket', labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{_series(name + '_sum', labels)} {hist.sum}")
+            lines.append(f"{_series(name + '_count', labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+class TraceBuffer:
+    """Ring buffer holding the most recent deliberation traces."""
+
+    def __init__(self, size: int = 100):
+        self.traces = deque(maxlen=size)
+
+    def append(self, trace: Dict[str, Any]):
+        self.traces.append(trace)
+
+    def recent(self, n: int = None) -> List[Dict[str, Any]]:
+        items = list(self.traces)
+        return items if n is None else items[-n:]
+
+    def __len__(self):
+        return len(self.traces)
+
+
+def _series(name: str, labels: Tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
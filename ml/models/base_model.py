@@ -1,20 +1,57 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List
-import json
+import atexit
+import copy
 import os
+import time
+import weakref
+import numpy as np
+from .weight_store import JournaledWeightStore, MemoryWeightStore
+
+# Models with buffered (write-behind) updates, flushed once at interpreter exit
+_LIVE_MODELS = weakref.WeakSet()
+
+@atexit.register
+def _flush_live_models():
+    for model in list(_LIVE_MODELS):
+        model.flush()
+
+def lookup_weights(weights, names, column=None, default=0.0) -> np.ndarray:
+    """
+    Weights for a list of strategy names as a float array aligned with it. Snapshot-backed
+    weights (ml/snapshot.py) resolve all names in one vectorized lookup; dicts are read
+    per name. `column` selects a field of dict-valued weights (e.g. "alpha").
+    """
+    if hasattr(weights, "lookup"):
+        return weights.lookup(names, column or "value", default)
+    if column is None:
+        return np.array([weights.get(name, default) for name in names], dtype=float)
+    return np.array([weights[name].get(column, default) if name in weights else default for name in names], dtype=float)
 
 class BaseModel(ABC):
     """
     Abstract Base Class for all Expert Models in the ensemble.
     Enforces a standard interface for the Online Coordinator and Offline Controller.
     """
+    # True for experts whose weights can be kept per user (see `state`)
+    personalized = False
+    # True for experts whose scores are a pure function of (context, strategies);
+    # the coordinator may memoize them
+    deterministic = False
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, store=None):
         self.name = name
         self.weights = {}
         self.model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
         self.model_path = os.path.join(self.model_dir, f"{self.name}_weights.json")
+        # Persistence backend (defaults to a write-behind journal next to the JSON weights)
+        self.store = store if store is not None else JournaledWeightStore(self.model_path)
+        # Optional per-user backend (see ml/state_store.py), bound by the coordinator
+        self.state_store = None
+        # Optional MetricsRegistry (see ml/metrics.py), bound by the coordinator
+        self.metrics = None
         self.load()
+        _LIVE_MODELS.add(self)
 
     @abstractmethod
     def predict(self, context_vector: Any, available_strategies: List[Dict]) -> Dict[str, float]:
@@ -24,6 +61,45 @@ class BaseModel(ABC):
         """
         pass
 
+    def predict_vector(self, context_vector: Any, strategy_matrix, user_id=None) -> np.ndarray:
+        """
+        Vectorized variant of `predict` over a compiled StrategyMatrix.
+        Returns one score per strategy, aligned with `strategy_matrix.names`.
+        """
+        return self.predict_batch(np.asarray(context_vector)[np.newaxis, :], strategy_matrix, user_id)[0]
+
+    def predict_batch(self, context_matrix: np.ndarray, strategy_matrix, user_id=None) -> np.ndarray:
+        """
+        Scores N contexts against S strategies in one pass, returning an (N x S) matrix.
+        The default adapts the dict-based `predict` row by row; experts override it with array operations.
+        """
+        rows = []
+        for context_vector in context_matrix:
+            votes = self.predict(context_vector, strategy_matrix.strategies)
+            rows.append([votes.get(name, 0.0) for name in strategy_matrix.names])
+        return np.array(rows, dtype=float).reshape(len(context_matrix), len(strategy_matrix))
+
+    def predict_expected_batch(self, context_matrix: np.ndarray, strategy_matrix) -> np.ndarray:
+        """
+        Expected (noise-free) scores, used for offline evaluation. Stochastic experts
+        override this with the mean of their sampling distribution.
+        """
+        return self.predict_batch(context_matrix, strategy_matrix)
+
+    # Cohort simulation (see OnlineCoordinator.select_cohort): personalized experts keep the
+    # state of N simulated users as (N x S) arrays instead of one weights dict per user.
+    def init_cohort(self, strategy_matrix, n: int) -> Dict[str, np.ndarray]:
+        """Per-member state arrays for a cohort of n users, each starting from the global weights."""
+        return {}
+
+    def predict_cohort(self, context_matrix: np.ndarray, strategy_matrix, cohort_state: Dict[str, np.ndarray]) -> np.ndarray:
+        """Scores row i of `context_matrix` with member i's state, returning an (N x S) matrix."""
+        return self.predict_batch(context_matrix, strategy_matrix)
+
+    def update_cohort(self, cohort_state: Dict[str, np.ndarray], strategy_ids: np.ndarray, successes: np.ndarray):
+        """Applies one outcome per member: member i tried strategy row `strategy_ids[i]`."""
+        pass
+
     @abstractmethod
     def update(self, context_vector: Any, strategy_vector: Any, reward: float):
         """
@@ -31,23 +107,76 @@ class BaseModel(ABC):
         """
         pass
 
+    def fork(self, seed=None) -> "BaseModel":
+        """
+        An independent copy of this expert that starts from its current weights and keeps
+        all later updates in memory (MemoryWeightStore). The weights dict is copied
+        shallowly: values are replaced on update, never mutated in place, so the copy
+        costs O(number of strategies) and parent and fork never see each other's changes.
+        """
+        child = copy.copy(self)
+        child.weights = dict(self.weights)
+        child.store = MemoryWeightStore(child.weights)
+        child.state_store = None
+        return child
+
+    def export_state(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the learned (global) state, e.g. for simulation checkpoints."""
+        return {"weights": dict(self.weights)}
+
+    def import_state(self, state: Dict[str, Any]):
+        """Replaces the in-memory state with one from `export_state` (the store is not written)."""
+        self.weights = dict(state["weights"])
+
+    def state(self, user_id=None) -> Dict[str, Any]:
+        """
+        Returns the weights dict to read/update: the user's own state when a user id is
+        given and a per-user state store is bound, otherwise the global weights.
+        """
+        if user_id is None or self.state_store is None:
+            return self.weights
+        return self.state_store.user_state(user_id, self.name)
+
+    def record(self, key: str, user_id=None):
+        """
+        Persist a single weight update. This only appends to an in-memory journal buffer;
+        the store writes it out in batches, so outcome logging stays off the disk.
+        """
+        if user_id is not None and self.state_store is not None:
+            self.state_store.mark_dirty(user_id, self.name, key)
+            return
+        start = time.perf_counter()
+        if self.store.record(key, self.weights[key], self.weights):
+            self._observe_flush(start)
+
+    def flush(self):
+        """Write any buffered updates through to the store."""
+        start = time.perf_counter()
+        try:
+            if self.store.flush(self.weights):
+                self._observe_flush(start)
+        except Exception as e:
+            print(f"[{self.name}] Error flushing weights: {e}")
+
     def save(self):
-        """Persist model weights to disk."""
-        if not os.path.exists(self.model_dir):
-            os.makedirs(self.model_dir)
+        """Persist a compacted snapshot of the model weights to disk."""
+        start = time.perf_counter()
         try:
-            with open(self.model_path, 'w') as f:
-                json.dump(self.weights, f)
+            self.store.compact(self.weights)
+            self._observe_flush(start)
             print(f"[{self.name}] Weights saved.")
         except Exception as e:
             print(f"[{self.name}] Error saving weights: {e}")
 
+    def _observe_flush(self, start: float):
+        if self.metrics is not None:
+            self.metrics.observe("persistence_flush_seconds", time.perf_counter() - start, expert=self.name)
+
     def load(self):
-        """Load model weights from disk."""
-        if os.path.exists(self.model_path):
+        """Load model weights from disk (snapshot + journal replay)."""
+        if self.store.exists():
             try:
-                with open(self.model_path, 'r') as f:
-                    self.weights = json.load(f)
+                self.weights = self.store.load()
                 print(f"[{self.name}] Weights loaded.")
             except Exception as e:
                 print(f"[{self.name}] Error loading weights: {e}")
@@ -1,5 +1,5 @@
-from .base_model import BaseModel
-import random
+from .base_model import BaseModel, lookup_weights
+import numpy as np
 
 class CuriosityTuner(BaseModel):
     """
@@ -8,38 +8,181 @@ class CuriosityTuner(BaseModel):
     Logic: If user is bored (low energy/engagement), boost 'Curiosity' strategies.
     Also implements 'Thompson Sampling' for exploration (trying new things).
     """
-    def __init__(self):
-        super().__init__("curiosity_tuner")
+    personalized = True
+
+    def __init__(self, store=None, seed=None):
+        # Seedable RNG so Thompson draws are reproducible
+        self.rng = np.random.default_rng(seed)
+        super().__init__("curiosity_tuner", store)
         # Weights: {strategy_name: {alpha: 1, beta: 1}} (Beta distribution params)
-        
+        # The JSON weights stay the persisted form; sampling runs on the arm arrays below.
+
+    def load(self):
+        super().load()
+        self._build_arms()
+
+    def _build_arms(self):
+        """Mirror the Beta params into contiguous arrays, one slot per known strategy."""
+        self.arm_index = {name: i for i, name in enumerate(self.weights)}
+        n = len(self.arm_index)
+        if n and hasattr(self.weights, "column") and not self.weights.overlay and not self.weights.deleted:
+            # Binary snapshot (ml/snapshot.py): read-only views on the mapped columns;
+            # copied only when an arm is first updated or added (see _writable)
+            self.alpha = self.weights.column("alpha")
+            self.beta = self.weights.column("beta")
+        else:
+            capacity = max(16, n)
+            self.alpha = np.ones(capacity)
+            self.beta = np.ones(capacity)
+            for name, i in self.arm_index.items():
+                self.alpha[i] = self.weights[name]["alpha"]
+                self.beta[i] = self.weights[name]["beta"]
+        # (StrategyMatrix, arm slots per row, curiosity boost per row) of the last matrix seen
+        self._aligned = None
+
+    def fork(self, seed=None):
+        child = super().fork(seed)
+        # Own arm arrays and RNG stream (spawned from this one unless a seed is given)
+        child.arm_index = dict(self.arm_index)
+        # (snapshot views are read-only, so they can be shared until the first update)
+        child.alpha = self.alpha.copy() if self.alpha.flags.writeable else self.alpha
+        child.beta = self.beta.copy() if self.beta.flags.writeable else self.beta
+        child.rng = np.random.default_rng(seed) if seed is not None else _spawn(self.rng)
+        return child
+
+    def export_state(self):
+        # The RNG position too, so a restored run continues the same Thompson stream
+        return dict(super().export_state(), rng=self.rng.bit_generator.state)
+
+    def import_state(self, state):
+        super().import_state(state)
+        self._build_arms()
+        if "rng" in state:
+            self.rng.bit_generator.state = state["rng"]
+
+    def _writable(self):
+        """Replaces snapshot views with in-memory arrays (with room to grow) before a write."""
+        if not self.alpha.flags.writeable:
+            capacity = max(16, 2 * len(self.alpha))
+            alpha, beta = np.ones(capacity), np.ones(capacity)
+            alpha[:len(self.alpha)] = self.alpha
+            beta[:len(self.beta)] = self.beta
+            self.alpha, self.beta = alpha, beta
+
+    def _slot(self, name):
+        """Arm slot for a strategy, allocating a fresh Beta(1, 1) arm if needed."""
+        slot = self.arm_index.get(name)
+        if slot is None:
+            slot = len(self.arm_index)
+            self._writable()
+            if slot == len(self.alpha):
+                self.alpha = np.concatenate([self.alpha, np.ones(len(self.alpha))])
+                self.beta = np.concatenate([self.beta, np.ones(len(self.beta))])
+            self.arm_index[name] = slot
+        return slot
+
+    def _align(self, strategy_matrix):
+        """Arm slots and tag boost aligned to the matrix rows (computed once per matrix)."""
+        if self._aligned is None or self._aligned[0] is not strategy_matrix:
+            slots = np.fromiter((self._slot(name) for name in strategy_matrix.names),
+                                dtype=np.intp, count=len(strategy_matrix))
+            boost = 0.2 * strategy_matrix.tag_mask("curiosity", "novelty")
+            self._aligned = (strategy_matrix, slots, boost)
+        return self._aligned[1], self._aligned[2]
+
     def predict(self, context_vector, available_strategies):
         scores = {}
         for strat in available_strategies:
             name = strat["name"]
-            
+
             # Thompson Sampling: Sample from Beta(alpha, beta)
             # This naturally balances exploration (low confidence) and exploitation (high success)
             params = self.weights.get(name, {"alpha": 1, "beta": 1})
-            sample_score = random.betavariate(params["alpha"], params["beta"])
-            
+            sample_score = self.rng.beta(params["alpha"], params["beta"])
+
             # Boost if tags include 'curiosity' or 'novelty'
             tags = [t.lower() for t in strat.get("tags", [])]
             if "curiosity" in tags or "novelty" in tags:
                 sample_score += 0.2
-                
+
             scores[name] = sample_score
         return scores
 
+    def predict_batch(self, context_matrix, strategy_matrix, user_id=None):
+        # Independent Thompson samples for every (context, strategy) pair, in one draw
+        slots, boost = self._align(strategy_matrix)
+        if user_id is not None and self.state_store is not None:
+            weights = self.state(user_id)
+            alpha = lookup_weights(weights, strategy_matrix.names, "alpha", 1.0)
+            beta = lookup_weights(weights, strategy_matrix.names, "beta", 1.0)
+        else:
+            alpha = self.alpha[slots]
+            beta = self.beta[slots]
+        samples = self.rng.beta(alpha, beta, size=(len(context_matrix), len(strategy_matrix)))
+        return samples + boost
+
+    def predict_expected_batch(self, context_matrix, strategy_matrix):
+        # Posterior mean of each arm instead of a Thompson draw
+        slots, boost = self._align(strategy_matrix)
+        mean = self.alpha[slots] / (self.alpha[slots] + self.beta[slots])
+        return np.tile(mean + boost, (len(context_matrix), 1))
+
+    def init_cohort(self, strategy_matrix, n):
+        slots, _ = self._align(strategy_matrix)
+        return {
+            "alpha": np.tile(self.alpha[slots].astype(np.float32), (n, 1)),
+            "beta": np.tile(self.beta[slots].astype(np.float32), (n, 1))
+        }
+
+    def predict_cohort(self, context_matrix, strategy_matrix, cohort_state):
+        # One Thompson draw per (member, strategy) from each member's own posterior.
+        # Beta(a, b) = X / (X + Y) with X ~ Gamma(a), Y ~ Gamma(b): in single precision this is
+        # about twice as fast as rng.beta on fresh Beta(1, 1) arms, which dominate early on.
+        _, boost = self._align(strategy_matrix)
+        x = self.rng.standard_gamma(cohort_state["alpha"], dtype=np.float32)
+        y = self.rng.standard_gamma(cohort_state["beta"], dtype=np.float32)
+        x /= x + y
+        return x + boost
+
+    def update_cohort(self, cohort_state, strategy_ids, successes):
+        rows = np.arange(len(strategy_ids))
+        cohort_state["alpha"][rows, strategy_ids] += successes
+        cohort_state["beta"][rows, strategy_ids] += ~successes
+
     def update(self, context_vector, strategy_vector, reward):
         # We need the strategy name. Assuming it's passed or looked up.
         # For prototype, we'll add a helper method.
         pass
 
-    def update_outcome(self, strategy_name, success):
-        params = self.weights.get(strategy_name, {"alpha": 1, "beta": 1})
-        if success:
-            params["alpha"] += 1
+    def update_outcome(self, strategy_name, success, user_id=None):
+        if user_id is not None and self.state_store is not None:
+            weights = self.state(user_id)
+            params = dict(weights.get(strategy_name, {"alpha": 1, "beta": 1}))
+            if success:
+                params["alpha"] += 1
+            else:
+                params["beta"] += 1
+            weights[strategy_name] = params
         else:
-            params["beta"] += 1
-        self.weights[strategy_name] = params
-        self.save()
+            slot = self._slot(strategy_name)
+            self._writable()
+            if success:
+                self.alpha[slot] += 1
+            else:
+                self.beta[slot] += 1
+            self.weights[strategy_name] = {"alpha": _number(self.alpha[slot]), "beta": _number(self.beta[slot])}
+        self.record(strategy_name, user_id)
+
+def _spawn(rng):
+    """
+    An independent child stream of `rng`. Generator.spawn needs NumPy 1.25, so spawn the
+    underlying SeedSequence directly (`_seed_seq` before it became public in 1.25).
+    """
+    bit_generator = rng.bit_generator
+    seed_seq = getattr(bit_generator, "seed_seq", None) or getattr(bit_generator, "_seed_seq")
+    return np.random.default_rng(seed_seq.spawn(1)[0])
+
+def _number(value):
+    """Array scalar -> JSON-friendly int (the persisted form) when it is integral."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -1,4 +1,5 @@
 from .base_model import BaseModel
+import numpy as np
 
 class FlowManager(BaseModel):
     """
@@ -8,8 +9,10 @@ class FlowManager(BaseModel):
     - High Energy -> Recommend High Difficulty (Challenge)
     - Low Energy -> Recommend Low Difficulty (Relaxation/Scaffolding)
     """
-    def __init__(self):
-        super().__init__("flow_manager")
+    deterministic = True
+
+    def __init__(self, store=None):
+        super().__init__("flow_manager", store)
         
     def predict(self, context_vector, available_strategies):
         # context_vector: [Time..., Energy, Stress]
@@ -39,5 +42,10 @@ class FlowManager(BaseModel):
             
         return scores
 
+    def predict_batch(self, context_matrix, strategy_matrix, user_id=None):
+        # Difficulty is already mapped to 0-1 in the compiled feature matrix
+        energy_levels = context_matrix[:, -2]
+        return 1.0 - np.abs(energy_levels[:, np.newaxis] - strategy_matrix.difficulty[np.newaxis, :])
+
     def update(self, context_vector, strategy_vector, reward):
         pass
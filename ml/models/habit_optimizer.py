@@ -1,5 +1,6 @@
-from .base_model import BaseModel
+from .base_model import BaseModel, lookup_weights
 import random
+import numpy as np
 
 class HabitOptimizer(BaseModel):
     """
@@ -7,8 +8,10 @@ class HabitOptimizer(BaseModel):
     Focus: Prioritizes consistency and repetition. 
     Logic: If a user has a streak with a strategy, keep recommending it to build automaticity.
     """
-    def __init__(self):
-        super().__init__("habit_optimizer")
+    personalized = True
+
+    def __init__(self, store=None):
+        super().__init__("habit_optimizer", store)
         # Weights: {strategy_name: streak_count}
         
     def predict(self, context_vector, available_strategies):
@@ -27,19 +30,42 @@ class HabitOptimizer(BaseModel):
             scores[name] = score
         return scores
 
+    def predict_batch(self, context_matrix, strategy_matrix, user_id=None):
+        # Streaks do not depend on context, so one row is broadcast to every context
+        streaks = lookup_weights(self.state(user_id), strategy_matrix.names)
+        return np.tile(_streak_scores(streaks), (len(context_matrix), 1))
+
+    def init_cohort(self, strategy_matrix, n):
+        streaks = lookup_weights(self.weights, strategy_matrix.names).astype(np.int32)
+        return {"streaks": np.tile(streaks, (n, 1))}
+
+    def predict_cohort(self, context_matrix, strategy_matrix, cohort_state):
+        return _streak_scores(cohort_state["streaks"])
+
+    def update_cohort(self, cohort_state, strategy_ids, successes):
+        # Same rule as update_streak: +1 on success, -1 (floored at 0) on a miss
+        rows = np.arange(len(strategy_ids))
+        streaks = cohort_state["streaks"]
+        streaks[rows, strategy_ids] = np.maximum(0, streaks[rows, strategy_ids] + np.where(successes, 1, -1))
+
     def update(self, context_vector, strategy_vector, reward):
         # We need the strategy name to update the streak. 
         # In a real implementation, we'd pass the name or ID.
         # For this prototype, we'll assume the 'strategy_vector' contains the name or we handle it in the coordinator.
         pass 
         
-    def update_streak(self, strategy_name, success):
+    def update_streak(self, strategy_name, success, user_id=None):
         """Specific method for this expert to track streaks."""
-        current = self.weights.get(strategy_name, 0)
+        weights = self.state(user_id)
+        current = weights.get(strategy_name, 0)
         if success:
-            self.weights[strategy_name] = current + 1
+            weights[strategy_name] = current + 1
         else:
             # Lally: "Missing one opportunity does not materially affect the habit."
             # So we don't reset to 0, maybe just decrement slightly or stay same.
-            self.weights[strategy_name] = max(0, current - 1)
-        self.save()
+            weights[strategy_name] = max(0, current - 1)
+        self.record(strategy_name, user_id)
+
+def _streak_scores(streaks):
+    """Vote for any array of streak counts (see `predict`)."""
+    return 0.1 + np.where(streaks > 0, np.minimum(0.8, streaks * 0.1), 0.0)
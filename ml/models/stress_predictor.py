@@ -1,4 +1,5 @@
 from .base_model import BaseModel
+import numpy as np
 
 class StressPredictor(BaseModel):
     """
@@ -6,8 +7,10 @@ class StressPredictor(BaseModel):
     Focus: Detects high stress/burnout and prioritizes regulation strategies.
     Logic: If context.stress is high, boost 'Retention/Reflection' strategies.
     """
-    def __init__(self):
-        super().__init__("stress_predictor")
+    deterministic = True
+
+    def __init__(self, store=None):
+        super().__init__("stress_predictor", store)
         
     def predict(self, context_vector, available_strategies):
         # context_vector: [Time..., Energy, Stress]
@@ -35,6 +38,11 @@ class StressPredictor(BaseModel):
             scores[name] = score
         return scores
 
+    def predict_batch(self, context_matrix, strategy_matrix, user_id=None):
+        stressed = context_matrix[:, -1] > 0.7
+        regulation = strategy_matrix.tag_mask("retention", "emotion", "reflection", "self-compassion")
+        return np.where(stressed[:, np.newaxis], np.where(regulation, 0.9, 0.1)[np.newaxis, :], 0.3)
+
     def update(self, context_vector, strategy_vector, reward):
         # This model is rule-based mostly, but could learn which regulation strategies work best
         pass
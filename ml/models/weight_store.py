@@ -0,0 +1,154 @@
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Any
+
+
+class JournaledWeightStore:
+    """
+    Write-behind persistence for an expert's weights.
+
+    Updates are buffered in memory and appended in batches to a journal
+    (`<name>_weights.journal`). Once the journal grows past a size or age threshold
+    it is compacted into the JSON snapshot (`<name>_weights.json`), which is written
+    to a temp file and swapped in with an atomic rename, so a crash never leaves a
+    truncated snapshot behind. On load the journal is replayed over the snapshot.
+    """
+
+    def __init__(self, model_path: str, journal_batch: int = 64, flush_interval: float = 5.0,
+                 compact_every: int = 1000, compact_interval: float = 300.0):
+        self.model_path = model_path
+        self.journal_path = os.path.splitext(model_path)[0] + ".journal"
+        self.journal_batch = journal_batch
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+
+        self.pending = []  # Serialized journal lines not yet on disk
+        self.journal_records = 0
+        self.last_flush = time.monotonic()
+        self.last_compact = time.monotonic()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.model_path) or os.path.exists(self.journal_path)
+
+    def load(self) -> Dict[str, Any]:
+        """Read the snapshot and replay the journal on top of it."""
+        weights = {}
+        if os.path.exists(self.model_path):
+            with open(self.model_path, 'r') as f:
+                weights = json.load(f)
+
+        self.journal_records = 0
+        if os.path.exists(self.journal_path):
+            intact = 0  # Bytes of whole, readable lines
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append; everything before it is intact
+                        break
+                    weights[entry["k"]] = entry["v"]
+                    self.journal_records += 1
+                    intact += len(line)
+                    last_line = line
+            if intact < os.path.getsize(self.journal_path):
+                # Cut the torn tail, or the next append would be glued onto it and lost on replay
+                print(f"[JournaledWeightStore] Dropping a torn record at the end of {self.journal_path}")
+                os.truncate(self.journal_path, intact)
+            if intact and not last_line.endswith(b"\n"):
+                with open(self.journal_path, 'a') as f:
+                    f.write("\n")
+        return weights
+
+    def record(self, key: str, value: Any, weights: Dict[str, Any]) -> bool:
+        """
+        Buffer a single weight update. Disk is only touched once a batch is due.
+        Returns True if this call flushed the buffer.
+        """
+        # Serialize now: values such as Beta params may be mutated in place later
+        self.pending.append(json.dumps({"k": key, "v": value}) + "\n")
+        if len(self.pending) >= self.journal_batch or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(weights)
+            return True
+        return False
+
+    def flush(self, weights: Dict[str, Any]) -> bool:
+        """
+        Append buffered updates to the journal, compacting it if it has grown too large or old.
+        Returns True if anything was written.
+        """
+        wrote = bool(self.pending)
+        if self.pending:
+            directory = os.path.dirname(self.journal_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.journal_path, 'a') as f:
+                f.writelines(self.pending)
+            self.journal_records += len(self.pending)
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+        if self.journal_records >= self.compact_every or (
+                self.journal_records and time.monotonic() - self.last_compact >= self.compact_interval):
+            self.compact(weights)
+            wrote = True
+        return wrote
+
+    def compact(self, weights: Dict[str, Any]):
+        """Write a full snapshot atomically and truncate the journal."""
+        directory = os.path.dirname(self.model_path) or "."
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Flush first so the journal never holds a value older than the snapshot
+        # (replaying it after a crash between the rename and the truncate is then harmless)
+        if self.pending:
+            with open(self.journal_path, 'a') as f:
+                f.writelines(self.pending)
+            self.pending = []
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(weights, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.model_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_records = 0
+        self.last_flush = self.last_compact = time.monotonic()
+
+
+class MemoryWeightStore:
+    """
+    Keeps an expert's weights in process memory only: nothing is read from or written
+    to disk. Used for simulations and forked coordinators (see OnlineCoordinator.fork),
+    so they neither do I/O in their inner loop nor touch the shared weights files.
+    """
+
+    def __init__(self, weights: Dict[str, Any] = None):
+        self.weights = weights
+
+    def exists(self) -> bool:
+        return self.weights is not None
+
+    def load(self) -> Dict[str, Any]:
+        return dict(self.weights)
+
+    def record(self, key: str, value: Any, weights: Dict[str, Any]) -> bool:
+        return False
+
+    def flush(self, weights: Dict[str, Any]) -> bool:
+        return False
+
+    def compact(self, weights: Dict[str, Any]):
+        self.weights = dict(weights)
@@ -0,0 +1,192 @@
+import sys
+import os
+import time
+import numpy as np
+from typing import Dict, List, Any
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.strategy_matrix import StrategyMatrix
+from ml.online_coordinator import unique_rows
+from data_pipeline.preprocessor import DataPreprocessor
+
+# Upper bound on the (candidates x contexts x strategies) blended scores held at once (float64: 32 MB)
+SCORE_BLOCK_ELEMENTS = 1 << 22
+
+
+class ReplayEvaluator:
+    """
+    Offline (off-policy) evaluation of ensemble weight configurations.
+
+    Given logged (context, chosen strategy, reward) data, e.g. from
+    DataPreprocessor.process_interaction_log / iter_interaction_batches, it estimates
+    how well the council would have done under each candidate `expert_weights`
+    vector, without re-running simulations:
+
+    - replay: mean reward over the events where the candidate policy picks the
+      logged strategy (rejection-sampling replay).
+    - ips / snips: (self-normalized) inverse-propensity estimates.
+
+    Expert scores depend only on the context, so they are computed once per distinct
+    context row and shared by every candidate; each candidate then only costs an
+    argmax over (distinct contexts x strategies) and a lookup into per-context reward
+    tables. With discrete contexts (a bounded number of distinct rows) the cost of a
+    candidate therefore does not grow with the number of logged events; with continuous
+    contexts nearly every event is its own row and the cost is linear in events.
+    Candidates are blended in blocks of at most `block_elements` scores, so memory stays
+    bounded however many candidates and contexts there are.
+    """
+
+    def __init__(self, experts: List[Any], available_strategies, preprocessor: DataPreprocessor = None,
+                 block_elements: int = SCORE_BLOCK_ELEMENTS):
+        self.preprocessor = preprocessor or DataPreprocessor()
+        self.block_elements = block_elements
+        if isinstance(available_strategies, StrategyMatrix):
+            self.matrix = available_strategies
+        elif hasattr(available_strategies, "ids_with_tag"):
+            self.matrix = StrategyMatrix.from_catalog(available_strategies, self.preprocessor)
+        else:
+            self.matrix = StrategyMatrix(available_strategies, self.preprocessor)
+        self.experts = list(experts)
+        self.expert_names = [e.name for e in self.experts]
+
+        # Strategies are matched on their feature vector when the log has no strategy IDs
+        self._feature_rows, self._feature_class = np.unique(
+            self.matrix.features.astype(np.float32), axis=0, return_inverse=True
+        )
+        self._feature_class = self._feature_class.reshape(-1)
+
+    def weight_matrix(self, weight_configs) -> np.ndarray:
+        """Candidate configs (list of {expert_name: weight} dicts or a C x E array) -> C x E array."""
+        if isinstance(weight_configs, np.ndarray):
+            return np.atleast_2d(weight_configs).astype(float)
+        return np.array([[config.get(name, 1.0) for name in self.expert_names] for config in weight_configs], dtype=float)
+
+    def evaluate(self, contexts: np.ndarray, logged_strategies: np.ndarray, rewards: np.ndarray,
+                 weight_configs, propensities: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        Args:
+            contexts: (N x d) normalized context vectors.
+            logged_strategies: (N,) strategy IDs (the matrix's `ids`, i.e. catalog IDs such as
+                EventLog `strategy_id`; -1 or unknown IDs never match), or (N x F) encoded
+                strategy vectors as produced by process_interaction_log.
+            rewards: (N,) observed rewards.
+            weight_configs: C candidate weight vectors (see `weight_matrix`).
+            propensities: (N,) probability the logging policy chose the logged strategy.
+                Defaults to a uniform logging policy.
+
+        Returns: {"replay", "ips", "snips", "matches", "coverage"} arrays of length C.
+        """
+        contexts = np.asarray(contexts, dtype=float)
+        rewards = np.asarray(rewards, dtype=float)
+        weights = self.weight_matrix(weight_configs)
+        n_events, n_strategies = len(rewards), len(self.matrix)
+
+        # 1. Expert scores per distinct context: E x U x S
+        unique_contexts, context_index = unique_rows(contexts)
+        expert_scores = np.stack([e.predict_expected_batch(unique_contexts, self.matrix) for e in self.experts])
+
+        # 2. Every candidate's greedy choice per distinct context: C x U
+        choices = self._greedy_choices(weights, expert_scores)
+
+        # 3. What to compare against the log: strategy IDs, or feature classes
+        logged = np.asarray(logged_strategies)
+        if logged.ndim == 1:
+            logged_key = self.matrix.rows_of(logged)
+            choice_key = choices
+            default_propensity = np.full(n_events, 1.0 / n_strategies)
+        else:
+            logged_key = self._classify(logged)
+            choice_key = self._feature_class[choices]
+            class_sizes = np.bincount(self._feature_class, minlength=len(self._feature_rows))
+            default_propensity = np.where(logged_key >= 0, class_sizes[np.maximum(logged_key, 0)], 1) / n_strategies
+        inverse_propensity = 1.0 / (default_propensity if propensities is None else np.asarray(propensities, dtype=float))
+
+        # 4. Sufficient statistics per (distinct context, logged key), built in one pass over
+        #    the events; each candidate then just gathers the cells it would have chosen.
+        n_keys = n_strategies if logged.ndim == 1 else len(self._feature_rows)
+        valid = (logged_key >= 0) & (logged_key < n_keys)
+        cell = context_index[valid] * n_keys + logged_key[valid]
+        size = len(unique_contexts) * n_keys
+        r, w = rewards[valid], inverse_propensity[valid]
+        tables = [np.bincount(cell, weights=v, minlength=size).reshape(len(unique_contexts), n_keys)
+                  for v in (np.ones(len(cell)), r, r * w, w)]
+
+        rows = np.arange(len(unique_contexts))[np.newaxis, :]
+        matches, reward_sum, ips_sum, ips_weight = (t[rows, choice_key].sum(axis=1) for t in tables)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "replay": np.where(matches > 0, reward_sum / matches, np.nan),
+                "ips": ips_sum / max(n_events, 1),
+                "snips": np.where(ips_weight > 0, ips_sum / ips_weight, np.nan),
+                "matches": matches,
+                "coverage": matches / max(n_events, 1)
+            }
+
+    def _greedy_choices(self, weights: np.ndarray, expert_scores: np.ndarray) -> np.ndarray:
+        """
+        argmax over strategies of the weighted expert scores, for every candidate (C x E
+        weights) and distinct context (E x U x S scores). Blends one block of contexts and
+        candidates at a time, keeping only the argmax, instead of the full C x U x S array.
+        """
+        n_contexts, n_strategies = expert_scores.shape[1:]
+        choices = np.empty((len(weights), n_contexts), dtype=np.intp)
+        context_block = max(1, min(n_contexts, self.block_elements // max(n_strategies, 1)))
+        candidate_block = max(1, self.block_elements // (context_block * max(n_strategies, 1)))
+        for u in range(0, n_contexts, context_block):
+            scores = expert_scores[:, u:u + context_block]
+            for c in range(0, len(weights), candidate_block):
+                blended = np.einsum("ce,eus->cus", weights[c:c + candidate_block], scores)
+                choices[c:c + candidate_block, u:u + context_block] = np.argmax(blended, axis=2)
+        return choices
+
+    def best(self, results: Dict[str, np.ndarray], weight_configs, metric: str = "snips") -> Dict[str, Any]:
+        """The winning candidate for `metric`, as {expert_name: weight} plus its estimate."""
+        weights = self.weight_matrix(weight_configs)
+        winner = int(np.nanargmax(results[metric]))
+        return {
+            "expert_weights": dict(zip(self.expert_names, weights[winner].tolist())),
+            metric: float(results[metric][winner]),
+            "index": winner
+        }
+
+    def _classify(self, strategy_vectors: np.ndarray) -> np.ndarray:
+        """Feature class of each logged strategy vector (-1 if it matches no strategy in the catalog)."""
+        rows = np.asarray(strategy_vectors, dtype=np.float32)
+        # Lexicographic search over the sorted unique feature rows
+        view_dtype = np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))
+        table = np.ascontiguousarray(self._feature_rows).view(view_dtype).reshape(-1)
+        keys = np.ascontiguousarray(rows).view(view_dtype).reshape(-1)
+        order = np.argsort(table)
+        position = np.searchsorted(table[order], keys)
+        position = np.minimum(position, len(table) - 1)
+        found = table[order][position] == keys
+        return np.where(found, order[position], -1)
+
+
+if __name__ == "__main__":
+    # Sweep random weight vectors over a synthetic log
+    from ml.online_coordinator import OnlineCoordinator
+    from processor.research_engine import ResearchEngine
+
+    engine = ResearchEngine()
+    coordinator = OnlineCoordinator(seed=0)
+    evaluator = ReplayEvaluator(coordinator.experts, engine.catalog, coordinator.preprocessor)
+
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    levels = np.array([0.0, 0.5, 1.0])
+    contexts = np.zeros((n, 6))
+    contexts[np.arange(n), rng.integers(0, 4, n)] = 1
+    contexts[:, 4] = levels[rng.integers(0, 3, n)]
+    contexts[:, 5] = levels[rng.integers(0, 3, n)]
+    logged = rng.choice(evaluator.matrix.ids, n)
+    rewards = np.where(rng.random(n) < 0.5, 1.0, -0.1)
+
+    configs = rng.uniform(0.0, 2.0, size=(200, len(coordinator.experts)))
+    start = time.perf_counter()
+    results = evaluator.evaluate(contexts, logged, rewards, configs)
+    print(f"Evaluated {len(configs)} configurations over {n} events in {time.perf_counter() - start:.2f}s")
+    print(evaluator.best(results, configs))
@@ -1,6 +1,10 @@
 import sys
 import os
 import json
+import time
+import asyncio
+import copy
+from collections import OrderedDict
 import numpy as np
 
 # Add parent dir to path to import models
@@ -10,23 +14,65 @@ from ml.models.habit_optimizer import HabitOptimizer
 from ml.models.stress_predictor import StressPredictor
 from ml.models.curiosity_tuner import CuriosityTuner
 from ml.models.flow_manager import FlowManager
+from ml.strategy_matrix import StrategyMatrix
+from ml.metrics import MetricsRegistry, TraceBuffer
+from ml.snapshot import SnapshotWeightStore
+from ml.models.weight_store import MemoryWeightStore
 from data_pipeline.preprocessor import DataPreprocessor
 
+class SyncExpertAdapter:
+    """
+    Lets a regular (synchronous) expert take part in the async council:
+    `predict_async` runs its `predict_vector` in a worker thread.
+    """
+    def __init__(self, expert):
+        self.expert = expert
+        self.name = expert.name
+
+    async def predict_async(self, context_vector, strategy_matrix, user_id=None):
+        return await asyncio.to_thread(self.expert.predict_vector, context_vector, strategy_matrix, user_id)
+
 class OnlineCoordinator:
     """
     The 'Boss'. Receives user context, queries the Council of Experts, 
     and uses a weighted voting system to select the best strategy.
     """
-    def __init__(self):
+    def __init__(self, store_factory=None, state_store=None, metrics=None, trace_size=0, verbose=False, seed=None,
+                 decision_cache_size=256, event_log=None):
+        """
+        Args:
+            store_factory (callable, optional): Maps an expert name to its persistence store.
+                Defaults to each expert's write-behind JournaledWeightStore under ml/data/.
+            state_store (ShardedStateStore, optional): Per-user state backend. When set,
+                calls that pass a `user_id` read and update that user's own expert state.
+            metrics (MetricsRegistry, optional): Where latency histograms and counters go.
+                A fresh registry is created if omitted.
+            trace_size (int): Keep the last N deliberation traces in `self.traces`.
+                0 (default) disables tracing entirely.
+            verbose (bool): Print the Council Deliberation for every decision.
+            seed (int, optional): Seeds the stochastic experts (Thompson sampling) for reproducible runs.
+            decision_cache_size (int): Max memoized score vectors of deterministic experts
+                (0 disables memoization).
+            event_log (EventLog, optional): Append-only log receiving one record per
+                `log_outcome`, joined with the decision that produced it.
+        """
         self.preprocessor = DataPreprocessor()
+        make_store = store_factory or (lambda name: None)
         
         # The Council
         self.experts = [
-            HabitOptimizer(),
-            StressPredictor(),
-            CuriosityTuner(),
-            FlowManager()
+            HabitOptimizer(make_store("habit_optimizer")),
+            StressPredictor(make_store("stress_predictor")),
+            CuriosityTuner(make_store("curiosity_tuner"), seed=seed),
+            FlowManager(make_store("flow_manager"))
         ]
+        self.state_store = state_store
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.traces = TraceBuffer(trace_size) if trace_size else None
+        self.verbose = verbose
+        for expert in self.experts:
+            expert.state_store = state_store
+            expert.metrics = self.metrics
         
         # How much we trust each expert (could be learned over time)
         self.expert_weights = {
@@ -36,56 +82,473 @@ class OnlineCoordinator:
             "flow_manager": 1.2
         }
 
-    def select_strategy(self, user_context, available_strategies):
+        # Compiled view of the most recently used strategy list
+        self._compiled_source = None
+        self._compiled: StrategyMatrix = None
+
+        # Memoized votes of deterministic experts: (expert, context bytes, catalog version) -> scores.
+        # normalize_context only produces a few dozen distinct vectors, so hit rates are high.
+        self.decision_cache_size = decision_cache_size
+        self._decision_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+        # Decisions awaiting their outcome, for the event log: (user_id, strategy name) -> decision
+        self.event_log = event_log
+        self._logged_catalog = None  # Version of the last matrix registered with the event log
+        self._pending_decisions: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._max_pending_decisions = 10000
+
+    @classmethod
+    def from_snapshot(cls, snapshot_dir, **kwargs):
+        """
+        Builds a coordinator whose experts read their state lazily from a binary snapshot
+        (see ml/snapshot.py) through read-only memory maps. Updates stay in memory.
+        """
+        return cls(store_factory=lambda name: SnapshotWeightStore(snapshot_dir, name), **kwargs)
+
+    @classmethod
+    def in_memory(cls, weights=None, **kwargs):
+        """
+        Builds a coordinator whose experts never touch disk. `weights` optionally maps
+        expert names to starting weights; experts without an entry start fresh.
+        """
+        weights = weights or {}
+        return cls(store_factory=lambda name: MemoryWeightStore(weights.get(name)), **kwargs)
+
+    def fork(self, seed=None):
+        """
+        A cheap, fully isolated copy of this coordinator for simulations: same expert
+        weights, ensemble weights and compiled catalog, but every later update stays in
+        the fork's memory (see BaseModel.fork). The fork has no per-user state store or
+        event log, and its own metrics. Deterministic expert scores already in the
+        decision cache are copied over, since they do not depend on learned state.
+        `seed` reseeds the stochastic experts; otherwise they get a stream spawned from the parent's.
+        """
+        child = copy.copy(self)
+        child.experts = [expert.fork(seed) for expert in self.experts]
+        child.expert_weights = dict(self.expert_weights)
+        child.preprocessor = copy.copy(self.preprocessor)
+        child.preprocessor._strategy_cache = dict(self.preprocessor._strategy_cache)
+        child.state_store = None
+        child.event_log = None
+        child.metrics = MetricsRegistry(enabled=self.metrics.enabled)
+        child.traces = TraceBuffer(self.traces.traces.maxlen) if self.traces is not None else None
+        for expert in child.experts:
+            expert.metrics = child.metrics
+        child._decision_cache = OrderedDict(self._decision_cache)
+        child._pending_decisions = OrderedDict()
+        return child
+
+    def export_state(self):
+        """
+        Learned state of every expert plus the ensemble weights, as plain JSON-serializable
+        data (used for simulation checkpoints; per-user state store contents are not included).
+        """
+        return {
+            "expert_weights": dict(self.expert_weights),
+            "experts": {expert.name: expert.export_state() for expert in self.experts}
+        }
+
+    def import_state(self, state):
+        """Restores `export_state` output in memory. Meant for in-memory/forked coordinators."""
+        self.expert_weights = dict(state["expert_weights"])
+        for expert in self.experts:
+            if expert.name in state["experts"]:
+                expert.import_state(state["experts"][expert.name])
+
+    def invalidate_decision_cache(self, *_):
+        """
+        Drops all memoized expert scores. Register it with
+        `ResearchEngine.add_reload_listener` so a catalog reload clears stale entries.
+        """
+        self._decision_cache.clear()
+
+    def _predict(self, expert, ctx_vec, matrix, user_id=None):
+        """An expert's score vector, served from the decision cache when the expert is deterministic."""
+        if not self.decision_cache_size or not getattr(expert, "deterministic", False):
+            return expert.predict_vector(ctx_vec, matrix, user_id)
+
+        key = (expert.name, np.asarray(ctx_vec, dtype=float).tobytes(), matrix.version)
+        votes = self._decision_cache.get(key)
+        if votes is not None:
+            self._decision_cache.move_to_end(key)
+            self.metrics.inc("decision_cache_hits_total")
+            return votes
+
+        self.metrics.inc("decision_cache_misses_total")
+        votes = expert.predict_vector(ctx_vec, matrix, user_id)
+        votes.flags.writeable = False  # Shared between calls
+        self._decision_cache[key] = votes
+        while len(self._decision_cache) > self.decision_cache_size:
+            self._decision_cache.popitem(last=False)
+        return votes
+
+    def compile(self, available_strategies):
+        """
+        Encodes a strategy list (or a ResearchEngine StrategyCatalog) into a StrategyMatrix
+        the experts can score in one pass. The last compiled source is cached, so passing
+        the same list or catalog object again costs nothing.
+        """
+        if isinstance(available_strategies, StrategyMatrix):
+            return available_strategies
+        if (self._compiled_source is not available_strategies
+                or len(self._compiled) != len(available_strategies)):
+            if hasattr(available_strategies, "ids_with_tag"):
+                self._compiled = StrategyMatrix.from_catalog(available_strategies, self.preprocessor)
+            else:
+                self._compiled = StrategyMatrix(available_strategies, self.preprocessor)
+            self._compiled_source = available_strategies
+        return self._compiled
+
+    def select_strategy(self, user_context, available_strategies, user_id=None):
         """
         Main entry point.
         1. Preprocess Context
         2. Ask each Expert for scores
         3. Aggregate scores
         4. Return best strategy
+
+        `available_strategies` may be a list of strategy dicts, a StrategyCatalog or a compiled StrategyMatrix.
+        `user_id` selects per-user expert state when a state store is configured.
         """
+        start = time.perf_counter()
+
         # 1. Preprocess
         ctx_vec = self.preprocessor.normalize_context(user_context)
+        matrix = self.compile(available_strategies)
         
-        # 2. Gather Votes
-        final_scores = {s["name"]: 0.0 for s in available_strategies}
-        
-        print("\n--- Council Deliberation ---")
-        for expert in self.experts:
-            votes = expert.predict(ctx_vec, available_strategies)
-            weight = self.expert_weights.get(expert.name, 1.0)
-            
-            print(f"[{expert.name}] (Weight: {weight})")
-            # Sort top 3 for debug
-            top_votes = sorted(votes.items(), key=lambda x: x[1], reverse=True)[:2]
-            for name, score in top_votes:
-                print(f"  - Recommends '{name}': {score:.2f}")
-                
-            # Weighted Sum
-            for name, score in votes.items():
-                final_scores[name] += score * weight
+        # 2. Gather Votes (kept per expert only when someone is going to look at them)
+        keep_votes = self.verbose or self.traces is not None or self.event_log is not None
+        final_scores, expert_votes = self._score(ctx_vec, matrix, user_id, keep_votes)
 
         # 3. Select Winner
-        best_strategy_name = max(final_scores, key=final_scores.get)
-        best_strategy = next(s for s in available_strategies if s["name"] == best_strategy_name)
-        
-        print(f"\n>>> FINAL DECISION: {best_strategy_name} (Score: {final_scores[best_strategy_name]:.2f})")
+        best = int(np.argmax(final_scores))
+        best_strategy = matrix.strategies[best]
+
+        if self.event_log is not None:
+            self._remember_decision(user_id, matrix, best, ctx_vec, expert_votes)
+
+        self.metrics.observe("decision_seconds", time.perf_counter() - start)
+        self.metrics.inc("decisions_total")
+        if keep_votes:
+            self._deliberation(ctx_vec, matrix, expert_votes, final_scores, best, user_id)
         return best_strategy
 
-    def log_outcome(self, strategy_name, success):
+    async def select_strategy_async(self, user_context, available_strategies, deadline=0.05,
+                                    expert_budgets=None, user_id=None):
+        """
+        Async variant of `select_strategy` that evaluates the experts concurrently under a deadline.
+
+        Experts exposing `predict_async` are awaited directly; the existing `predict`
+        experts are wrapped in a SyncExpertAdapter. An expert that misses its budget
+        (`expert_budgets[name]`, capped by `deadline`, in seconds) is dropped from the vote,
+        and the remaining expert weights are rescaled so they still sum to the full council
+        weight. An expert that raises is left out of the vote the same way, but reported
+        separately (in "errors", the expert_errors_total metric and on stdout) rather than
+        as a timeout. A dropped thread-backed expert cannot be interrupted; it finishes in
+        the background and its result is discarded.
+
+        With a `user_id` and a state store, the user's state is loaded on the event-loop
+        thread before the experts are dispatched to worker threads.
+
+        Returns: {"strategy", "score", "contributors": [expert names], "dropped": [timed-out
+            expert names], "errors": {expert name: error message}}
+        Raises: TimeoutError if no expert answered in time.
+        """
+        start = time.perf_counter()
+        ctx_vec = self.preprocessor.normalize_context(user_context)
+        matrix = self.compile(available_strategies)
+        expert_budgets = expert_budgets or {}
+        if user_id is not None and self.state_store is not None:
+            for expert in self.experts:
+                if getattr(expert, "personalized", False):
+                    self.state_store.user_state(user_id, expert.name)
+
+        async def run(expert):
+            budget = min(expert_budgets.get(expert.name, deadline), deadline)
+            council_member = expert if hasattr(expert, "predict_async") else SyncExpertAdapter(expert)
+            expert_start = time.perf_counter()
+            try:
+                votes = await asyncio.wait_for(council_member.predict_async(ctx_vec, matrix, user_id), budget)
+            except asyncio.TimeoutError:
+                self.metrics.inc("expert_timeouts_total", expert=expert.name)
+                return "timeout", None
+            except Exception as e:
+                self.metrics.inc("expert_errors_total", expert=expert.name)
+                print(f"[{expert.name}] Error during async prediction: {e!r}")
+                return "error", f"{type(e).__name__}: {e}"
+            self.metrics.observe("expert_predict_seconds", time.perf_counter() - expert_start, expert=expert.name)
+            return "ok", votes
+
+        outcomes = await asyncio.gather(*(run(expert) for expert in self.experts))
+        results = [votes if status == "ok" else None for status, votes in outcomes]
+
+        contributors = [e.name for e, (status, _) in zip(self.experts, outcomes) if status == "ok"]
+        dropped = [e.name for e, (status, _) in zip(self.experts, outcomes) if status == "timeout"]
+        errors = {e.name: message for e, (status, message) in zip(self.experts, outcomes) if status == "error"}
+        if not contributors:
+            raise TimeoutError(f"No expert answered within the {deadline:.3f}s deadline"
+                               + (f" (errors: {errors})" if errors else ""))
+
+        # Renormalize: the experts that made it share the whole council's weight
+        total_weight = sum(self.expert_weights.get(e.name, 1.0) for e in self.experts)
+        present_weight = sum(self.expert_weights.get(name, 1.0) for name in contributors)
+        scale = total_weight / present_weight if present_weight else 1.0
+
+        final_scores = np.zeros(len(matrix))
+        for expert, votes in zip(self.experts, results):
+            if votes is not None:
+                final_scores += votes * self.expert_weights.get(expert.name, 1.0) * scale
+
+        best = int(np.argmax(final_scores))
+        self.metrics.observe("async_decision_seconds", time.perf_counter() - start)
+        self.metrics.inc("decisions_total")
+        return {
+            "strategy": matrix.strategies[best],
+            "score": float(final_scores[best]),
+            "contributors": contributors,
+            "dropped": dropped,
+            "errors": errors
+        }
+
+    def recommend(self, user_context, available_strategies, k=3, user_id=None):
+        """
+        Returns a ranked shortlist of the top-k strategies for one context.
+
+        Uses partial selection (argpartition), so cost stays O(S) on large catalogs;
+        only the k winners are sorted.
+
+        Returns: List of {"strategy", "score", "breakdown": {expert_name: raw vote}}, best first.
+        """
+        start = time.perf_counter()
+        ctx_vec = self.preprocessor.normalize_context(user_context)
+        matrix = self.compile(available_strategies)
+        final_scores, expert_votes = self._score(ctx_vec, matrix, user_id, keep_votes=True)
+
+        ranked = []
+        for i in top_k(final_scores, k):
+            ranked.append({
+                "strategy": matrix.strategies[i],
+                "score": float(final_scores[i]),
+                "breakdown": {name: float(votes[i]) for name, votes in expert_votes.items()}
+            })
+
+        self.metrics.observe("recommend_seconds", time.perf_counter() - start)
+        return ranked
+
+    def _score(self, ctx_vec, matrix, user_id=None, keep_votes=False):
+        """
+        Asks every expert to score the compiled strategies and sums the weighted votes.
+        Returns: (final score vector, {expert_name: votes} if keep_votes else {})
+        """
+        final_scores = np.zeros(len(matrix))
+        expert_votes = {}
+        for expert in self.experts:
+            expert_start = time.perf_counter()
+            votes = self._predict(expert, ctx_vec, matrix, user_id)
+            self.metrics.observe("expert_predict_seconds", time.perf_counter() - expert_start, expert=expert.name)
+
+            # Weighted Sum
+            final_scores += votes * self.expert_weights.get(expert.name, 1.0)
+            if keep_votes:
+                expert_votes[expert.name] = votes
+        return final_scores, expert_votes
+
+    def _remember_decision(self, user_id, matrix, best, ctx_vec, expert_votes):
+        """Keeps what the event log needs until the decision's outcome arrives (bounded)."""
+        if matrix.version != self._logged_catalog:
+            # IDs are only meaningful with their names; rejects catalogs that clash with the log
+            self.event_log.register_strategies(matrix.ids, matrix.names, matrix.version)
+            self._logged_catalog = matrix.version
+        scores = [float(expert_votes[e.name][best]) if e.name in expert_votes else np.nan for e in self.experts]
+        key = (user_id, matrix.names[best])
+        self._pending_decisions.pop(key, None)
+        self._pending_decisions[key] = (ctx_vec, int(matrix.ids[best]), scores)
+        while len(self._pending_decisions) > self._max_pending_decisions:
+            self._pending_decisions.popitem(last=False)
+
+    def _deliberation(self, ctx_vec, matrix, expert_votes, final_scores, best, user_id):
+        """Records (and optionally prints) the trace of a single decision."""
+        top_votes = {}
+        for name, votes in expert_votes.items():
+            top = top_k(votes, 2)
+            top_votes[name] = [(matrix.names[i], float(votes[i])) for i in top]
+
+        if self.traces is not None:
+            self.traces.append({
+                "timestamp": time.time(),
+                "user_id": user_id,
+                "context": ctx_vec.tolist(),
+                "top_votes": top_votes,
+                "decision": matrix.names[best],
+                "score": float(final_scores[best])
+            })
+
+        if self.verbose:
+            print("\n--- Council Deliberation ---")
+            for name, votes in top_votes.items():
+                print(f"[{name}] (Weight: {self.expert_weights.get(name, 1.0)})")
+                for strategy_name, score in votes:
+                    print(f"  - Recommends '{strategy_name}': {score:.2f}")
+            print(f"\n>>> FINAL DECISION: {matrix.names[best]} (Score: {final_scores[best]:.2f})")
+
+    def select_strategies(self, user_contexts, available_strategies, user_ids=None):
+        """
+        Batch entry point: selects a strategy for N user contexts in one pass.
+
+        `user_contexts` is either a list of context dicts or an already normalized
+        (N x d) context matrix. Every expert scores the whole batch at once, producing
+        an (N x S) vote matrix, so the per-call Python overhead is paid once per wave.
+        `user_ids` (one per context) routes personalized experts to each user's state;
+        those experts are then evaluated once per distinct user in the batch.
+
+        Returns: (List of chosen strategies, np.ndarray of their final scores)
+        """
+        start = time.perf_counter()
+        if isinstance(user_contexts, np.ndarray):
+            ctx_matrix = np.atleast_2d(user_contexts)
+        else:
+            ctx_matrix = self.preprocessor.normalize_contexts(user_contexts)
+        matrix = self.compile(available_strategies)
+
+        final_scores = np.zeros((len(ctx_matrix), len(matrix)))
+        for expert in self.experts:
+            weight = self.expert_weights.get(expert.name, 1.0)
+            if self.decision_cache_size and getattr(expert, "deterministic", False) and len(ctx_matrix):
+                final_scores += self._deterministic_batch(expert, ctx_matrix, matrix) * weight
+                continue
+            if user_ids is None or self.state_store is None or not expert.personalized:
+                final_scores += expert.predict_batch(ctx_matrix, matrix) * weight
+                continue
+            # Group rows by user so each user's state is loaded once per batch
+            users, inverse = np.unique([str(u) for u in user_ids], return_inverse=True)
+            groups = np.split(np.argsort(inverse, kind="stable"), np.cumsum(np.bincount(inverse))[:-1])
+            for user_id, rows in zip(users, groups):
+                final_scores[rows] += expert.predict_batch(ctx_matrix[rows], matrix, user_id) * weight
+
+        best = np.argmax(final_scores, axis=1)
+        chosen = [matrix.strategies[i] for i in best]
+
+        self.metrics.observe("batch_decision_seconds", time.perf_counter() - start)
+        self.metrics.inc("decisions_total", len(chosen))
+        return chosen, final_scores[np.arange(len(ctx_matrix)), best]
+
+    def _deterministic_batch(self, expert, ctx_matrix, matrix, unique=None):
+        """
+        (N x S) votes of a deterministic expert; only the distinct contexts are scored (or served
+        from the cache). `unique` is a precomputed unique_rows(ctx_matrix) shared between experts.
+        """
+        rows, inverse = unique if unique is not None else unique_rows(ctx_matrix)
+        unique_votes = np.vstack([self._predict(expert, row, matrix) for row in rows])
+        return unique_votes[inverse]
+
+    def init_cohort(self, available_strategies, n):
+        """
+        State for a simulated cohort of n users (see simulated_testing/cohort_simulation.py).
+        Every member starts from the current global expert weights; the personalized
+        experts then keep each member's state as (n x S) arrays, so the whole cohort is
+        decided and updated with array operations. The global weights are never modified.
+
+        Returns: {expert_name: {array_name: (n x S) array}}
+        """
+        matrix = self.compile(available_strategies)
+        return {expert.name: expert.init_cohort(matrix, n) for expert in self.experts}
+
+    def select_cohort(self, ctx_matrix, available_strategies, cohort_state):
+        """
+        One decision per cohort member: row i of `ctx_matrix` is scored with member i's state.
+        Returns: (strategy row per member, np.ndarray of their final scores)
+        """
+        start = time.perf_counter()
+        matrix = self.compile(available_strategies)
+        final_scores = np.zeros((len(ctx_matrix), len(matrix)))
+        unique = unique_rows(ctx_matrix) if len(ctx_matrix) else None
+        for expert in self.experts:
+            weight = self.expert_weights.get(expert.name, 1.0)
+            if self.decision_cache_size and getattr(expert, "deterministic", False) and len(ctx_matrix):
+                final_scores += self._deterministic_batch(expert, ctx_matrix, matrix, unique) * weight
+            else:
+                final_scores += expert.predict_cohort(ctx_matrix, matrix, cohort_state[expert.name]) * weight
+
+        best = np.argmax(final_scores, axis=1)
+        self.metrics.observe("cohort_decision_seconds", time.perf_counter() - start)
+        self.metrics.inc("decisions_total", len(best))
+        return best, final_scores[np.arange(len(best)), best]
+
+    def log_cohort_outcomes(self, cohort_state, strategy_ids, successes):
+        """Feedback for `select_cohort`: member i tried strategy row `strategy_ids[i]`."""
+        successes = np.asarray(successes, dtype=bool)
+        for expert in self.experts:
+            expert.update_cohort(cohort_state[expert.name], strategy_ids, successes)
+        self.metrics.inc("outcomes_total", int(successes.sum()), result="completed")
+        self.metrics.inc("outcomes_total", int((~successes).sum()), result="failed")
+
+    def log_outcome(self, strategy_name, success, user_id=None):
         """
         Feedback loop. Tell the experts what happened so they can learn.
+        With a `user_id` (and a state store), only that user's state is updated.
         """
-        print(f"\n[Feedback] User {'completed' if success else 'failed'} {strategy_name}")
+        start = time.perf_counter()
+        if self.verbose:
+            print(f"\n[Feedback] User {'completed' if success else 'failed'} {strategy_name}")
         for expert in self.experts:
             if hasattr(expert, "update_streak"):
-                expert.update_streak(strategy_name, success)
+                expert.update_streak(strategy_name, success, user_id)
             if hasattr(expert, "update_outcome"):
-                expert.update_outcome(strategy_name, success)
+                expert.update_outcome(strategy_name, success, user_id)
+        if self.event_log is not None:
+            # Outcomes without a remembered decision are still logged, with unknown context/scores
+            ctx_vec, strategy_id, scores = self._pending_decisions.pop((user_id, strategy_name), (None, -1, None))
+            self.event_log.append(user_id, ctx_vec, strategy_id, scores, success)
+        self.metrics.observe("outcome_seconds", time.perf_counter() - start)
+        self.metrics.inc("outcomes_total", result="completed" if success else "failed")
+
+    def flush(self):
+        """Write buffered expert updates through to disk (also runs automatically at exit)."""
+        for expert in self.experts:
+            expert.flush()
+        if self.state_store is not None:
+            self.state_store.flush()
+        if self.event_log is not None:
+            self.event_log.flush()
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores, best first, via partial selection: O(S) to find
+    the winners plus O(k log k) to order them (by score, then index).
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+def unique_rows(rows: np.ndarray):
+    """
+    np.unique(rows, axis=0, return_inverse=True) for low-cardinality columns: each column
+    is coded separately and the codes are combined into one integer key per row, which
+    avoids sorting the rows as byte strings.
+    """
+    if rows.ndim != 2 or not rows.shape[1]:
+        unique, inverse = np.unique(rows, axis=0, return_inverse=True)
+        return unique, inverse.reshape(-1)
+    key = np.zeros(len(rows), dtype=np.int64)
+    radix = 1
+    for column in rows.T:
+        levels, codes = np.unique(column, return_inverse=True)
+        if radix * len(levels) >= 2 ** 62:
+            unique, inverse = np.unique(rows, axis=0, return_inverse=True)
+            return unique, inverse.reshape(-1)
+        key += codes.reshape(-1) * radix
+        radix *= len(levels)
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    return rows[first], inverse.reshape(-1)
 
 if __name__ == "__main__":
     # Integration Test
-    coordinator = OnlineCoordinator()
+    coordinator = OnlineCoordinator(verbose=True)
     
     # Mock Data
     mock_context = {"energy": "low", "stress": "high"} # Should trigger StressPredictor
@@ -104,3 +567,4 @@ if __name__ == "__main__":
     
     # Simulate feedback
     coordinator.log_outcome(chosen["name"], True)
+    coordinator.flush()
@@ -0,0 +1,303 @@
+"""
+Binary snapshot of all expert state, for fast coordinator startup.
+
+Layout of a snapshot directory:
+    manifest.json                        format version, content digest, per-expert schema and files
+    <expert>.<generation>.names.npy      sorted strategy names (fixed-width unicode)
+    <expert>.<generation>.<column>.npy   one float64 array per value column
+
+Every export writes a new generation of arrays and then swaps the manifest in with an
+atomic rename, so files a reader has mapped are never rewritten: open readers keep
+their generation, new readers see a complete new one. Generations older than the
+previous one are unlinked (which leaves existing mappings valid).
+
+Scalar weights (e.g. habit streaks) have a single "value" column; dict weights
+(e.g. Beta params) get one column per key. All arrays are opened with
+np.load(mmap_mode="r"), so nothing is parsed and pages are only read when touched.
+"""
+import sys
+import os
+import json
+import argparse
+import uuid
+import hashlib
+import numpy as np
+from collections.abc import MutableMapping
+from typing import Dict, Any
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.models.weight_store import JournaledWeightStore
+
+SNAPSHOT_FORMAT = 2
+# Format 1 wrote fixed file names (<expert>.<column>.npy), overwritten on every export
+READABLE_FORMATS = (1, 2)
+MANIFEST_NAME = "manifest.json"
+EXPERT_NAMES = ["habit_optimizer", "stress_predictor", "curiosity_tuner", "flow_manager"]
+DEFAULT_WEIGHTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+class SnapshotWeights(MutableMapping):
+    """
+    Lazy {strategy: value} mapping over one expert's memory-mapped snapshot arrays.
+    Lookups binary-search the sorted names array; `lookup` resolves a whole list of names
+    at once. Writes go to an in-memory overlay, so the snapshot files themselves are
+    never modified.
+    """
+
+    def __init__(self, snapshot_dir: str, expert: str, schema: Dict[str, Any]):
+        self.snapshot_dir = snapshot_dir
+        self.expert = expert
+        self.kind = schema["kind"]
+        self.files = schema.get("files", {})
+        self.int_columns = set(schema.get("int_columns", []))
+        self.names = np.load(self._path("names"), mmap_mode="r")
+        self.columns = {c: np.load(self._path(c), mmap_mode="r") for c in schema["columns"]}
+        self.overlay: Dict[str, Any] = {}
+        self.deleted = set()
+        # (names list, snapshot row per name, found mask, {name: position}) of the last `lookup`
+        self._aligned = None
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.snapshot_dir, self.files.get(column, f"{self.expert}.{column}.npy"))
+
+    def _index(self, key):
+        if not len(self.names):
+            return None
+        i = int(np.searchsorted(self.names, key))
+        if i < len(self.names) and self.names[i] == key:
+            return i
+        return None
+
+    def _value(self, i: int):
+        if self.kind == "scalar":
+            return self._cell("value", i)
+        return {c: self._cell(c, i) for c in self.columns}
+
+    def _cell(self, column: str, i: int):
+        value = float(self.columns[column][i])
+        return int(value) if column in self.int_columns else value
+
+    def column(self, column: str) -> np.ndarray:
+        """The raw (read-only) column array, aligned with `self.names`. Ignores the overlay."""
+        return self.columns[column]
+
+    def _align(self, names):
+        """Snapshot rows for a list of names: one vectorized search per list (cached by identity)."""
+        if self._aligned is None or self._aligned[0] is not names:
+            keys = np.asarray(names, dtype=str)
+            if len(self.names) and len(keys):
+                rows = np.minimum(np.searchsorted(self.names, keys), len(self.names) - 1)
+                found = self.names[rows] == keys
+            else:
+                rows, found = np.zeros(len(keys), dtype=np.intp), np.zeros(len(keys), dtype=bool)
+            self._aligned = (names, rows, found, None)
+        return self._aligned
+
+    def lookup(self, names, column: str = "value", default: float = 0.0) -> np.ndarray:
+        """
+        Values of `column` for every name in `names` (e.g. `StrategyMatrix.names`) as a float
+        array aligned with it, `default` where a name has no entry. The search is cached for
+        the same list object, so repeated calls for one matrix only gather the column.
+        """
+        names_, rows, found, positions = self._align(names)
+        values = np.where(found, self.columns[column][rows], default)
+        if self.overlay or self.deleted:
+            if positions is None:
+                positions = {name: i for i, name in enumerate(names)}
+                self._aligned = (names_, rows, found, positions)
+            for key in self.deleted:
+                if key in positions:
+                    values[positions[key]] = default
+            for key, value in self.overlay.items():
+                if key in positions:
+                    values[positions[key]] = value if self.kind == "scalar" else value.get(column, default)
+        return values
+
+    def __getitem__(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        i = None if key in self.deleted else self._index(key)
+        if i is None:
+            raise KeyError(key)
+        return self._value(i)
+
+    def __setitem__(self, key, value):
+        self.overlay[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.overlay.pop(key, None)
+        self.deleted.add(key)
+
+    def __contains__(self, key):
+        return key in self.overlay or (key not in self.deleted and self._index(key) is not None)
+
+    def __iter__(self):
+        for name in self.names:
+            name = str(name)
+            if name not in self.overlay and name not in self.deleted:
+                yield name
+        yield from self.overlay
+
+    def __len__(self):
+        base = sum(1 for k in self.deleted if self._index(k) is not None)
+        fresh = sum(1 for k in self.overlay if self._index(k) is None)
+        return len(self.names) - base + fresh
+
+
+class SnapshotWeightStore:
+    """
+    Read-only BaseModel store backed by a binary snapshot. Updates stay in the
+    in-memory overlay of SnapshotWeights; nothing is written back to disk.
+    """
+
+    def __init__(self, snapshot_dir: str, expert: str):
+        self.snapshot_dir = snapshot_dir
+        self.expert = expert
+        self.manifest = read_manifest(snapshot_dir)
+
+    def exists(self) -> bool:
+        return self.expert in self.manifest["experts"]
+
+    def load(self):
+        return SnapshotWeights(self.snapshot_dir, self.expert, self.manifest["experts"][self.expert])
+
+    def record(self, key, value, weights) -> bool:
+        return False
+
+    def flush(self, weights) -> bool:
+        return False
+
+    def compact(self, weights):
+        raise IOError(f"Snapshot at {self.snapshot_dir} is read-only; use export_snapshot to write a new one")
+
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(snapshot_dir, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get("format") not in READABLE_FORMATS:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+    return manifest
+
+
+def _manifest_files(manifest: Dict[str, Any]):
+    """Every array file a manifest refers to."""
+    files = set()
+    for expert, schema in manifest["experts"].items():
+        default = {c: f"{expert}.{c}.npy" for c in ["names"] + schema["columns"]}
+        files.update(dict(default, **schema.get("files", {})).values())
+    return files
+
+
+def _content_digest(snapshot_dir: str, manifest: Dict[str, Any]) -> str:
+    """SHA-256 over every expert's schema and array bytes: equal weights give equal digests."""
+    digest = hashlib.sha256()
+    for expert in sorted(manifest["experts"]):
+        schema = manifest["experts"][expert]
+        digest.update(json.dumps([expert, schema["kind"], schema["columns"]]).encode("utf-8"))
+        files = schema.get("files", {})
+        for column in ["names"] + schema["columns"]:
+            with open(os.path.join(snapshot_dir, files.get(column, f"{expert}.{column}.npy")), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def snapshot_digest(snapshot_dir: str) -> str:
+    """Content digest of a snapshot (see `_content_digest`), recorded in the manifest at export."""
+    manifest = read_manifest(snapshot_dir)
+    return manifest.get("digest") or _content_digest(snapshot_dir, manifest)
+
+
+def _write_expert(snapshot_dir: str, expert: str, weights: Dict[str, Any], generation: str) -> Dict[str, Any]:
+    names = sorted(weights)
+    values = [weights[n] for n in names]
+    if values and isinstance(values[0], dict):
+        kind = "record"
+        columns = sorted({k for v in values for k in v})
+        data = {c: [v.get(c, 0) for v in values] for c in columns}
+    else:
+        kind = "scalar"
+        columns = ["value"]
+        data = {"value": values}
+
+    files = {c: f"{expert}.{generation}.{c}.npy" for c in ["names"] + columns}
+    np.save(os.path.join(snapshot_dir, files["names"]), np.array(names, dtype=str))
+    int_columns = []
+    for column, column_values in data.items():
+        np.save(os.path.join(snapshot_dir, files[column]), np.array(column_values, dtype=np.float64))
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in column_values):
+            int_columns.append(column)
+    return {"kind": kind, "columns": columns, "int_columns": int_columns, "count": len(names), "files": files}
+
+
+def export_snapshot(snapshot_dir: str, coordinator=None, weights_dir: str = DEFAULT_WEIGHTS_DIR) -> Dict[str, Any]:
+    """
+    Writes a binary snapshot of all expert state. Reads from a live coordinator's
+    experts when given, otherwise from the JSON weights (+ journals) in `weights_dir`.
+    Returns the manifest.
+    """
+    if coordinator is not None:
+        state = {e.name: dict(e.weights) for e in coordinator.experts}
+    else:
+        state = {}
+        for name in EXPERT_NAMES:
+            store = JournaledWeightStore(os.path.join(weights_dir, f"{name}_weights.json"))
+            state[name] = store.load() if store.exists() else {}
+
+    if not os.path.exists(snapshot_dir):
+        os.makedirs(snapshot_dir)
+    try:
+        previous = read_manifest(snapshot_dir)
+    except (OSError, ValueError):
+        previous = None
+    generation = uuid.uuid4().hex[:12]
+    manifest = {"format": SNAPSHOT_FORMAT, "generation": generation, "experts": {}}
+    for name, weights in state.items():
+        manifest["experts"][name] = _write_expert(snapshot_dir, name, weights, generation)
+    manifest["digest"] = _content_digest(snapshot_dir, manifest)
+
+    # Manifest last: a snapshot without one is incomplete and will not be opened
+    tmp_path = os.path.join(snapshot_dir, f"{MANIFEST_NAME}.{generation}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, MANIFEST_NAME))
+
+    # Keep the previous generation for readers that read its manifest just before the swap
+    keep = _manifest_files(manifest) | (_manifest_files(previous) if previous else set())
+    prefixes = tuple(f"{name}." for name in set(manifest["experts"]) | set(previous["experts"] if previous else ()))
+    for file_name in os.listdir(snapshot_dir):
+        if file_name.endswith(".npy") and file_name.startswith(prefixes) and file_name not in keep:
+            os.remove(os.path.join(snapshot_dir, file_name))
+    return manifest
+
+
+def import_snapshot(snapshot_dir: str, weights_dir: str = DEFAULT_WEIGHTS_DIR):
+    """Converts a binary snapshot back into the JSON weights files used by BaseModel."""
+    manifest = read_manifest(snapshot_dir)
+    for name, schema in manifest["experts"].items():
+        weights = dict(SnapshotWeights(snapshot_dir, name, schema))
+        JournaledWeightStore(os.path.join(weights_dir, f"{name}_weights.json")).compact(weights)
+        print(f"[{name}] Imported {len(weights)} entries.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert expert weights between JSON and binary snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="JSON weights -> binary snapshot")
+    export_cmd.add_argument("snapshot_dir")
+    export_cmd.add_argument("--weights-dir", default=DEFAULT_WEIGHTS_DIR)
+    import_cmd = sub.add_parser("import", help="binary snapshot -> JSON weights")
+    import_cmd.add_argument("snapshot_dir")
+    import_cmd.add_argument("--weights-dir", default=DEFAULT_WEIGHTS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_snapshot(args.snapshot_dir, weights_dir=args.weights_dir)
+        for name, schema in manifest["experts"].items():
+            print(f"[{name}] Exported {schema['count']} entries.")
+    else:
+        import_snapshot(args.snapshot_dir, weights_dir=args.weights_dir)
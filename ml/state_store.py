@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Set, Tuple
+
+
+class ShardedStateStore:
+    """
+    Per-user expert state keyed by (user_id, expert, strategy).
+
+    Users are spread over `num_shards` SQLite files by a stable hash of their id, so
+    loading a user touches exactly one shard. An LRU cache keeps the state of the most
+    recently active users in memory; updates are marked dirty and written back to the
+    shard when the user is evicted or on `flush()`. Memory is therefore bounded by
+    `cache_size` active users rather than by the total user count.
+
+    Thread-safe: the cache, the dirty set and the shard connections are guarded by one
+    lock, and connections may be used from any thread (e.g. experts running in
+    `asyncio.to_thread` workers of the async council).
+    """
+
+    def __init__(self, root_dir: str = None, num_shards: int = 16, cache_size: int = 1024):
+        if root_dir is None:
+            root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "user_state")
+        self.root_dir = root_dir
+        self.num_shards = num_shards
+        self.cache_size = cache_size
+
+        # user_id -> {expert: {strategy: value}}
+        self._cache: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        # user_id -> {(expert, strategy)} awaiting write-back
+        self._dirty: Dict[str, Set[Tuple[str, str]]] = {}
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.RLock()
+
+    def shard_for(self, user_id) -> int:
+        """Stable shard index for a user (independent of Python's hash seed)."""
+        return zlib.crc32(str(user_id).encode("utf-8")) % self.num_shards
+
+    def user_state(self, user_id, expert: str) -> Dict[str, Any]:
+        """
+        Returns the mutable {strategy: value} dict of one expert for one user,
+        loading the user's shard rows on a cache miss.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            state = self._cache.get(user_id)
+            if state is None:
+                state = self._load_user(user_id)
+                self._cache[user_id] = state
+                while len(self._cache) > self.cache_size:
+                    self._evict()
+            else:
+                self._cache.move_to_end(user_id)
+            return state.setdefault(expert, {})
+
+    def mark_dirty(self, user_id, expert: str, strategy: str):
+        """Flag an entry changed through `user_state` for write-back."""
+        with self._lock:
+            self._dirty.setdefault(str(user_id), set()).add((expert, strategy))
+
+    def flush(self):
+        """Write every dirty entry back to its shard."""
+        with self._lock:
+            for user_id in list(self._dirty):
+                self._write_back(user_id)
+            for conn in self._connections.values():
+                conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+
+    def cached_users(self):
+        with self._lock:
+            return list(self._cache)
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.root_dir, f"shard_{shard:03d}.sqlite")
+
+    def _connection(self, shard: int) -> sqlite3.Connection:
+        conn = self._connections.get(shard)
+        if conn is None:
+            if not os.path.exists(self.root_dir):
+                os.makedirs(self.root_dir)
+            conn = sqlite3.connect(self._shard_path(shard), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "user_id TEXT NOT NULL, expert TEXT NOT NULL, strategy TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, expert, strategy)) WITHOUT ROWID"
+            )
+            self._connections[shard] = conn
+        return conn
+
+    def _load_user(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        state: Dict[str, Dict[str, Any]] = {}
+        shard = self.shard_for(user_id)
+        if shard not in self._connections and not os.path.exists(self._shard_path(shard)):
+            return state  # Never written: don't create an empty shard just to read it
+        rows = self._connection(shard).execute(
+            "SELECT expert, strategy, value FROM state WHERE user_id = ?", (user_id,)
+        )
+        for expert, strategy, value in rows:
+            state.setdefault(expert, {})[strategy] = json.loads(value)
+        return state
+
+    def _write_back(self, user_id: str):
+        keys = self._dirty.pop(user_id, None)
+        state = self._cache.get(user_id)
+        if not keys or state is None:
+            return
+        rows = [(user_id, expert, strategy, json.dumps(state[expert][strategy]))
+                for expert, strategy in keys if strategy in state.get(expert, {})]
+        self._connection(self.shard_for(user_id)).executemany(
+            "INSERT OR REPLACE INTO state (user_id, expert, strategy, value) VALUES (?, ?, ?, ?)", rows
+        )
+
+    def _evict(self):
+        user_id, _ = next(iter(self._cache.items()))
+        if user_id in self._dirty:
+            self._write_back(user_id)
+            self._connection(self.shard_for(user_id)).commit()
+        del self._cache[user_id]
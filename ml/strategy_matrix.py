@@ -0,0 +1,73 @@
+import json
+import hashlib
+import numpy as np
+from typing import Dict, List, Any
+
+
+class StrategyMatrix:
+    """
+    A compiled, array-backed view of a strategy list.
+    Strategies are encoded once (via DataPreprocessor.encode_strategy) so the experts
+    can score the whole catalog with array operations instead of looping over dicts
+    on every decision.
+
+    When built from a StrategyCatalog (see processor/research_engine.py), rows follow
+    the catalog's rows, `ids` holds its stable strategy IDs (otherwise the row numbers),
+    tag masks come from its inverted tag index, and
+    `version` carries the catalog version for cache invalidation (otherwise it is a
+    hash of the strategy list).
+    """
+
+    def __init__(self, strategies: List[Dict[str, Any]], preprocessor, catalog=None):
+        self.catalog = catalog
+        self.strategies = list(strategies)
+        # Content version (the catalog's own when available), used as a cache key
+        self.version = getattr(catalog, "version", None) or hashlib.sha1(
+            json.dumps(self.strategies, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        self.names = [s["name"] for s in self.strategies]
+        self.ids = np.asarray(catalog.ids, dtype=np.int64) if catalog is not None else np.arange(len(self.strategies))
+
+        # Feature matrix: [tag multi-hot..., difficulty] (see DataPreprocessor.encode_strategy)
+        self.features = preprocessor.encode_strategies(self.strategies)
+        self.difficulty = self.features[:, -1]
+
+        # Exact (lowercased) tag sets, used to build boolean masks when there is no catalog index
+        self._tag_sets = [] if catalog is not None else [
+            frozenset(t.lower() for t in s.get("tags", [])) for s in self.strategies
+        ]
+        self._masks: Dict[frozenset, np.ndarray] = {}
+
+    @classmethod
+    def from_catalog(cls, catalog, preprocessor):
+        return cls(catalog.strategies, preprocessor, catalog)
+
+    def rows_of(self, strategy_ids) -> np.ndarray:
+        """Matrix row of each strategy ID (-1 for IDs not in this matrix)."""
+        strategy_ids = np.asarray(strategy_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(strategy_ids.shape, -1)
+        order = np.argsort(self.ids)
+        sorted_ids = self.ids[order]
+        position = np.minimum(np.searchsorted(sorted_ids, strategy_ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[position] == strategy_ids, order[position], -1)
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def tag_mask(self, *tags: str) -> np.ndarray:
+        """
+        Returns a boolean vector marking strategies that carry any of the given tags.
+        Masks are computed once per tag combination and cached.
+        """
+        key = frozenset(t.lower() for t in tags)
+        mask = self._masks.get(key)
+        if mask is None:
+            if self.catalog is not None:
+                mask = np.zeros(len(self.strategies), dtype=bool)
+                for tag in key:
+                    mask[list(self.catalog.rows_with_tag(tag))] = True
+            else:
+                mask = np.fromiter((not key.isdisjoint(s) for s in self._tag_sets), dtype=bool, count=len(self._tag_sets))
+            self._masks[key] = mask
+        return mask
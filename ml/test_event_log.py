@@ -0,0 +1,97 @@
+import sys
+import os
+import tempfile
+import subprocess
+import numpy as np
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.event_log import EventLog, user_key, OUTCOME_COMPLETED, OUTCOME_FAILED
+from ml.online_coordinator import OnlineCoordinator
+from ml.models.weight_store import JournaledWeightStore
+
+STRATEGIES = [
+    {"name": "Visual Timer", "tags": ["scaffolding"], "difficulty": "Low"},
+    {"name": "Neutral Reflection", "tags": ["retention", "emotion"], "difficulty": "Low"}
+]
+
+def test_event_log_segments_and_coordinator_join():
+    print("--- Testing Columnar Event Log ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog(os.path.join(tmp, "events"), buffer_size=4, segment_records=5)
+        for i in range(12):
+            log.append(f"user{i % 3}", np.full(6, i, dtype=np.float32), i, [0.1, 0.2, 0.3, 0.4], i % 2 == 0, timestamp=float(i))
+        log.flush()
+
+        segments = list(log.segments())
+        assert [len(s) for s in segments] == [5, 5, 2]
+        events = log.read_all()
+        assert events["strategy_id"].tolist() == list(range(12))
+        assert events["context"][7].tolist() == [7.0] * 6
+        assert events["user"][4] == user_key("user1")
+        assert (events["outcome"][::2] == OUTCOME_COMPLETED).all() and (events["outcome"][1::2] == OUTCOME_FAILED).all()
+        log.close()
+
+        # Coordinator joins each outcome with the decision that produced it
+        log = EventLog(os.path.join(tmp, "coordinator_events"))
+        coordinator = OnlineCoordinator(
+            store_factory=lambda name: JournaledWeightStore(os.path.join(tmp, f"{name}_weights.json")),
+            event_log=log, seed=0
+        )
+        chosen = coordinator.select_strategy({"energy": "low", "stress": "high"}, STRATEGIES, user_id="alice")
+        coordinator.log_outcome(chosen["name"], True, user_id="alice")
+        coordinator.log_outcome("Visual Timer", False)  # No matching decision
+        coordinator.flush()
+
+        events = log.read_all()
+        assert len(events) == 2
+        assert events["strategy_id"][0] == 1 and events["user"][0] == user_key("alice")
+        assert np.allclose(events["context"][0], coordinator.preprocessor.normalize_context({"energy": "low", "stress": "high"}))
+        assert not np.isnan(events["scores"][0]).any()
+        assert events["strategy_id"][1] == -1 and np.isnan(events["scores"][1]).all()
+
+        # The manifest maps the logged IDs to names and records the catalog version
+        assert log.strategy_names == {0: "Visual Timer", 1: "Neutral Reflection"}
+        assert log.manifest["catalog_versions"] == [coordinator.compile(STRATEGIES).version]
+        # A strategy list that reuses the logged IDs for other strategies is rejected
+        try:
+            coordinator.select_strategy({"energy": "low", "stress": "high"}, STRATEGIES[::-1], user_id="alice")
+            assert False, "clashing strategy IDs accepted"
+        except ValueError:
+            pass
+        log.close()
+        reopened = EventLog(os.path.join(tmp, "coordinator_events"))
+        assert reopened.strategy_names == {0: "Visual Timer", 1: "Neutral Reflection"}
+        reopened.close()
+    print("[PASS] Events are buffered, segmented and readable through memmaps.")
+
+def test_event_log_survives_exit_and_torn_records():
+    print("--- Testing Event Log Durability ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = os.path.join(tmp, "events")
+        # Buffered events of a log that is never closed are written at interpreter exit
+        script = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})\n"
+                  "from ml.event_log import EventLog\n"
+                  f"log = EventLog({log_dir!r})\n"
+                  "for i in range(3): log.append('u', None, i, None, True)\n")
+        subprocess.run([sys.executable, "-c", script], check=True)
+        log = EventLog(log_dir)
+        assert log.read_all()["strategy_id"].tolist() == [0, 1, 2]
+        log.close()
+
+        # A torn trailing record (crash mid-write) is cut off, and later appends stay aligned
+        with open(os.path.join(log_dir, "events_000000.bin"), 'ab') as f:
+            f.write(b"\x01" * 5)
+        log = EventLog(log_dir)
+        log.append("u", None, 3, None, False)
+        log.close()
+        log = EventLog(log_dir)
+        events = log.read_all()
+        assert events["strategy_id"].tolist() == [0, 1, 2, 3] and events["outcome"][3] == OUTCOME_FAILED
+        log.close()
+    print("[PASS] Events are flushed at exit and torn records are dropped on open.")
+
+if __name__ == "__main__":
+    test_event_log_segments_and_coordinator_join()
+    test_event_log_survives_exit_and_torn_records()
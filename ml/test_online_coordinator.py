@@ -0,0 +1,271 @@
+import sys
+import os
+import asyncio
+import tempfile
+import numpy as np
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.online_coordinator import OnlineCoordinator, SyncExpertAdapter, top_k
+from ml.state_store import ShardedStateStore
+from ml.strategy_matrix import StrategyMatrix
+from ml.models.curiosity_tuner import CuriosityTuner
+from ml.models.weight_store import JournaledWeightStore
+from data_pipeline.preprocessor import DataPreprocessor
+
+MOCK_STRATEGIES = [
+    {"name": "Visual Timer", "tags": ["scaffolding"], "difficulty": "Low"},
+    {"name": "Deep Work Session", "tags": ["productivity"], "difficulty": "High"},
+    {"name": "Neutral Reflection", "tags": ["retention", "emotion"], "difficulty": "Low"},
+    {"name": "Curiosity Quiz", "tags": ["Curiosity"], "difficulty": "Medium"},
+    {"name": "Untagged"}
+]
+
+def test_vectorized_experts_match_dict_predict():
+    print("--- Testing Vectorized Expert Scoring ---")
+    coordinator = OnlineCoordinator()
+    matrix = coordinator.compile(MOCK_STRATEGIES)
+    assert isinstance(matrix, StrategyMatrix)
+    assert coordinator.compile(MOCK_STRATEGIES) is matrix  # Cached by list identity
+
+    for ctx in [{"energy": "low", "stress": "high"}, {"energy": "high", "stress": "low"}]:
+        ctx_vec = coordinator.preprocessor.normalize_context(ctx)
+        for expert in coordinator.experts:
+            if expert.name == "curiosity_tuner":
+                continue  # Stochastic
+            votes = expert.predict(ctx_vec, MOCK_STRATEGIES)
+            expected = np.array([votes[name] for name in matrix.names])
+            assert np.allclose(expert.predict_vector(ctx_vec, matrix), expected), expert.name
+
+    assert matrix.tag_mask("curiosity", "novelty").tolist() == [False, False, False, True, False]
+    print("[PASS] Vectorized scores match the dict-based experts.")
+
+def test_select_strategy_prefers_regulation_under_stress():
+    print("--- Testing Strategy Selection ---")
+    coordinator = OnlineCoordinator()
+    chosen = coordinator.select_strategy({"energy": "low", "stress": "high"}, MOCK_STRATEGIES)
+    assert chosen["name"] == "Neutral Reflection"
+    print("[PASS] High stress context selects the regulation strategy.")
+
+def test_select_strategies_batch():
+    print("--- Testing Batch Selection ---")
+    coordinator = OnlineCoordinator()
+    contexts = [{"energy": "low", "stress": "high"}, {"energy": "high", "stress": "low"}] * 3
+    chosen, scores = coordinator.select_strategies(contexts, MOCK_STRATEGIES)
+    assert len(chosen) == len(contexts) and scores.shape == (len(contexts),)
+    assert chosen[0]["name"] == "Neutral Reflection"
+
+    # A pre-normalized context matrix is accepted as-is
+    ctx_matrix = coordinator.preprocessor.normalize_contexts(contexts)
+    matrix = coordinator.compile(MOCK_STRATEGIES)
+    for expert in coordinator.experts:
+        assert expert.predict_batch(ctx_matrix, matrix).shape == (len(contexts), len(MOCK_STRATEGIES))
+    chosen, _ = coordinator.select_strategies(ctx_matrix, matrix)
+    assert chosen[2]["name"] == "Neutral Reflection"
+    print("[PASS] Batch selection returns one strategy and score per context.")
+
+def test_metrics_and_traces():
+    print("--- Testing Metrics and Traces ---")
+    coordinator = OnlineCoordinator()
+    coordinator.select_strategy({"energy": "low"}, MOCK_STRATEGIES)
+    assert coordinator.traces is None  # Tracing is off by default
+
+    assert coordinator.metrics.histogram("decision_seconds").count == 1
+    assert coordinator.metrics.histogram("expert_predict_seconds", expert="flow_manager").count == 1
+    assert 'decisions_total 1' in coordinator.metrics.to_prometheus()
+    assert "decision_seconds" in coordinator.metrics.snapshot()["histograms"]
+
+    traced = OnlineCoordinator(trace_size=2)
+    for _ in range(3):
+        traced.select_strategy({"energy": "low", "stress": "high"}, MOCK_STRATEGIES)
+    assert len(traced.traces) == 2
+    assert traced.traces.recent(1)[0]["decision"] == "Neutral Reflection"
+    print("[PASS] Metrics are recorded and traces are kept in a bounded ring buffer.")
+
+def test_curiosity_tuner_arrays():
+    print("--- Testing Array-Backed Thompson Sampling ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JournaledWeightStore(os.path.join(tmp, "curiosity_tuner_weights.json"))
+        tuner = CuriosityTuner(store, seed=7)
+        matrix = StrategyMatrix(MOCK_STRATEGIES, DataPreprocessor())
+        ctx = np.zeros((4, 6))
+
+        # Same seed -> same draws
+        twin = CuriosityTuner(JournaledWeightStore(os.path.join(tmp, "other_weights.json")), seed=7)
+        assert np.allclose(tuner.predict_batch(ctx, matrix), twin.predict_batch(ctx, matrix))
+
+        for _ in range(40):
+            tuner.update_outcome("Visual Timer", True)
+        tuner.update_outcome("Deep Work Session", False)
+        assert tuner.weights["Visual Timer"] == {"alpha": 41, "beta": 1}
+        assert tuner.weights["Deep Work Session"] == {"alpha": 1, "beta": 2}
+
+        # Successful arm dominates; the curiosity tag gets its boost
+        scores = tuner.predict_batch(np.zeros((500, 6)), matrix)
+        assert scores[:, 0].mean() > 0.9 and scores[:, 1].mean() < 0.5
+        assert scores[:, 3].min() >= 0.2
+
+        # JSON persistence round-trips into the arrays
+        tuner.save()
+        reloaded = CuriosityTuner(JournaledWeightStore(store.model_path))
+        assert reloaded.weights == tuner.weights
+        assert reloaded.alpha[reloaded.arm_index["Visual Timer"]] == 41
+    print("[PASS] Thompson arms are array-backed, seedable and JSON compatible.")
+
+def test_recommend_top_k():
+    print("--- Testing Top-k Recommendations ---")
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.1])
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0, 4]
+    assert top_k(scores, 0).tolist() == []
+
+    coordinator = OnlineCoordinator(seed=1)
+    ranked = coordinator.recommend({"energy": "low", "stress": "high"}, MOCK_STRATEGIES, k=3)
+    assert len(ranked) == 3
+    assert ranked[0]["strategy"]["name"] == "Neutral Reflection"
+    assert ranked[0]["score"] >= ranked[1]["score"] >= ranked[2]["score"]
+    breakdown = ranked[0]["breakdown"]
+    assert set(breakdown) == {e.name for e in coordinator.experts}
+    weighted = sum(coordinator.expert_weights[name] * vote for name, vote in breakdown.items())
+    assert abs(weighted - ranked[0]["score"]) < 1e-9
+    print("[PASS] recommend() returns a ranked shortlist with per-expert breakdowns.")
+
+class SlowExpert:
+    """A native async expert that always misses the deadline."""
+    name = "slow_expert"
+
+    async def predict_async(self, context_vector, strategy_matrix, user_id=None):
+        await asyncio.sleep(1.0)
+        return np.ones(len(strategy_matrix))
+
+def test_select_strategy_async_deadline():
+    print("--- Testing Async Council Under a Deadline ---")
+    coordinator = OnlineCoordinator(seed=3)
+    result = asyncio.run(coordinator.select_strategy_async({"energy": "low", "stress": "high"}, MOCK_STRATEGIES, deadline=1.0))
+    assert result["strategy"]["name"] == "Neutral Reflection"
+    assert result["dropped"] == [] and len(result["contributors"]) == 4
+
+    coordinator.experts.append(SlowExpert())
+    coordinator.expert_weights["slow_expert"] = 10.0
+    result = asyncio.run(coordinator.select_strategy_async(
+        {"energy": "low", "stress": "high"}, MOCK_STRATEGIES, deadline=1.0, expert_budgets={"slow_expert": 0.01}
+    ))
+    assert result["dropped"] == ["slow_expert"]
+    assert "slow_expert" not in result["contributors"]
+    assert result["strategy"]["name"] == "Neutral Reflection"
+    assert coordinator.metrics.counters[("expert_timeouts_total", (("expert", "slow_expert"),))] == 1
+    print("[PASS] Late experts are dropped and the remaining votes renormalized.")
+
+class FailingExpert:
+    """A native async expert that always raises."""
+    name = "failing_expert"
+
+    async def predict_async(self, context_vector, strategy_matrix, user_id=None):
+        raise RuntimeError("model file missing")
+
+def test_select_strategy_async_with_user_state():
+    print("--- Testing Async Council With Per-User State ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "user_state")
+        coordinator = OnlineCoordinator.in_memory(state_store=ShardedStateStore(root, num_shards=4), seed=3)
+        coordinator.log_outcome("Neutral Reflection", True, user_id="alice")
+        coordinator.state_store.close()
+
+        # Fresh store: alice's state is not cached, so it has to be read from her shard
+        coordinator = OnlineCoordinator.in_memory(state_store=ShardedStateStore(root, num_shards=4), seed=3)
+        result = asyncio.run(coordinator.select_strategy_async(
+            {"energy": "low", "stress": "high"}, MOCK_STRATEGIES, deadline=5.0, user_id="alice"))
+        assert result["errors"] == {} and result["dropped"] == [] and len(result["contributors"]) == 4
+        habit = next(e for e in coordinator.experts if e.name == "habit_optimizer")
+        assert habit.state("alice") == {"Neutral Reflection": 1}
+
+        # Worker threads may also load users directly
+        votes = asyncio.run(SyncExpertAdapter(habit).predict_async(
+            coordinator.preprocessor.normalize_context({"energy": "low"}), coordinator.compile(MOCK_STRATEGIES), "bob"))
+        assert len(votes) == len(MOCK_STRATEGIES)
+
+        # Failures are reported as errors, not as timeouts
+        coordinator.experts.append(FailingExpert())
+        result = asyncio.run(coordinator.select_strategy_async(
+            {"energy": "low", "stress": "high"}, MOCK_STRATEGIES, deadline=5.0, user_id="alice"))
+        assert result["dropped"] == [] and "RuntimeError" in result["errors"]["failing_expert"]
+        assert coordinator.metrics.counters[("expert_errors_total", (("expert", "failing_expert"),))] == 1
+        assert ("expert_timeouts_total", (("expert", "failing_expert"),)) not in coordinator.metrics.counters
+        coordinator.state_store.close()
+    print("[PASS] Personalized experts keep their votes in the async council.")
+
+def test_decision_cache_for_deterministic_experts():
+    print("--- Testing Decision Cache ---")
+    coordinator = OnlineCoordinator(seed=5)
+    calls = {}
+    for expert in coordinator.experts:
+        original = expert.predict_vector
+        def counted(*args, _name=expert.name, _original=original):
+            calls[_name] = calls.get(_name, 0) + 1
+            return _original(*args)
+        expert.predict_vector = counted
+
+    for _ in range(5):
+        coordinator.select_strategy({"energy": "low", "stress": "high"}, MOCK_STRATEGIES)
+    assert calls["flow_manager"] == 1 and calls["stress_predictor"] == 1
+    assert calls["curiosity_tuner"] == 5 and calls["habit_optimizer"] == 5
+
+    # Batch path only scores the distinct contexts
+    contexts = [{"energy": "low", "stress": "high"}, {"energy": "high", "stress": "low"}] * 50
+    coordinator.select_strategies(contexts, MOCK_STRATEGIES)
+    assert calls["flow_manager"] == 2
+
+    # A different strategy list (new version) or an explicit invalidation misses the cache
+    coordinator.select_strategy({"energy": "low", "stress": "high"}, MOCK_STRATEGIES[:3])
+    assert calls["flow_manager"] == 3
+    coordinator.invalidate_decision_cache()
+    coordinator.select_strategy({"energy": "low", "stress": "high"}, MOCK_STRATEGIES[:3])
+    assert calls["flow_manager"] == 4
+    print("[PASS] Deterministic experts are memoized per context and catalog version.")
+
+def test_fork_is_isolated_and_in_memory():
+    print("--- Testing Coordinator Forks ---")
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    before = sorted(os.listdir(data_dir)) if os.path.exists(data_dir) else []
+    parent = OnlineCoordinator.in_memory({
+        "habit_optimizer": {"Visual Timer": 3},
+        "curiosity_tuner": {"Curiosity Quiz": {"alpha": 4, "beta": 2}}
+    }, seed=0)
+    parent.compile(MOCK_STRATEGIES)
+    habit, curiosity = parent.experts[0], parent.experts[2]
+
+    fork_a, fork_b = parent.fork(seed=7), parent.fork(seed=7)
+    for fork in (fork_a, fork_b):
+        for _ in range(20):
+            chosen = fork.select_strategy({"energy": "high", "stress": "low"}, MOCK_STRATEGIES)
+            fork.log_outcome(chosen["name"], True)
+    # Same warm state + same seed -> same run; the parent and its arrays are untouched
+    assert fork_a.experts[0].weights == fork_b.experts[0].weights
+    assert fork_a.experts[0].weights != habit.weights
+    assert habit.weights == {"Visual Timer": 3}
+    assert curiosity.weights == {"Curiosity Quiz": {"alpha": 4, "beta": 2}}
+    assert curiosity.alpha[curiosity.arm_index["Curiosity Quiz"]] == 4
+    assert fork_a.metrics is not parent.metrics and not parent.metrics.snapshot()["counters"]
+
+    # Unseeded forks get their own child streams of the parent's (no Generator.spawn needed)
+    draws = [c.rng.random() for c in (curiosity.fork(), curiosity.fork(), curiosity)]
+    assert len(set(draws)) == 3
+
+    # Nothing is written to the weights directory, even on flush
+    fork_a.flush()
+    parent.flush()
+    assert (sorted(os.listdir(data_dir)) if os.path.exists(data_dir) else []) == before
+    print("[PASS] Forks start warm, stay isolated and never touch disk.")
+
+if __name__ == "__main__":
+    test_vectorized_experts_match_dict_predict()
+    test_select_strategy_prefers_regulation_under_stress()
+    test_select_strategies_batch()
+    test_metrics_and_traces()
+    test_curiosity_tuner_arrays()
+    test_recommend_top_k()
+    test_select_strategy_async_deadline()
+    test_select_strategy_async_with_user_state()
+    test_decision_cache_for_deterministic_experts()
+    test_fork_is_isolated_and_in_memory()
@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.snapshot import export_snapshot, import_snapshot, SnapshotWeights, read_manifest
+from ml.online_coordinator import OnlineCoordinator
+
+def test_snapshot_round_trip():
+    print("--- Testing Binary Snapshots ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        weights_dir = os.path.join(tmp, "weights")
+        os.makedirs(weights_dir)
+        habit = {"Visual Timer": 3, "Deep Work Session": 0}
+        curiosity = {"Visual Timer": {"alpha": 4, "beta": 1}, "Curiosity Quiz": {"alpha": 1, "beta": 2}}
+        with open(os.path.join(weights_dir, "habit_optimizer_weights.json"), 'w') as f:
+            json.dump(habit, f)
+        with open(os.path.join(weights_dir, "curiosity_tuner_weights.json"), 'w') as f:
+            json.dump(curiosity, f)
+
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        manifest = export_snapshot(snapshot_dir, weights_dir=weights_dir)
+        assert manifest["experts"]["habit_optimizer"]["count"] == 2
+
+        # Lazy mapping reads back the exact JSON values
+        schema = read_manifest(snapshot_dir)["experts"]
+        assert dict(SnapshotWeights(snapshot_dir, "habit_optimizer", schema["habit_optimizer"])) == habit
+        assert dict(SnapshotWeights(snapshot_dir, "curiosity_tuner", schema["curiosity_tuner"])) == curiosity
+
+        # A coordinator opened from the snapshot sees the state and keeps updates in memory
+        coordinator = OnlineCoordinator.from_snapshot(snapshot_dir, seed=0)
+        habit_expert, curiosity_expert = coordinator.experts[0], coordinator.experts[2]
+        assert habit_expert.weights["Visual Timer"] == 3
+        assert curiosity_expert.alpha[curiosity_expert.arm_index["Visual Timer"]] == 4
+        coordinator.log_outcome("Visual Timer", True)
+        coordinator.flush()
+        assert habit_expert.weights["Visual Timer"] == 4
+        assert dict(SnapshotWeights(snapshot_dir, "habit_optimizer", schema["habit_optimizer"]))["Visual Timer"] == 3
+
+        # Bulk lookups: one vectorized search per name list, with the overlay applied
+        snap = SnapshotWeights(snapshot_dir, "habit_optimizer", schema["habit_optimizer"])
+        names = ["Deep Work Session", "Unknown", "Visual Timer", "Later"]
+        assert snap.lookup(names).tolist() == [0, 0, 3, 0]
+        snap["Later"] = 7
+        del snap["Visual Timer"]
+        snap._index = None  # Per-name searches are not used by lookup
+        assert snap.lookup(names).tolist() == [0, 0, 0, 7]
+        del snap._index
+        curiosity_weights = SnapshotWeights(snapshot_dir, "curiosity_tuner", schema["curiosity_tuner"])
+        assert curiosity_weights.lookup(["Curiosity Quiz", "X"], "beta", 1.0).tolist() == [2, 1]
+
+        # Experts score straight from the mapped columns; the tuner copies them only on update
+        fresh = OnlineCoordinator.from_snapshot(snapshot_dir, seed=0)
+        matrix = fresh.compile([{"name": n, "tags": [], "difficulty": "Low"} for n in names])
+        votes = fresh.experts[0].predict_batch(np.zeros((1, 1)), matrix)
+        assert np.allclose(votes, [[0.1, 0.1, 0.4, 0.1]])
+        tuner = fresh.experts[2]
+        assert not tuner.alpha.flags.writeable
+        tuner.predict_batch(np.zeros((2, 1)), matrix)
+        tuner.update_outcome("Curiosity Quiz", True)
+        assert tuner.alpha.flags.writeable and tuner.alpha[tuner.arm_index["Curiosity Quiz"]] == 2
+        assert tuner.weights["Curiosity Quiz"] == {"alpha": 2, "beta": 2}
+
+        # Import converts back to the JSON files
+        restored_dir = os.path.join(tmp, "restored")
+        import_snapshot(snapshot_dir, weights_dir=restored_dir)
+        with open(os.path.join(restored_dir, "curiosity_tuner_weights.json")) as f:
+            assert json.load(f) == curiosity
+    print("[PASS] Snapshots round-trip JSON weights and open read-only.")
+
+def test_reexport_keeps_mapped_readers_valid():
+    print("--- Testing Snapshot Re-export Under Readers ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        parent = OnlineCoordinator.in_memory({"habit_optimizer": {f"S{i}": i for i in range(1000)}}, seed=0)
+        export_snapshot(snapshot_dir, coordinator=parent)
+        schema = read_manifest(snapshot_dir)["experts"]["habit_optimizer"]
+        reader = SnapshotWeights(snapshot_dir, "habit_optimizer", schema)
+
+        # Two more exports with different weights: the mapped generation is never rewritten
+        for generation in range(2):
+            parent.experts[0].weights = {"Only": generation}
+            export_snapshot(snapshot_dir, coordinator=parent)
+        assert reader["S999"] == 999 and len(reader) == 1000
+        latest = read_manifest(snapshot_dir)["experts"]["habit_optimizer"]
+        assert dict(SnapshotWeights(snapshot_dir, "habit_optimizer", latest)) == {"Only": 1}
+
+        # Only the current and previous generations stay on disk
+        generations = {f.split(".")[1] for f in os.listdir(snapshot_dir) if f.endswith(".npy")}
+        assert len(generations) == 2 and latest["files"]["names"].split(".")[1] in generations
+    print("[PASS] Re-exports write a new generation and leave mapped files alone.")
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
+    test_reexport_keeps_mapped_readers_valid()
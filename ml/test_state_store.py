@@ -0,0 +1,60 @@
+import sys
+import os
+import tempfile
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.state_store import ShardedStateStore
+from ml.online_coordinator import OnlineCoordinator
+from ml.models.weight_store import JournaledWeightStore
+
+def test_sharded_state_store_lru_and_write_back():
+    print("--- Testing Sharded State Store ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ShardedStateStore(os.path.join(tmp, "users"), num_shards=4, cache_size=2)
+        for user in ["u1", "u2", "u3"]:
+            store.user_state(user, "habit_optimizer")["Visual Timer"] = int(user[1])
+            store.mark_dirty(user, "habit_optimizer", "Visual Timer")
+
+        # Cache is bounded: u1 was evicted and written back to its shard
+        assert store.cached_users() == ["u2", "u3"]
+        assert os.path.exists(store._shard_path(store.shard_for("u1")))
+        store.close()
+
+        reopened = ShardedStateStore(os.path.join(tmp, "users"), num_shards=4, cache_size=2)
+        assert reopened.user_state("u1", "habit_optimizer") == {"Visual Timer": 1}
+        assert reopened.user_state("u3", "habit_optimizer") == {"Visual Timer": 3}
+        assert reopened.user_state("nobody", "habit_optimizer") == {}
+        reopened.close()
+    print("[PASS] Per-user state is sharded, bounded and persisted.")
+
+def test_coordinator_personalizes_by_user():
+    print("--- Testing Per-User Coordinator State ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        coordinator = OnlineCoordinator(
+            store_factory=lambda name: JournaledWeightStore(os.path.join(tmp, f"{name}_weights.json")),
+            state_store=ShardedStateStore(os.path.join(tmp, "users"))
+        )
+        habit = coordinator.experts[0]
+        for _ in range(3):
+            coordinator.log_outcome("Visual Timer", True, user_id="alice")
+
+        assert habit.state("alice") == {"Visual Timer": 3}
+        assert habit.state("bob") == {}
+        assert habit.weights == {}  # Global state untouched
+
+        strategies = [{"name": "Visual Timer", "difficulty": "Low"}, {"name": "Deep Work Session", "difficulty": "Low"}]
+        matrix = coordinator.compile(strategies)
+        ctx = coordinator.preprocessor.normalize_contexts([{}, {}])
+        alice = habit.predict_vector(ctx[0], matrix, "alice")
+        assert alice[0] > alice[1]
+
+        _, scores = coordinator.select_strategies(ctx, matrix, user_ids=["alice", "bob"])
+        assert scores.shape == (2,)
+        coordinator.flush()
+    print("[PASS] Outcomes only affect the user that produced them.")
+
+if __name__ == "__main__":
+    test_sharded_state_store_lru_and_write_back()
+    test_coordinator_personalizes_by_user()
@@ -0,0 +1,60 @@
+import sys
+import os
+import json
+import tempfile
+
+# Add parent dir to path to import the ml package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.models.weight_store import JournaledWeightStore
+from ml.models.habit_optimizer import HabitOptimizer
+
+def test_journal_replay_and_compaction():
+    print("--- Testing Journaled Weight Store ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habit_optimizer_weights.json")
+        store = JournaledWeightStore(path, journal_batch=2, compact_every=4)
+        model = HabitOptimizer(store)
+
+        # One buffered update: nothing on disk yet
+        model.update_streak("Visual Timer", True)
+        assert not os.path.exists(store.journal_path) and not os.path.exists(path)
+
+        # Second update fills the batch and is appended to the journal
+        model.update_streak("Visual Timer", True)
+        assert os.path.exists(store.journal_path) and not os.path.exists(path)
+
+        # A fresh model recovers by replaying the journal
+        recovered = HabitOptimizer(JournaledWeightStore(path))
+        assert recovered.weights == {"Visual Timer": 2}
+
+        # Reaching the compaction threshold writes the snapshot and truncates the journal
+        model.update_streak("Visual Timer", False)
+        model.update_streak("Deep Work Session", True)
+        assert not os.path.exists(store.journal_path)
+        with open(path) as f:
+            assert json.load(f) == {"Visual Timer": 1, "Deep Work Session": 1}
+
+        # A torn trailing journal line (crash mid-append) is ignored on replay
+        model.update_streak("Deep Work Session", True)
+        model.flush()
+        with open(store.journal_path, 'a') as f:
+            f.write('{"k": "Visual Ti')
+        recovered = HabitOptimizer(JournaledWeightStore(path))
+        assert recovered.weights == {"Visual Timer": 1, "Deep Work Session": 2}
+
+        # Updates appended after that recovery survive the next restart
+        recovered.update_streak("Visual Timer", True)
+        recovered.update_streak("Focus Playlist", True)
+        recovered.flush()
+        with open(store.journal_path, 'a') as f:
+            f.write('{"k": "Focus Playlist", "v": 2}')  # Whole record, newline lost
+        recovered = HabitOptimizer(JournaledWeightStore(path))
+        recovered.update_streak("Visual Timer", True)
+        recovered.flush()
+        again = HabitOptimizer(JournaledWeightStore(path))
+        assert again.weights == {"Visual Timer": 3, "Deep Work Session": 2, "Focus Playlist": 2}
+    print("[PASS] Journal replays after restart and compacts atomically.")
+
+if __name__ == "__main__":
+    test_journal_replay_and_compaction()
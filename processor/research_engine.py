@@ -1,92 +1,434 @@
 import json
 import os
-from typing import List, Dict, Any, Optional
+import sys
+import hashlib
+import pickle
+import threading
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple
+
+class StrategyCatalog:
+    """
+    Indexed, read-only view of the flattened research strategies.
+
+    Built once at load time. Every strategy has a stable integer ID (`ids`, aligned with
+    `strategies`; see ResearchEngine for how they are kept stable across corpus changes),
+    tags are normalized and interned once, and inverted indexes map tag, difficulty and
+    source_id to catalog rows so queries are dict lookups instead of scans.
+    Rows are positions in `strategies` and change when modules are added or removed;
+    IDs do not, so anything persisted (event logs, replays) should store IDs.
+    """
+
+    def __init__(self, strategies: List[Dict[str, Any]], ids: List[int] = None):
+        self.strategies: List[Dict[str, Any]] = list(strategies)
+        self.ids: Tuple[int, ...] = tuple(range(len(self.strategies)) if ids is None else ids)
+        if len(self.ids) != len(self.strategies) or len(set(self.ids)) != len(self.ids):
+            raise ValueError("Strategy IDs must be unique and aligned with the strategies")
+        self.rows_by_id: Dict[int, int] = {strategy_id: row for row, strategy_id in enumerate(self.ids)}
+        self.rows_by_name: Dict[str, int] = {}
+        self.tags: List[Tuple[str, ...]] = []
+
+        by_tag: Dict[str, List[int]] = {}
+        by_difficulty: Dict[str, List[int]] = {}
+        by_source: Dict[str, List[int]] = {}
+        for row, strategy in enumerate(self.strategies):
+            self.rows_by_name.setdefault(strategy["name"], row)
+
+            tags = tuple(dict.fromkeys(self.normalize(t) for t in strategy.get("tags", [])))
+            self.tags.append(tags)
+            for tag in tags:
+                by_tag.setdefault(tag, []).append(row)
+
+            by_difficulty.setdefault(self.normalize(strategy.get("difficulty", "")), []).append(row)
+            by_source.setdefault(strategy.get("source_id"), []).append(row)
+
+        # Freeze the indexes: rows as tuples, and the matching strategies alongside
+        self._rows_by_tag = {k: tuple(v) for k, v in by_tag.items()}
+        self._by_tag = {k: tuple(self.strategies[i] for i in v) for k, v in self._rows_by_tag.items()}
+        self._by_difficulty = {k: tuple(self.strategies[i] for i in v) for k, v in by_difficulty.items()}
+        self._by_source = {k: tuple(self.strategies[i] for i in v) for k, v in by_source.items()}
+
+        # Content hash, so downstream caches can tell two catalogs apart
+        digest = hashlib.sha1(json.dumps([self.ids, self.strategies], sort_keys=True, default=str).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return sys.intern(value.strip().lower())
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def __iter__(self):
+        return iter(self.strategies)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """O(1) lookup by strategy name."""
+        row = self.rows_by_name.get(name)
+        return None if row is None else self.strategies[row]
+
+    def get_by_id(self, strategy_id: int) -> Optional[Dict[str, Any]]:
+        row = self.rows_by_id.get(strategy_id)
+        return None if row is None else self.strategies[row]
+
+    def id_of(self, name: str) -> Optional[int]:
+        row = self.rows_by_name.get(name)
+        return None if row is None else self.ids[row]
+
+    def rows_with_tag(self, tag: str) -> Tuple[int, ...]:
+        """Catalog rows (positions in `strategies`) of the strategies carrying a tag."""
+        return self._rows_by_tag.get(self.normalize(tag), ())
+
+    def ids_with_tag(self, tag: str) -> Tuple[int, ...]:
+        return tuple(self.ids[row] for row in self.rows_with_tag(tag))
+
+    def with_tag(self, tag: str) -> Tuple[Dict[str, Any], ...]:
+        return self._by_tag.get(self.normalize(tag), ())
+
+    def with_difficulty(self, difficulty: str) -> Tuple[Dict[str, Any], ...]:
+        return self._by_difficulty.get(self.normalize(difficulty), ())
+
+    def from_source(self, source_id: str) -> Tuple[Dict[str, Any], ...]:
+        return self._by_source.get(source_id, ())
+
+    def tag_vocabulary(self) -> List[str]:
+        return sorted(self._rows_by_tag)
+
+def _file_stat(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# Bump when the cached catalog layout changes, so old cache files are rebuilt
+CATALOG_CACHE_FORMAT = 2
+
+# Persisted {(source_id, name, occurrence): ID} table of a research directory (see ResearchEngine)
+STRATEGY_IDS_NAME = ".strategy_ids.json"
+
+class ResearchState(NamedTuple):
+    """
+    Everything a reload produces, published as one object: readers that take
+    `engine.state` once see modules, rules and catalog of the same version.
+    """
+    modules: List[Dict[str, Any]]
+    adaptation_rules: Dict[str, Any]
+    catalog: StrategyCatalog
+    # {filename: ((mtime_ns, size), module)} of the loaded corpus, for incremental reloads
+    parsed: Optional[Dict[str, Any]]
+    rules_stat: Optional[Tuple[int, int]]
 
 class ResearchEngine:
-    def __init__(self, research_dir: str = "../research"):
+    def __init__(self, research_dir: str = "../research", cache_path: Optional[str] = None, use_cache: bool = True,
+                 ids_path: Optional[str] = None):
         """
         Initialize the ResearchEngine.
         
         Args:
             research_dir (str): Path to the directory containing research JSON modules.
+            cache_path (str, optional): Compiled catalog cache file. Defaults to one file per
+                research directory under processor/.catalog_cache/.
+            use_cache (bool): Set to False to always parse every module (and not write a cache).
+            ids_path (str, optional): Strategy ID table. Defaults to `.strategy_ids.json` in the
+                research directory. It only grows: a strategy keeps its ID for as long as the
+                table exists, and new strategies get the next free one.
         """
         # Resolve absolute path relative to this script
         script_dir = os.path.dirname(os.path.abspath(__file__))
         self.research_dir = os.path.join(script_dir, research_dir)
-        self.modules: List[Dict[str, Any]] = []
-        self.strategies: List[Dict[str, Any]] = []
-        self.adaptation_rules: Dict[str, Any] = {}
-        self._load_modules()
-        self._load_adaptation_rules()
+        self.rules_path = os.path.join(script_dir, "adaptation_rules.json")
+        if cache_path is None:
+            dir_key = hashlib.sha1(os.path.abspath(self.research_dir).encode("utf-8")).hexdigest()[:16]
+            cache_path = os.path.join(script_dir, ".catalog_cache", f"{dir_key}.pkl")
+        self.cache_path = cache_path if use_cache else None
+        self.ids_path = ids_path or os.path.join(self.research_dir, STRATEGY_IDS_NAME)
+        self._id_table = None
+        self.state = ResearchState([], {}, StrategyCatalog([]), None, None)
+        self._reload_listeners = []
+        self._reload_lock = threading.Lock()
+        self._load()
 
-    def _load_modules(self):
+    def add_reload_listener(self, callback):
         """
-        Scans the research directory and loads all valid JSON files.
+        Registers `callback(catalog)` to be called after every reload that changes the
+        catalog version, e.g. so downstream caches keyed on it can be invalidated.
         """
+        self._reload_listeners.append(callback)
+
+    @property
+    def modules(self) -> List[Dict[str, Any]]:
+        return self.state.modules
+
+    @property
+    def strategies(self) -> List[Dict[str, Any]]:
+        return self.state.catalog.strategies
+
+    @property
+    def adaptation_rules(self) -> Dict[str, Any]:
+        return self.state.adaptation_rules
+
+    @property
+    def catalog(self) -> StrategyCatalog:
+        return self.state.catalog
+
+    @property
+    def _parsed(self) -> Optional[Dict[str, Any]]:
+        return self.state.parsed
+
+    @property
+    def version(self) -> str:
+        """Content hash of the current catalog; changes whenever a reload changes the strategies."""
+        return self.catalog.version
+
+    def reload(self):
+        """
+        Re-reads the research modules and adaptation rules, rebuilds the catalog and,
+        if its version changed, notifies the reload listeners. Only modules whose files
+        changed are re-parsed.
+
+        The new modules, rules and catalog are built on the side and published as one
+        `ResearchState` in a single assignment, so readers holding `engine.state` (or
+        `engine.catalog`) keep a consistent view for the rest of their decision and are
+        never blocked (see research_watcher.py for automatic reloads).
+        """
+        if self._load():
+            catalog = self.catalog
+            for callback in self._reload_listeners:
+                callback(catalog)
+        return self.catalog
+
+    def _load(self):
+        """
+        Loads modules, rules and catalog through the compiled catalog cache: a pickle of the
+        parsed modules (per file, with the file's mtime and size), the adaptation rules and
+        the built StrategyCatalog. If no file changed, everything comes from the cache;
+        otherwise only the changed modules are parsed and the cache is rewritten.
+        After the first load, the engine's own parsed state plays the role of the cache.
+        Returns True if the catalog version changed.
+        """
+        with self._reload_lock:
+            current = self.state
+            files = self._scan_files()
+            rules_stat = _file_stat(self.rules_path)
+            if current.parsed is None:
+                cache = self._read_cache()
+                if (cache is not None and cache["files"] == files and cache["rules_stat"] == rules_stat
+                        and cache.get("ids_stat") == _file_stat(self.ids_path)):
+                    self._publish(ResearchState(cache["modules"], cache["rules"], cache["catalog"], cache["parsed"], rules_stat))
+                    print(f"Loaded {len(self.modules)} research modules from catalog cache ({len(self.strategies)} strategies)")
+                    return True
+                previous = cache if cache is not None else {"parsed": {}, "rules_stat": None, "rules": {}}
+            else:
+                if rules_stat == current.rules_stat and files == {name: entry[0] for name, entry in current.parsed.items()}:
+                    return False  # Nothing changed on disk
+                previous = {"parsed": current.parsed, "rules_stat": current.rules_stat, "rules": current.adaptation_rules}
+
+            modules, strategies, parsed = self._load_modules(files, previous["parsed"])
+            if previous["rules_stat"] == rules_stat:
+                rules = previous["rules"]
+            else:
+                rules = self._load_adaptation_rules()
+            catalog = StrategyCatalog(strategies, self._strategy_ids(strategies))
+            self._publish(ResearchState(modules, rules, catalog, parsed, rules_stat))
+            self._write_cache({
+                "format": CATALOG_CACHE_FORMAT,
+                "files": files,
+                "parsed": parsed,
+                "modules": modules,
+                "rules_stat": rules_stat,
+                "rules": rules,
+                "catalog": catalog,
+                "ids_stat": _file_stat(self.ids_path)
+            })
+            return catalog.version != current.catalog.version
+
+    def _publish(self, state: ResearchState):
+        # One assignment: a reader sees either the old state or the new one, never a mix
+        self.state = state
+
+    def _strategy_ids(self, strategies: List[Dict[str, Any]]) -> List[int]:
+        """
+        Stable IDs for a strategy list, from the persisted ID table. Strategies are keyed by
+        (source_id, name, occurrence of that pair), so adding, removing or renaming a module
+        never renumbers the others. Unknown strategies get the next ID and the table is
+        rewritten; IDs of strategies that disappear are never reused.
+        """
+        if self._id_table is None:
+            self._id_table = {}
+            if os.path.exists(self.ids_path):
+                try:
+                    with open(self.ids_path, 'r', encoding='utf-8') as f:
+                        for entry in json.load(f)["strategies"]:
+                            self._id_table[(entry["source_id"], entry["name"], entry.get("occurrence", 0))] = entry["id"]
+                except Exception as e:
+                    print(f"  [!] Error loading strategy IDs ({e}); new IDs start after the highest known one")
+        next_id = max(self._id_table.values(), default=-1) + 1
+        ids, seen, added = [], {}, False
+        for strategy in strategies:
+            pair = (strategy.get("source_id"), strategy["name"])
+            key = pair + (seen.get(pair, 0),)
+            seen[pair] = key[2] + 1
+            if key not in self._id_table:
+                self._id_table[key] = next_id
+                next_id += 1
+                added = True
+            ids.append(self._id_table[key])
+        if len(self._id_table) > len(set(self._id_table.values())):
+            raise ValueError(f"Strategy ID table {self.ids_path} assigns one ID to several strategies")
+        if added or not os.path.exists(self.ids_path):
+            self._write_ids()
+        return ids
+
+    def _write_ids(self):
+        entries = []
+        for (source_id, name, occurrence), strategy_id in sorted(self._id_table.items(), key=lambda item: item[1]):
+            entry = {"id": strategy_id, "source_id": source_id, "name": name}
+            if occurrence:
+                entry["occurrence"] = occurrence
+            entries.append(entry)
+        try:
+            tmp_path = f"{self.ids_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"strategies": entries}, f, indent=2)
+            os.replace(tmp_path, self.ids_path)
+        except Exception as e:
+            print(f"  [!] Could not write strategy IDs to {self.ids_path}: {e}")
+
+    def _scan_files(self) -> Dict[str, Tuple[int, int]]:
+        """{filename: (mtime_ns, size)} of the research modules (hidden files, e.g. the ID table, excluded)."""
+        if not os.path.isdir(self.research_dir):
+            return {}
+        return {name: _file_stat(os.path.join(self.research_dir, name))
+                for name in os.listdir(self.research_dir) if name.endswith(".json") and not name.startswith(".")}
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = pickle.load(f)
+            if cache.get("format") != CATALOG_CACHE_FORMAT:
+                return None
+            return cache
+        except Exception as e:
+            print(f"  [!] Ignoring unreadable catalog cache: {e}")
+            return None
+
+    def _write_cache(self, cache: Dict[str, Any]):
+        if self.cache_path is None:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.cache_path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"  [!] Could not write catalog cache: {e}")
+
+    def _load_modules(self, files: Dict[str, Tuple[int, int]] = None, cached: Dict[str, Any] = None):
+        """
+        Loads all valid JSON files of the research directory. Files whose (mtime, size)
+        match an entry of `cached` ({filename: (stat, module or None)}) are not parsed again.
+        Returns: (modules, flattened strategies, {filename: (stat, module)} for the catalog cache).
+        """
+        modules, strategies = [], []
         if not os.path.exists(self.research_dir):
             print(f"Warning: Research directory '{self.research_dir}' not found.")
-            return
+            return modules, strategies, {}
 
+        files = self._scan_files() if files is None else files
+        cached = cached or {}
+        parsed = {}
         print(f"Loading research from: {self.research_dir}")
-        for filename in os.listdir(self.research_dir):
-            if filename.endswith(".json"):
-                filepath = os.path.join(self.research_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        module = json.load(f)
-                        self.modules.append(module)
-                        # Flatten strategies for easier access
-                        if "actionable_strategies" in module:
-                            for strategy in module["actionable_strategies"]:
-                                # Add source metadata to the strategy itself
-                                strategy["source_id"] = module.get("id")
-                                strategy["source_title"] = module.get("title")
-                                self.strategies.append(strategy)
-                        print(f"  [+] Loaded: {module.get('title', 'Unknown Title')}")
-                except json.JSONDecodeError:
-                    print(f"  [!] Error decoding JSON: {filename}")
-                except Exception as e:
-                    print(f"  [!] Error loading {filename}: {e}")
+        # Sorted so strategy order (and catalog IDs) do not depend on the filesystem
+        for filename in sorted(files):
+            stat = files[filename]
+            if filename in cached and cached[filename][0] == stat:
+                module = cached[filename][1]
+            else:
+                module = self._parse_module(filename)
+            # Failed files are remembered too (as None), so they do not defeat the cache
+            parsed[filename] = (stat, module)
+            if module is None:
+                continue
+            modules.append(module)
+            strategies.extend(module.get("actionable_strategies", []))
         
-        print(f"Total modules loaded: {len(self.modules)}")
-        print(f"Total strategies extracted: {len(self.strategies)}")
+        print(f"Total modules loaded: {len(modules)}")
+        print(f"Total strategies extracted: {len(strategies)}")
+        return modules, strategies, parsed
+
+    def _parse_module(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Reads one research module and tags its strategies with their source. None on error."""
+        filepath = os.path.join(self.research_dir, filename)
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                module = json.load(f)
+            # Flatten strategies for easier access
+            if "actionable_strategies" in module:
+                for strategy in module["actionable_strategies"]:
+                    # Add source metadata to the strategy itself
+                    strategy["source_id"] = module.get("id")
+                    strategy["source_title"] = module.get("title")
+            print(f"  [+] Loaded: {module.get('title', 'Unknown Title')}")
+            return module
+        except json.JSONDecodeError:
+            print(f"  [!] Error decoding JSON: {filename}")
+        except Exception as e:
+            print(f"  [!] Error loading {filename}: {e}")
+        return None
 
     def get_strategies_by_tag(self, tag: str) -> List[Dict[str, Any]]:
         """
         Returns a list of strategies that match a specific tag (e.g., 'initiation', 'curiosity').
         """
-        return [s for s in self.strategies if tag.lower() in [t.lower() for t in s.get("tags", [])]]
+        return list(self.catalog.with_tag(tag))
 
     def get_strategies_by_difficulty(self, difficulty: str) -> List[Dict[str, Any]]:
         """
         Returns a list of strategies matching a specific difficulty level (e.g., 'Low', 'Medium').
         """
-        return [s for s in self.strategies if s.get("difficulty", "").lower() == difficulty.lower()]
+        return list(self.catalog.with_difficulty(difficulty))
+
+    def get_strategy(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the strategy with the given name, or None.
+        """
+        return self.catalog.get(name)
 
     def _load_adaptation_rules(self):
         """
         Loads the heuristic rules for adapting to unknown contexts.
+        Returns the rules (the current ones if the file cannot be read).
         """
-        rules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "adaptation_rules.json")
+        rules_path = self.rules_path
         if os.path.exists(rules_path):
             try:
                 with open(rules_path, 'r', encoding='utf-8') as f:
-                    self.adaptation_rules = json.load(f)
+                    rules = json.load(f)
                 print(f"  [+] Loaded adaptation rules")
+                return rules
             except Exception as e:
                 print(f"  [!] Error loading adaptation rules: {e}")
+                return self.adaptation_rules
         else:
             print("  [!] Adaptation rules file not found.")
-            self.adaptation_rules = {}
+            return {}
 
-    def adapt_plan(self, plan: Dict[str, Any], user_context: Dict[str, Any]) -> Dict[str, Any]:
+    def adapt_plan(self, plan: Dict[str, Any], user_context: Dict[str, Any],
+                   state: Optional[ResearchState] = None) -> Dict[str, Any]:
         """
-        Refines a plan based on user context using the loaded heuristics.
+        Refines a plan based on user context using the loaded heuristics
+        (those of `state`, if the caller already holds one).
         """
-        if not self.adaptation_rules or not user_context:
+        rules = (state or self.state).adaptation_rules  # One consistent version, even if a reload swaps it meanwhile
+        if not rules or not user_context:
             return plan
 
-        heuristics = self.adaptation_rules.get("adaptation_heuristics", [])
+        heuristics = rules.get("adaptation_heuristics", [])
         
         # Example: Check for low energy
         if user_context.get("energy") == "low":
@@ -99,7 +441,7 @@ class ResearchEngine:
         
         # Example: Check for high stress (Fallback Logic)
         if user_context.get("stress") == "high":
-             fallback = self.adaptation_rules.get("fallback_logic", {}).get("high_stress_detected")
+             fallback = rules.get("fallback_logic", {}).get("high_stress_detected")
              if fallback:
                  # Insert a stress-relief step at the start
                  plan["steps"].insert(0, {
@@ -121,16 +463,19 @@ class ResearchEngine:
         Returns:
             Dict: A structured plan containing a Trigger, Action, and Retention strategy.
         """
+        state = self.state  # One consistent version of catalog and rules, even if a reload swaps it meanwhile
+        catalog = state.catalog
+
         # 1. Find a Trigger strategy (Gollwitzer)
-        triggers = self.get_strategies_by_tag("trigger")
+        triggers = catalog.with_tag("trigger")
         selected_trigger = triggers[0] if triggers else None
 
         # 2. Find an Action strategy (Fogg - Ability/Simplicity)
-        actions = self.get_strategies_by_tag("ability")
+        actions = catalog.with_tag("ability")
         selected_action = actions[0] if actions else None
 
         # 3. Find a Retention/Reflection strategy (Sirois - Self-Compassion)
-        reflections = self.get_strategies_by_tag("retention")
+        reflections = catalog.with_tag("retention")
         selected_reflection = reflections[0] if reflections else None
 
         plan = {
@@ -165,7 +510,7 @@ class ResearchEngine:
 
         # Apply Adaptation Layer
         if user_context:
-            plan = self.adapt_plan(plan, user_context)
+            plan = self.adapt_plan(plan, user_context, state)
 
         return plan
 
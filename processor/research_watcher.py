@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from typing import Optional, Set
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+class InotifyWatch:
+    """
+    Minimal inotify binding (ctypes over libc) that reports which file names changed in a
+    set of directories. Directories are watched rather than files, so editors that save
+    by writing a temp file and renaming it over the original are seen too.
+    Raises OSError where inotify is unavailable (non-Linux, no libc, watch limit reached).
+    """
+    def __init__(self, directories):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        try:
+            for directory in directories:
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+                self.directories[wd] = directory
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Blocks up to `timeout` seconds. Returns the paths that changed (empty if none), or
+        None if a watched directory itself went away (the caller should fall back to polling).
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                return None
+            if name and wd in self.directories:
+                changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class ResearchWatcher:
+    """
+    Watch mode for a ResearchEngine: a background thread that notices edits to the
+    research modules and to processor/adaptation_rules.json and calls `engine.reload()`,
+    which re-parses only the changed modules and swaps the new catalog in atomically.
+    Readers are never blocked; reload listeners receive the new catalog (and its
+    `version`), so downstream caches can invalidate, e.g.:
+
+        engine.add_reload_listener(coordinator.invalidate_decision_cache)
+        watcher = ResearchWatcher(engine).start()
+
+    Uses inotify where available and falls back to polling file mtimes/sizes every
+    `interval` seconds. Bursts of events (an editor saving several files) are coalesced
+    over `debounce` seconds into one reload.
+    """
+    def __init__(self, engine, interval: float = 1.0, debounce: float = 0.1, use_inotify: bool = True):
+        self.engine = engine
+        self.interval = interval
+        self.debounce = debounce
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = InotifyWatch(self._directories())
+            except (OSError, AttributeError) as e:
+                print(f"  [!] inotify unavailable ({e}); polling every {interval}s")
+        self._snapshot = self._stat_snapshot()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def _directories(self):
+        return [d for d in (self.engine.research_dir, os.path.dirname(self.engine.rules_path)) if os.path.isdir(d)]
+
+    def _relevant(self, path: str) -> bool:
+        if os.path.abspath(path) == os.path.abspath(self.engine.rules_path):
+            return True
+        return (os.path.abspath(os.path.dirname(path)) == os.path.abspath(self.engine.research_dir)
+                and path.endswith(".json") and not os.path.basename(path).startswith("."))
+
+    def _stat_snapshot(self):
+        try:
+            rules = os.stat(self.engine.rules_path)
+            rules_stat = (rules.st_mtime_ns, rules.st_size)
+        except OSError:
+            rules_stat = None
+        return self.engine._scan_files(), rules_stat
+
+    def check(self) -> bool:
+        """
+        One polling step: reloads the engine if any module or the rules changed since the
+        last check. Returns True if it reloaded.
+        """
+        snapshot = self._stat_snapshot()
+        if snapshot == self._snapshot:
+            return False
+        self._snapshot = snapshot
+        self._reload()
+        return True
+
+    def _reload(self):
+        try:
+            self.engine.reload()
+            self.reloads += 1
+            print(f"[ResearchWatcher] Catalog reloaded (version {self.engine.version}, {len(self.engine.strategies)} strategies)")
+        except Exception as e:
+            # Keep serving the previous catalog
+            print(f"[ResearchWatcher] Reload failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is None:
+                self._stop.wait(self.interval)
+                if not self._stop.is_set():
+                    self.check()
+                continue
+            changed = self._inotify.wait(self.interval)
+            if changed is None:
+                print("[ResearchWatcher] Watched directory went away; polling instead")
+                self._inotify.close()
+                self._inotify = None
+                continue
+            if any(self._relevant(path) for path in changed):
+                # Let the rest of a burst of writes arrive, then reload once
+                time.sleep(self.debounce)
+                self._inotify.wait(0)
+                self.check()
+
+    def start(self) -> "ResearchWatcher":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="research-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
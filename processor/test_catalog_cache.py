@@ -0,0 +1,59 @@
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import contextlib
+
+# Add the current directory to the path so we can import the engine
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from research_engine import ResearchEngine
+
+RESEARCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "research")
+
+def _load(research_dir, cache_path):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        engine = ResearchEngine(research_dir=research_dir, cache_path=cache_path)
+    return engine, out.getvalue().count("[+] Loaded: ")
+
+def test_compiled_catalog_cache():
+    print("=== COMPILED CATALOG CACHE ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        research_dir = os.path.join(tmp, "research")
+        shutil.copytree(RESEARCH_DIR, research_dir)
+        cache_path = os.path.join(tmp, "catalog.pkl")
+        reference = ResearchEngine(research_dir=research_dir, use_cache=False)
+
+        cold, parsed = _load(research_dir, cache_path)
+        assert parsed == len(reference.modules) and os.path.exists(cache_path)
+        warm, parsed = _load(research_dir, cache_path)
+        assert parsed == 0
+        assert warm.catalog.version == reference.catalog.version
+        assert warm.strategies == reference.strategies and warm.adaptation_rules == reference.adaptation_rules
+        assert len(warm.get_strategies_by_tag("curiosity")) == len(reference.get_strategies_by_tag("curiosity"))
+
+        # Editing one module re-parses only that module
+        path = os.path.join(research_dir, "fogg_2009_behavior_model.json")
+        with open(path) as f:
+            module = json.load(f)
+        module["actionable_strategies"][0]["tags"].append("cache-test")
+        with open(path, 'w') as f:
+            json.dump(module, f)
+        edited, parsed = _load(research_dir, cache_path)
+        assert parsed == 1
+        assert edited.catalog.version != reference.catalog.version
+        assert [s["name"] for s in edited.get_strategies_by_tag("cache-test")] == [module["actionable_strategies"][0]["name"]]
+
+        # A broken file is remembered, so it does not force a rebuild every time
+        with open(os.path.join(research_dir, "zz_broken.json"), 'w') as f:
+            f.write("{not json")
+        _load(research_dir, cache_path)
+        again, parsed = _load(research_dir, cache_path)
+        assert parsed == 0 and len(again.modules) == len(reference.modules)
+    print("[PASS] Unchanged corpora load from the cache; edits re-parse only changed modules.")
+
+if __name__ == "__main__":
+    test_compiled_catalog_cache()
@@ -1,6 +1,8 @@
 import sys
 import os
 import json
+import shutil
+import tempfile
 
 # Add the current directory to the path so we can import the engine
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -53,5 +55,71 @@ def test_research_engine():
     else:
         print("\n[FAIL] Adaptation logic failed. Check rules.")
 
+def test_strategy_catalog():
+    print("=== CATALOG INDEXES ===")
+    engine = ResearchEngine()
+    catalog = engine.catalog
+
+    # Indexed queries agree with a full scan
+    for tag in ["curiosity", "Retention", "template"]:
+        scanned = [s for s in engine.strategies if tag.lower() in [t.lower() for t in s.get("tags", [])]]
+        assert engine.get_strategies_by_tag(tag) == scanned
+    for difficulty in ["low", "Medium", "Very Low"]:
+        scanned = [s for s in engine.strategies if s.get("difficulty", "").lower() == difficulty.lower()]
+        assert engine.get_strategies_by_difficulty(difficulty) == scanned
+
+    # Stable IDs and O(1) name lookup
+    assert len(set(catalog.ids)) == len(catalog)
+    for strategy_id, strategy in zip(catalog.ids, catalog.strategies):
+        assert catalog.get(strategy["name"]) is strategy
+        assert catalog.id_of(strategy["name"]) == strategy_id
+        assert catalog.get_by_id(strategy_id) is strategy
+    first = catalog.strategies[0]
+    assert first in catalog.from_source(first["source_id"])
+    assert catalog.get("No Such Strategy") is None
+    assert ResearchEngine().catalog.version == catalog.version
+
+    # A reload that changes nothing keeps the published state and notifies nobody
+    notified = []
+    engine.add_reload_listener(notified.append)
+    state = engine.state
+    reloaded = engine.reload()
+    assert notified == [] and reloaded is catalog and engine.state is state
+    assert engine.modules is state.modules and engine.adaptation_rules is state.adaptation_rules
+    print(f"[PASS] Catalog indexes {len(catalog)} strategies over {len(catalog.tag_vocabulary())} tags.")
+
+def test_strategy_ids_survive_corpus_changes():
+    print("=== STABLE STRATEGY IDS ===")
+    research = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "research")
+    with tempfile.TemporaryDirectory() as tmp:
+        research_dir = os.path.join(tmp, "research")
+        shutil.copytree(research, research_dir, ignore=shutil.ignore_patterns(".*"))
+        engine = ResearchEngine(research_dir=research_dir, use_cache=False)
+        before = dict(zip((s["name"] for s in engine.strategies), engine.catalog.ids))
+
+        # A module sorting first is added and another one removed
+        with open(os.path.join(research_dir, "aaa_new_module.json"), 'w') as f:
+            json.dump({"id": "new_2024", "title": "New", "actionable_strategies": [
+                {"name": "Brand New Strategy", "tags": ["novelty"], "difficulty": "Low", "logic": "-"}]}, f)
+        removed = engine.modules[-1]
+        os.remove(os.path.join(research_dir, sorted(n for n in os.listdir(research_dir) if n.endswith(".json") and not n.startswith("."))[-1]))
+        notified = []
+        engine.add_reload_listener(notified.append)
+        catalog = engine.reload()
+        assert notified == [catalog] and engine.state.catalog is catalog
+
+        removed_names = {s["name"] for s in removed["actionable_strategies"]}
+        for strategy in catalog.strategies[1:]:
+            assert catalog.id_of(strategy["name"]) == before[strategy["name"]]
+        assert catalog.id_of("Brand New Strategy") == len(before)  # Next ID; removed ones are not reused
+        assert not removed_names & {s["name"] for s in catalog.strategies}
+
+        # The table is persisted with the corpus, so a fresh engine agrees
+        fresh = ResearchEngine(research_dir=research_dir, use_cache=False)
+        assert fresh.catalog.ids == catalog.ids
+    print("[PASS] Adding or removing modules never renumbers existing strategies.")
+
 if __name__ == "__main__":
     test_research_engine()
+    test_strategy_catalog()
+    test_strategy_ids_survive_corpus_changes()
@@ -0,0 +1,73 @@
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+
+# Add the current directory to the path so we can import the engine
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from research_engine import ResearchEngine
+from research_watcher import ResearchWatcher
+
+PROCESSOR_DIR = os.path.dirname(os.path.abspath(__file__))
+RESEARCH_DIR = os.path.join(os.path.dirname(PROCESSOR_DIR), "research")
+
+def _setup(tmp):
+    research_dir = os.path.join(tmp, "research")
+    shutil.copytree(RESEARCH_DIR, research_dir)
+    engine = ResearchEngine(research_dir=research_dir, use_cache=False)
+    # Watch a copy of the rules, not the real file
+    engine.rules_path = os.path.join(tmp, "adaptation_rules.json")
+    shutil.copy(os.path.join(PROCESSOR_DIR, "adaptation_rules.json"), engine.rules_path)
+    engine.reload()
+    return engine
+
+def _add_module(research_dir, module_id):
+    module = {"id": module_id, "title": f"Module {module_id}", "actionable_strategies": [
+        {"name": f"Strategy {module_id}", "logic": "x", "difficulty": "Low", "tags": ["hot-reload"]}]}
+    with open(os.path.join(research_dir, f"{module_id}.json"), 'w') as f:
+        json.dump(module, f)
+
+def test_polling_reload_is_incremental():
+    print("=== WATCH MODE (POLLING) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _setup(tmp)
+        versions = []
+        engine.add_reload_listener(lambda catalog: versions.append(catalog.version))
+        watcher = ResearchWatcher(engine, use_inotify=False)
+        assert watcher.mode == "polling" and not watcher.check()
+
+        old_catalog = engine.catalog
+        untouched = engine._parsed["fogg_2009_behavior_model.json"][1]
+        _add_module(engine.research_dir, "new_module")
+        assert watcher.check()
+        assert versions == [engine.version] and engine.version != old_catalog.version
+        assert [s["name"] for s in engine.get_strategies_by_tag("hot-reload")] == ["Strategy new_module"]
+        # Unchanged modules were not re-parsed; the old catalog is intact for its readers
+        assert engine._parsed["fogg_2009_behavior_model.json"][1] is untouched
+        assert not old_catalog.with_tag("hot-reload")
+
+        with open(engine.rules_path, 'w') as f:
+            json.dump({"adaptation_heuristics": []}, f)
+        assert watcher.check() and engine.adaptation_rules == {"adaptation_heuristics": []}
+    print("[PASS] Changed modules and rules are picked up incrementally.")
+
+def test_inotify_watcher_reloads_in_background():
+    print("=== WATCH MODE (INOTIFY) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _setup(tmp)
+        with ResearchWatcher(engine, interval=0.05, debounce=0.01) as watcher:
+            print(f"Watching with {watcher.mode}")
+            version = engine.version
+            _add_module(engine.research_dir, "background_module")
+            deadline = time.time() + 5
+            while engine.version == version and time.time() < deadline:
+                time.sleep(0.01)
+            assert engine.catalog.get("Strategy background_module") is not None
+    print("[PASS] The background watcher swaps in the new catalog.")
+
+if __name__ == "__main__":
+    test_polling_reload_is_incremental()
+    test_inotify_watcher_reloads_in_background()
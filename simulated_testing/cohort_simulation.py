@@ -0,0 +1,256 @@
+import sys
+import os
+import time
+import numpy as np
+from datetime import datetime
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.online_coordinator import OnlineCoordinator
+from processor.research_engine import ResearchEngine
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.run_simulation import simulation_coordinator, SIMULATION_START
+
+class PersonaCohort:
+    """
+    N UserPersonas held as NumPy arrays (one entry per persona), so a whole population
+    can be stepped at once. `next_day`, `levels` and `react` follow the rules of
+    UserPersona.next_day / get_context / react_to_strategy exactly, as array operations.
+    """
+    def __init__(self, names, base_stress, base_energy, resilience=0.3):
+        self.names = list(names)
+        n = len(self.names)
+        self.base_stress = np.broadcast_to(np.asarray(base_stress, dtype=float), (n,)).copy()
+        self.base_energy = np.broadcast_to(np.asarray(base_energy, dtype=float), (n,)).copy()
+        self.resilience = np.broadcast_to(np.asarray(resilience, dtype=float), (n,)).copy()
+
+        # Dynamic States
+        self.current_stress = self.base_stress.copy()
+        self.current_energy = self.base_energy.copy()
+        self.streak = np.zeros(n, dtype=np.int64)
+
+    @classmethod
+    def from_personas(cls, personas):
+        cohort = cls([p.name for p in personas], [p.base_stress for p in personas],
+                     [p.base_energy for p in personas], [p.resilience for p in personas])
+        cohort.current_stress = np.array([p.current_stress for p in personas], dtype=float)
+        cohort.current_energy = np.array([p.current_energy for p in personas], dtype=float)
+        cohort.streak = np.array([p.streak for p in personas], dtype=np.int64)
+        return cohort
+
+    @classmethod
+    def random(cls, n, rng=None, name="Persona"):
+        """A cohort with base stress/energy drawn uniformly from [0.2, 0.8]."""
+        rng = rng if rng is not None else np.random.default_rng()
+        return cls([f"{name} {i}" for i in range(n)], rng.uniform(0.2, 0.8, n), rng.uniform(0.2, 0.8, n))
+
+    def __len__(self):
+        return len(self.names)
+
+    def persona(self, i):
+        """Member i as a regular UserPersona (a copy of its current state)."""
+        return UserPersona.from_dict({
+            "name": self.names[i],
+            "base_stress": float(self.base_stress[i]),
+            "base_energy": float(self.base_energy[i]),
+            "resilience": float(self.resilience[i]),
+            "current_stress": float(self.current_stress[i]),
+            "current_energy": float(self.current_energy[i]),
+            "streak": int(self.streak[i])
+        })
+
+    def next_day(self, rng):
+        """Random fluctuation around base, for every persona."""
+        n = len(self)
+        self.current_stress = np.clip(self.base_stress + rng.uniform(-0.2, 0.2, n), 0.0, 1.0)
+        self.current_energy = np.clip(self.base_energy + rng.uniform(-0.2, 0.2, n), 0.0, 1.0)
+
+    def levels(self):
+        """(energy, stress) as the 0.0/0.5/1.0 levels of get_context's low/medium/high labels."""
+        return _level(self.current_energy), _level(self.current_stress)
+
+    def react(self, traits, strategy_ids, rng):
+        """
+        Every persona reacts to its strategy (`strategy_ids[i]`, a row of `traits`).
+        Returns: boolean success array.
+        """
+        high = traits["high"][strategy_ids]
+        low = traits["low"][strategy_ids]
+        regulation = traits["regulation"][strategy_ids]
+        productivity = traits["productivity"][strategy_ids]
+        energy, stress = self.current_energy, self.current_stress
+
+        # Probability of success
+        prob_success = np.full(len(self), 0.5)
+        # 1. Energy vs Difficulty Check
+        prob_success += np.where(high & (energy < 0.4), -0.4, np.where(high & (energy > 0.7), 0.2, 0.0))
+        prob_success += np.where(low & (energy < 0.4), 0.3, 0.0)
+        # 2. Stress vs Regulation Check
+        stressed = stress > 0.7
+        soothed = stressed & regulation
+        pushed = stressed & ~regulation & productivity
+        prob_success += np.where(soothed, 0.4, np.where(pushed, -0.5, 0.0))
+        self.current_stress = stress + np.where(soothed, -0.2, np.where(pushed, 0.1, 0.0))
+        # 3. Curiosity/Novelty Check
+        prob_success += np.where(traits["curiosity"][strategy_ids], 0.1, 0.0)
+
+        # Determine Outcome
+        success = rng.random(len(self)) < prob_success
+        self.streak = np.where(success, self.streak + 1, 0)
+        self.current_energy = np.where(success, np.maximum(0, energy - 0.1), energy)
+        return success
+
+def _level(values):
+    # < 0.3 -> low, > 0.7 -> high, otherwise medium
+    return np.where(values < 0.3, 0.0, np.where(values > 0.7, 1.0, 0.5))
+
+def strategy_traits(strategies):
+    """Boolean arrays (one entry per strategy) of what react_to_strategy looks at."""
+    difficulty = [s.get("difficulty", "Medium").lower() for s in strategies]
+    tags = [{t.lower() for t in s.get("tags", [])} for s in strategies]
+    return {
+        "high": np.array([d == "high" for d in difficulty], dtype=bool),
+        "low": np.array([d == "low" for d in difficulty], dtype=bool),
+        "regulation": np.array([bool(t & {"emotion", "reflection"}) for t in tags], dtype=bool),
+        "productivity": np.array(["productivity" in t for t in tags], dtype=bool),
+        "curiosity": np.array(["curiosity" in t for t in tags], dtype=bool)
+    }
+
+def cohort_seeds(seed):
+    """
+    Splits one cohort seed into independent streams: (population seed sequence, dynamics
+    seed sequence, coordinator seed). Drawing the population, the daily fluctuations and
+    reactions, and the Thompson samples from one shared stream would correlate them
+    (e.g. each persona's day-1 stress noise would replay its base_stress draw).
+    """
+    population, dynamics, coordinator = np.random.SeedSequence(seed).spawn(3)
+    return population, dynamics, int(coordinator.generate_state(1, np.uint64)[0])
+
+def iter_cohort_simulation(cohort: PersonaCohort = None, days=30, interactions=5, seed=None,
+                           coordinator: OnlineCoordinator = None, engine: ResearchEngine = None,
+                           start: datetime = None):
+    """
+    Simulates a cohort day by day, yielding each day's per-persona metrics as soon as the
+    day is done: {"day", "completion_rate", "stress", "energy", "streak"} ((N,) arrays).
+
+    Each persona gets its own copy of the experts' learned state (as in run_simulation,
+    where every run starts from a fork of the saved weights); decisions for the whole
+    cohort are one batched ensemble call per interaction. Interactions are spread over
+    the waking hours of simulated days starting at `start`, so the time features follow
+    simulated time rather than the wall clock. `seed` is split into independent population,
+    dynamics and coordinator streams (see `cohort_seeds`).
+    """
+    population_seed, dynamics_seed, coordinator_seed = cohort_seeds(seed)
+    rng = np.random.default_rng(dynamics_seed)
+    engine = engine or ResearchEngine()
+    coordinator = coordinator or simulation_coordinator(coordinator_seed)
+    cohort = cohort or PersonaCohort.random(1000, np.random.default_rng(population_seed))
+    n = len(cohort)
+
+    matrix = coordinator.compile(engine.catalog)
+    traits = strategy_traits(matrix.strategies)
+    state = coordinator.init_cohort(matrix, n)
+
+    start = start or SIMULATION_START
+    day_zero = np.datetime64(start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None), "s")
+    hours = np.linspace(8, 22, interactions, endpoint=False).astype(int)
+
+    for day in range(days):
+        cohort.next_day(rng)
+        successes = np.zeros(n)
+
+        for hour in hours:
+            # A. Get Context (levels as in get_context, time from the simulated clock)
+            energy, stress = cohort.levels()
+            timestamps = np.full(n, day_zero + np.timedelta64(day * 24 + int(hour), "h"))
+            ctx_matrix = coordinator.preprocessor.encode_contexts(timestamps, energy, stress).astype(float)
+
+            # B. ML Selects Strategy (whole cohort at once)
+            chosen, _ = coordinator.select_cohort(ctx_matrix, matrix, state)
+
+            # C. Users React
+            success = cohort.react(traits, chosen, rng)
+
+            # D. Feedback Loop
+            coordinator.log_cohort_outcomes(state, chosen, success)
+            successes += success
+
+        yield {
+            "day": day + 1,
+            "completion_rate": successes / interactions,
+            "stress": cohort.current_stress.copy(),
+            "energy": cohort.current_energy.copy(),
+            "streak": cohort.streak.copy()
+        }
+
+def run_cohort_simulation(cohort: PersonaCohort = None, days=30, interactions=5, seed=None,
+                          coordinator: OnlineCoordinator = None, engine: ResearchEngine = None,
+                          start: datetime = None, keep_daily=True):
+    """
+    Runs `run_simulation` for every persona of a cohort at once (see `iter_cohort_simulation`).
+
+    Returns: the `run_simulation` result keys, with one entry per persona
+        ("daily_*" are (N x days) float32 arrays; with keep_daily=False they are the
+        cohort means per day, which keeps memory independent of N x days).
+    """
+    population_seed, _, _ = cohort_seeds(seed)
+    cohort = cohort or PersonaCohort.random(1000, np.random.default_rng(population_seed))
+    n = len(cohort)
+
+    shape = (n, days) if keep_daily else (days,)
+    daily_completion_rates = np.zeros(shape, dtype=np.float32)
+    daily_stress = np.zeros(shape, dtype=np.float32)
+    daily_energy = np.zeros(shape, dtype=np.float32)
+    first_week = np.zeros(n)
+    last_week = np.zeros((n, min(7, days)))  # Ring buffer of the most recent rates
+
+    for metrics in iter_cohort_simulation(cohort, days, interactions, seed, coordinator, engine, start):
+        day, rate = metrics["day"] - 1, metrics["completion_rate"]
+        if keep_daily:
+            daily_completion_rates[:, day] = rate
+            daily_stress[:, day] = metrics["stress"]
+            daily_energy[:, day] = metrics["energy"]
+        else:
+            daily_completion_rates[day] = rate.mean()
+            daily_stress[day] = metrics["stress"].mean()
+            daily_energy[day] = metrics["energy"].mean()
+        if day < 7:
+            first_week += rate
+        last_week[:, day % last_week.shape[1]] = rate
+
+    avg_first_week = first_week / min(7, days)
+    avg_last_week = last_week.mean(axis=1)
+    return {
+        "user_name": cohort.names,
+        "daily_completion_rates": daily_completion_rates,
+        "daily_stress": daily_stress,
+        "daily_energy": daily_energy,
+        "week_1_avg": avg_first_week,
+        "week_4_avg": avg_last_week,
+        "improvement": avg_last_week - avg_first_week
+    }
+
+def persona_result(results, i):
+    """Persona i's slice of cohort results, in exactly the form run_simulation returns."""
+    if np.ndim(results["daily_completion_rates"]) != 2:
+        raise ValueError("Per-persona results need keep_daily=True")
+    return {
+        "user_name": results["user_name"][i],
+        "daily_completion_rates": results["daily_completion_rates"][i].tolist(),
+        "daily_stress": results["daily_stress"][i].tolist(),
+        "daily_energy": results["daily_energy"][i].tolist(),
+        "week_1_avg": float(results["week_1_avg"][i]),
+        "week_4_avg": float(results["week_4_avg"][i]),
+        "improvement": float(results["improvement"][i])
+    }
+
+if __name__ == "__main__":
+    n, days = (int(a) for a in (sys.argv[1:3] if len(sys.argv) > 2 else (100_000, 365)))
+    print(f"=== SIMULATING {n} PERSONAS x {days} DAYS ===")
+    begin = time.perf_counter()
+    population_seed, _, _ = cohort_seeds(0)
+    cohort = PersonaCohort.random(n, np.random.default_rng(population_seed))
+    res = run_cohort_simulation(cohort, days=days, seed=0, keep_daily=False)
+    print(f"Simulation Complete in {time.perf_counter() - begin:.1f}s. "
+          f"Mean improvement: {res['improvement'].mean()*100:+.1f}%")
@@ -0,0 +1,126 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# Bump when the simulation rules change, so results computed by older code are not reused
+CACHE_FORMAT = 1
+
+def simulation_key(persona, seed, days, catalog_version, coordinator_state):
+    """
+    Content address of a simulation run: a SHA-256 over everything that determines its
+    result. `persona` is `UserPersona.to_dict()` at the start of the run, `catalog_version`
+    the research catalog's content hash and `coordinator_state` the coordinator's
+    `export_state()` (weights and random stream), so any change to the research or the
+    model gives a different key.
+    """
+    payload = json.dumps({
+        "format": CACHE_FORMAT,
+        "persona": persona,
+        "seed": seed,
+        "days": days,
+        "catalog": catalog_version,
+        "coordinator": coordinator_state
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    On-disk cache of simulation results, one JSON file per content key (see
+    `simulation_key`), bounded to `max_bytes` with least-recently-used eviction.
+
+    Recency is the file mtime (refreshed on every hit), so the order survives restarts and
+    is shared by processes using the same directory; writes go through a temp file and an
+    atomic rename, so concurrent readers never see a partial entry.
+    """
+    def __init__(self, cache_dir=None, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan()
+
+    def key(self, user, seed, days, catalog, coordinator):
+        """`simulation_key` for a persona about to be simulated with this catalog and coordinator."""
+        return simulation_key(user.to_dict(), seed, days, catalog.version, coordinator.export_state())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan(self):
+        # key -> size in bytes, least recently used first
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._total_bytes = sum(self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """The cached result for `key`, or None. A hit makes the entry most recently used."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Stores a JSON-serializable result, then evicts old entries beyond `max_bytes`."""
+        data = json.dumps(result).encode("utf-8")
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._total_bytes += len(data) - self._entries.pop(key, 0)
+        self._entries[key] = len(data)
+        if self._total_bytes > self.max_bytes:
+            # Other processes may have added or evicted entries since the last scan
+            self._scan()
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                continue
+            del self._entries[key]
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for key in list(self._entries):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self._entries.clear()
+        self._total_bytes = 0
@@ -1,9 +1,9 @@
 import sys
 import os
+import json
 import random
-import sys
-import os
-import random
+from datetime import datetime, timedelta
+import numpy as np
 # import matplotlib.pyplot as plt # Removed to avoid dependency issues
 
 # Add parent dir to path
@@ -13,72 +13,226 @@ from ml.online_coordinator import OnlineCoordinator
 from processor.research_engine import ResearchEngine
 from simulated_testing.user_persona import UserPersona
 
-def run_simulation(user: UserPersona = None):
+# Hours of the day at which the daily distraction events happen (simulated time)
+INTERACTION_HOURS = [8, 10, 13, 16, 19]
+SIMULATION_START = datetime(2024, 1, 1)
+
+def simulation_seeds(seed):
     """
-    Runs a 30-day simulation for the given user.
-    Returns a dictionary of results for visualization.
+    Splits one run seed into independent streams: (persona seed, coordinator seed).
+    A run is fully determined by its seed (and the starting expert weights).
+    """
+    persona_seed, coordinator_seed = np.random.SeedSequence(seed).generate_state(2)
+    return int(persona_seed), int(coordinator_seed)
+
+# Warm coordinator every default simulation is forked from (loaded once per process)
+_template: OnlineCoordinator = None
+
+def simulation_coordinator(seed=None):
+    """
+    An isolated, in-memory fork of the saved expert weights. The weights files are read
+    once per process; runs never write to them or see each other's updates.
+    """
+    global _template
+    if _template is None:
+        _template = OnlineCoordinator()
+    return _template.fork(seed)
+
+class SimulationStream:
     """
-    print(f"=== INITIALIZING 30-DAY SIMULATION FOR {user.name if user else 'Default'} ===")
-    
-    # 1. Setup System
-    engine = ResearchEngine()
-    coordinator = OnlineCoordinator()
-    all_strategies = engine.strategies
-    
-    # 2. Setup User (if not provided, create default)
-    if not user:
-        user = UserPersona(name="Alex (Burnout Student)", base_stress=0.75, base_energy=0.4)
-    
-    # Metrics
-    daily_completion_rates = []
-    daily_stress = []
-    daily_energy = []
-    
-    # 3. Run 30 Days
-    for day in range(1, 31):
+    Day-by-day simulation of one persona. Iterating yields one metrics dict per simulated
+    day as soon as it is done, so long horizons can be watched (and stopped) as they run.
+
+    With a `checkpoint_path`, the persona, the coordinator's learned state and both random
+    streams are written to disk (JSON, atomic replace) every `checkpoint_every` days and
+    at the end. `resume=True` continues from that checkpoint, drawing exactly the random
+    numbers the uninterrupted run would have drawn.
+
+    Args mirror `run_simulation`; `days` sets the horizon.
+    """
+    def __init__(self, user: UserPersona = None, days=30, seed=None, coordinator: OnlineCoordinator = None,
+                 engine: ResearchEngine = None, checkpoint_path=None, checkpoint_every=7, resume=False):
+        self.days = days
+        self.seed = seed
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        persona_seed, coordinator_seed = simulation_seeds(seed) if seed is not None else (None, None)
+
+        # 1. Setup System
+        self.engine = engine or ResearchEngine()
+        self.coordinator = coordinator or simulation_coordinator(coordinator_seed)
+
+        # 2. Setup User (if not provided, create default)
+        if not user:
+            user = UserPersona(name="Alex (Burnout Student)", base_stress=0.75, base_energy=0.4)
+        if persona_seed is not None:
+            user.rng = random.Random(persona_seed)
+        self.user = user
+
+        # Simulated clock for the context time features (bound to the coordinator only
+        # while a day runs, so a caller's coordinator keeps its own clock)
+        self.clock = SimulatedClock(SIMULATION_START)
+
+        # Metrics
+        self.day = 0
+        self.history = {"daily_completion_rates": [], "daily_stress": [], "daily_energy": []}
+        if resume and checkpoint_path and os.path.exists(checkpoint_path):
+            self._restore()
+
+    def __iter__(self):
+        # 3. Run the remaining days
+        while self.day < self.days:
+            metrics = self._step()
+            if self.checkpoint_path and (self.day % self.checkpoint_every == 0 or self.day == self.days):
+                self.checkpoint()
+            yield metrics
+
+    def _step(self):
+        preprocessor = self.coordinator.preprocessor
+        clock, preprocessor.clock = preprocessor.clock, self.clock
+        try:
+            return self._simulate_day()
+        finally:
+            preprocessor.clock = clock
+
+    def _simulate_day(self):
+        self.day += 1
+        user, coordinator = self.user, self.coordinator
         user.next_day()
-        
-        interactions = 5 # 5 distraction events per day
+
+        interactions = len(INTERACTION_HOURS) # 5 distraction events per day
         successes = 0
-        
+
         for i in range(interactions):
             # A. Get Context
+            self.clock.now = SIMULATION_START + timedelta(days=self.day - 1, hours=INTERACTION_HOURS[i])
             context = user.get_context()
-            
+
             # B. ML Selects Strategy
-            chosen_strat = coordinator.select_strategy(context, all_strategies)
-            
+            chosen_strat = coordinator.select_strategy(context, self.engine.catalog)
+
             # C. User Reacts
             outcome, reward = user.react_to_strategy(chosen_strat)
-            
+
             # D. Feedback Loop
             coordinator.log_outcome(chosen_strat["name"], outcome == "completed")
-            
+
             # Log
             if outcome == "completed": successes += 1
-            
+
         rate = successes / interactions
-        daily_completion_rates.append(rate)
-        daily_stress.append(user.current_stress)
-        daily_energy.append(user.current_energy)
-
-    # 4. Compile Results
-    avg_first_week = sum(daily_completion_rates[:7]) / 7
-    avg_last_week = sum(daily_completion_rates[-7:]) / 7
-    improvement = avg_last_week - avg_first_week
-    
-    results = {
-        "user_name": user.name,
-        "daily_completion_rates": daily_completion_rates,
-        "daily_stress": daily_stress,
-        "daily_energy": daily_energy,
-        "week_1_avg": avg_first_week,
-        "week_4_avg": avg_last_week,
-        "improvement": improvement
-    }
-    
+        self.history["daily_completion_rates"].append(rate)
+        self.history["daily_stress"].append(user.current_stress)
+        self.history["daily_energy"].append(user.current_energy)
+        return {
+            "day": self.day,
+            "completion_rate": rate,
+            "stress": user.current_stress,
+            "energy": user.current_energy,
+            "streak": user.streak
+        }
+
+    def results(self):
+        """Results so far, in the `run_simulation` format."""
+        rates = self.history["daily_completion_rates"]
+        week = max(1, min(7, len(rates)))  # Shorter runs average over all their days
+        avg_first_week = sum(rates[:week]) / week
+        avg_last_week = sum(rates[-week:]) / week
+        return {
+            "user_name": self.user.name,
+            "daily_completion_rates": list(rates),
+            "daily_stress": list(self.history["daily_stress"]),
+            "daily_energy": list(self.history["daily_energy"]),
+            "week_1_avg": avg_first_week,
+            "week_4_avg": avg_last_week,
+            "improvement": avg_last_week - avg_first_week
+        }
+
+    def checkpoint(self):
+        """Writes the current state to `checkpoint_path` (temp file + atomic rename)."""
+        state = {
+            "seed": self.seed,
+            "day": self.day,
+            "days": self.days,
+            "persona": self.user.to_dict(),
+            "persona_rng": _jsonable(self.user.rng.getstate()),
+            "coordinator": self.coordinator.export_state(),
+            "history": self.history
+        }
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _restore(self):
+        with open(self.checkpoint_path, 'r') as f:
+            state = json.load(f)
+        if state["seed"] != self.seed or state["persona"]["name"] != self.user.name:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different run")
+        persona = state["persona"]
+        self.user.current_stress = persona["current_stress"]
+        self.user.current_energy = persona["current_energy"]
+        self.user.streak = persona["streak"]
+        self.user.rng.setstate(_tupled(state["persona_rng"]))
+        self.coordinator.import_state(state["coordinator"])
+        self.history = state["history"]
+        self.day = state["day"]
+
+def run_simulation(user: UserPersona = None, seed=None, coordinator: OnlineCoordinator = None,
+                   engine: ResearchEngine = None, verbose=True, days=30, checkpoint_path=None, resume=False,
+                   cache=None):
+    """
+    Runs a `days`-day simulation (30 by default) for the given user.
+    Returns a dictionary of results for visualization.
+
+    With a `seed`, the persona's reactions and the coordinator's Thompson sampling use
+    their own random streams (see `simulation_seeds`), so the run can be repeated exactly.
+    By default the run gets its own fork of the saved weights (`simulation_coordinator`), so
+    it does no disk I/O and leaves the shared weights untouched. A `coordinator` passed in
+    is used as-is (fork and seed it yourself); `engine` defaults to a fresh ResearchEngine.
+    Time features follow simulated time, not the wall clock.
+    For per-day progress and checkpoint/resume, iterate a SimulationStream instead.
+
+    With a `cache` (ResultCache, see result_cache.py), a seeded run is looked up before it
+    starts: a hit returns the stored result without simulating, in which case neither the
+    persona nor the coordinator is advanced. Unseeded and checkpointed runs bypass the cache.
+    """
+    if verbose:
+        print(f"=== INITIALIZING {days}-DAY SIMULATION FOR {user.name if user else 'Default'} ===")
+    stream = SimulationStream(user, days=days, seed=seed, coordinator=coordinator, engine=engine,
+                              checkpoint_path=checkpoint_path, resume=resume)
+    key = None
+    if cache is not None and seed is not None and checkpoint_path is None:
+        key = cache.key(stream.user, seed, days, stream.engine.catalog, stream.coordinator)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    for _ in stream:
+        pass
+    results = stream.results()
+    if key is not None:
+        cache.put(key, results)
     return results
 
+def _jsonable(value):
+    """random.Random state (nested tuples) -> JSON lists."""
+    return [_jsonable(v) for v in value] if isinstance(value, tuple) else value
+
+def _tupled(value):
+    """Inverse of `_jsonable`."""
+    return tuple(_tupled(v) for v in value) if isinstance(value, list) else value
+
+class SimulatedClock:
+    """Stand-in for datetime.now that returns the simulation's current time."""
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
 if __name__ == "__main__":
     # Test run
     res = run_simulation()
@@ -0,0 +1,241 @@
+import sys
+import os
+import io
+import json
+import math
+import shutil
+import argparse
+import tempfile
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.online_coordinator import OnlineCoordinator
+from ml.snapshot import export_snapshot, snapshot_digest
+from processor.research_engine import ResearchEngine
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.run_simulation import run_simulation, simulation_seeds
+from simulated_testing.result_cache import ResultCache
+
+# Where sweeps keep the weights snapshots they ran from (one directory per content digest)
+SNAPSHOT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+
+# Fields of a run (plan entry, plus the starting weights once scheduled); the rest of a result row is output
+RUN_FIELDS = ["base_stress", "base_energy", "resilience", "seed", "weights", "snapshot_dir"]
+
+# Result fields aggregated per parameter point
+METRICS = ["week_1_avg", "week_4_avg", "improvement", "final_stress", "final_energy"]
+
+# Two-sided 95% Student t quantiles for 1..30 degrees of freedom (normal beyond)
+T_975 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def sweep_plan(base_stress, base_energy, resilience, runs_per_point, master_seed=0):
+    """
+    Every (base_stress, base_energy, resilience) combination times `runs_per_point`.
+    Each run gets its own seed, spawned from `master_seed` through a SeedSequence, so the
+    streams are independent and the plan is identical every time it is built.
+    """
+    points = list(itertools.product(base_stress, base_energy, resilience))
+    children = np.random.SeedSequence(master_seed).spawn(len(points) * runs_per_point)
+    plan = []
+    for i, (stress, energy, res) in enumerate(points):
+        for r in range(runs_per_point):
+            child = children[i * runs_per_point + r]
+            plan.append({
+                "base_stress": float(stress),
+                "base_energy": float(energy),
+                "resilience": float(res),
+                "seed": int(child.generate_state(1, np.uint64)[0])
+            })
+    return plan
+
+# Per-process state, built once by the pool initializer
+_worker = {}
+
+# Days simulated per run
+SWEEP_DAYS = 30
+
+def snapshot_weights(weights_dir=None, root=SNAPSHOT_ROOT) -> str:
+    """
+    Exports the current expert weights (ml/data by default) into `root/<digest>`, named by
+    the snapshot's content digest, and returns that directory. Identical weights reuse the
+    existing snapshot; it is kept, so every run of a sweep can be replayed against it later.
+    """
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".export_", dir=root)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if weights_dir is None:
+                export_snapshot(tmp_dir)
+            else:
+                export_snapshot(tmp_dir, weights_dir=weights_dir)
+        snapshot_dir = os.path.join(root, snapshot_digest(tmp_dir)[:16])
+        if not os.path.exists(snapshot_dir):
+            os.replace(tmp_dir, snapshot_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return snapshot_dir
+
+def _init_worker(snapshot_dir, cache_dir=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker["engine"] = ResearchEngine()
+        _worker["template"] = OnlineCoordinator.from_snapshot(snapshot_dir)
+    _worker["snapshot_dir"] = snapshot_dir
+    _worker["cache"] = ResultCache(cache_dir) if cache_dir else None
+
+def _template_for(run):
+    """The worker's template, or one opened from the run's own snapshot (checked against its digest)."""
+    snapshot_dir = run.get("snapshot_dir")
+    if snapshot_dir is None:
+        return _worker["template"]
+    if "weights" in run and snapshot_digest(snapshot_dir) != run["weights"]:
+        raise ValueError(f"Snapshot {snapshot_dir} no longer holds the weights run {run['seed']} started from")
+    if _worker.get("snapshot_dir") == snapshot_dir:
+        return _worker["template"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker["template"] = OnlineCoordinator.from_snapshot(snapshot_dir)
+        _worker.setdefault("engine", ResearchEngine())
+    _worker["snapshot_dir"] = snapshot_dir
+    return _worker["template"]
+
+def _setup_point(run, template):
+    _, coordinator_seed = simulation_seeds(run["seed"])
+    coordinator = template.fork(coordinator_seed)
+    user = UserPersona(f"sweep-{run['seed']}", run["base_stress"], run["base_energy"], run["resilience"])
+    return user, coordinator
+
+def _point_result(run, result, catalog_version):
+    run = {field: run[field] for field in RUN_FIELDS if field in run}
+    return dict(run, catalog=catalog_version, **{
+        "week_1_avg": result["week_1_avg"],
+        "week_4_avg": result["week_4_avg"],
+        "improvement": result["improvement"],
+        "final_stress": result["daily_stress"][-1],
+        "final_energy": result["daily_energy"][-1],
+        "daily_completion_rates": result["daily_completion_rates"]
+    })
+
+def run_point(run, template: OnlineCoordinator = None, engine=None, cache: ResultCache = None):
+    """
+    Runs one planned simulation on a fork of the template coordinator (by default the
+    worker's, or one opened from the run's `snapshot_dir`), so runs never see each other's
+    updates and never write to disk. A result row of `run_sweep` is itself a valid `run`:
+    it names the snapshot (and its digest, `weights`) the run started from, so
+    `run_point(row)` reproduces the row exactly, and raises ValueError if that snapshot
+    has changed. With a `cache` (by default the worker's, if the sweep has one), a stored
+    result is reused.
+    """
+    template = template or _template_for(run)
+    engine = engine or _worker["engine"]
+    cache = cache if cache is not None else _worker.get("cache")
+    user, coordinator = _setup_point(run, template)
+    result = run_simulation(user, seed=run["seed"], coordinator=coordinator, engine=engine, verbose=False,
+                            days=SWEEP_DAYS, cache=cache)
+    return _point_result(run, result, engine.catalog.version)
+
+def _run_chunk(runs):
+    return [run_point(run) for run in runs]
+
+def run_sweep(plan, workers=None, snapshot_dir=None, chunk_size=None, cache_dir=None):
+    """
+    Fans the planned runs out over a process pool and returns one result dict per run, in plan order.
+    Every row records the starting weights (`snapshot_dir` and its content digest `weights`)
+    and the research catalog version (`catalog`), so it can be replayed with `run_point(row)`.
+
+    Args:
+        plan: List of runs from `sweep_plan`.
+        workers: Number of processes (default: all cores).
+        snapshot_dir: Expert weights to start every run from (default: a snapshot of the
+            current ml/data weights, kept under simulated_testing/snapshots/, see `snapshot_weights`).
+        chunk_size: Runs handed to a worker at a time (default: spread evenly, ~4 chunks per worker).
+        cache_dir: ResultCache directory. Runs already in the cache are answered before the
+            pool is started; only the misses are simulated (and then stored by the workers).
+    """
+    workers = workers or os.cpu_count() or 1
+    snapshot_dir = os.path.abspath(snapshot_dir or snapshot_weights())
+    weights = snapshot_digest(snapshot_dir)
+    plan = [dict(run, weights=weights, snapshot_dir=snapshot_dir) for run in plan]
+    results = [None] * len(plan)
+    if cache_dir:
+        cache = ResultCache(cache_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = ResearchEngine()
+            template = OnlineCoordinator.from_snapshot(snapshot_dir)
+        for i, run in enumerate(plan):
+            user, coordinator = _setup_point(run, template)
+            cached = cache.get(cache.key(user, run["seed"], SWEEP_DAYS, engine.catalog, coordinator))
+            if cached is not None:
+                results[i] = _point_result(run, cached, engine.catalog.version)
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        size = chunk_size or max(1, math.ceil(len(pending) / (workers * 4)))
+        chunks = [[plan[i] for i in pending[j:j + size]] for j in range(0, len(pending), size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot_dir, cache_dir)) as pool:
+            done = [result for chunk in pool.map(_run_chunk, chunks) for result in chunk]
+        for i, result in zip(pending, done):
+            results[i] = result
+    return results
+
+def aggregate(results, metrics=METRICS):
+    """
+    Groups runs by parameter point and returns one row per point with the mean, standard
+    deviation and 95% confidence interval (Student t) of each metric.
+    """
+    groups = {}
+    for r in results:
+        groups.setdefault((r["base_stress"], r["base_energy"], r["resilience"]), []).append(r)
+
+    table = []
+    for (stress, energy, res), runs in groups.items():
+        row = {"base_stress": stress, "base_energy": energy, "resilience": res, "runs": len(runs)}
+        for metric in metrics:
+            values = np.array([r[metric] for r in runs], dtype=float)
+            mean = float(values.mean())
+            sd = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+            t = T_975[len(values) - 2] if 1 < len(values) <= 31 else 1.96
+            half_width = t * sd / math.sqrt(len(values)) if len(values) > 1 else float("nan")
+            row[metric] = {"mean": mean, "sd": sd, "ci_low": mean - half_width, "ci_high": mean + half_width}
+        table.append(row)
+    return table
+
+def format_table(table, metric="improvement"):
+    lines = [f"{'stress':>7} {'energy':>7} {'resil.':>7} {'runs':>5}  {metric} mean [95% CI]"]
+    for row in table:
+        m = row[metric]
+        lines.append(f"{row['base_stress']:>7.2f} {row['base_energy']:>7.2f} {row['resilience']:>7.2f} {row['runs']:>5}"
+                     f"  {m['mean']*100:+6.1f}% [{m['ci_low']*100:+6.1f}%, {m['ci_high']*100:+6.1f}%]")
+    return "\n".join(lines)
+
+def _grid(text):
+    return [float(v) for v in text.split(",")]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel persona parameter sweep.")
+    parser.add_argument("--stress", type=_grid, default=[0.2, 0.5, 0.8], help="Comma-separated base_stress values")
+    parser.add_argument("--energy", type=_grid, default=[0.2, 0.5, 0.8], help="Comma-separated base_energy values")
+    parser.add_argument("--resilience", type=_grid, default=[0.3])
+    parser.add_argument("--runs", type=int, default=10, help="Seeds per parameter point")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="Write runs and aggregate table to this JSON file")
+    parser.add_argument("--cache-dir", help="Reuse and store run results in this ResultCache directory")
+    parser.add_argument("--snapshot-dir", help="Weights snapshot to run from (default: snapshot ml/data into simulated_testing/snapshots/)")
+    args = parser.parse_args()
+
+    plan = sweep_plan(args.stress, args.energy, args.resilience, args.runs, args.seed)
+    print(f"=== SWEEP: {len(plan)} runs on {args.workers or os.cpu_count()} workers ===")
+    results = run_sweep(plan, workers=args.workers, snapshot_dir=args.snapshot_dir, cache_dir=args.cache_dir)
+    if results:
+        print(f"Starting weights: {results[0]['snapshot_dir']} (digest {results[0]['weights'][:16]})")
+    table = aggregate(results)
+    print(format_table(table))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({"master_seed": args.seed, "runs": results, "table": table}, f, indent=2)
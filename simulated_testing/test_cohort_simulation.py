@@ -0,0 +1,100 @@
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.online_coordinator import OnlineCoordinator
+from ml.models.weight_store import JournaledWeightStore
+from processor.research_engine import ResearchEngine
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.cohort_simulation import PersonaCohort, strategy_traits, run_cohort_simulation, iter_cohort_simulation, persona_result, cohort_seeds
+
+def test_cohort_reactions_match_persona():
+    print("--- Testing Vectorized Persona Reactions ---")
+    strategies = ResearchEngine().catalog.strategies
+    traits = strategy_traits(strategies)
+    states = [(s, e) for s in (0.1, 0.5, 0.8) for e in (0.2, 0.5, 0.9)]
+
+    for roll in (0.05, 0.35, 0.65, 0.95):
+        for strategy_id, strategy in enumerate(strategies):
+            personas = [UserPersona(f"p{i}", s, e) for i, (s, e) in enumerate(states)]
+            for p in personas:
+                p.streak = 2
+            cohort = PersonaCohort.from_personas(personas)
+
+            rng = mock.Mock()
+            rng.random.return_value = np.full(len(personas), roll)
+            success = cohort.react(traits, np.full(len(personas), strategy_id), rng)
+
+            with mock.patch("simulated_testing.user_persona.random.random", return_value=roll):
+                outcomes = [p.react_to_strategy(strategy)[0] for p in personas]
+            assert success.tolist() == [o == "completed" for o in outcomes]
+            assert np.allclose(cohort.current_stress, [p.current_stress for p in personas])
+            assert np.allclose(cohort.current_energy, [p.current_energy for p in personas])
+            assert cohort.streak.tolist() == [p.streak for p in personas]
+    print("[PASS] Cohort reactions follow react_to_strategy.")
+
+def make_coordinator(tmp):
+    return OnlineCoordinator(store_factory=lambda name: JournaledWeightStore(os.path.join(tmp, f"{name}_weights.json")), seed=0)
+
+def make_cohort():
+    return PersonaCohort.from_personas([UserPersona("Alex", 0.75, 0.4), UserPersona("Sam", 0.2, 0.7)])
+
+def test_cohort_simulation_results():
+    print("--- Testing Cohort Simulation ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        coordinator = make_coordinator(tmp)
+        results = run_cohort_simulation(make_cohort(), days=10, seed=1, coordinator=coordinator)
+        assert results["user_name"] == ["Alex", "Sam"]
+        assert results["daily_completion_rates"].shape == (2, 10)
+        assert ((results["daily_completion_rates"] >= 0) & (results["daily_completion_rates"] <= 1)).all()
+        assert np.allclose(results["improvement"], results["week_4_avg"] - results["week_1_avg"])
+
+        # Same shape as run_simulation for a single persona; global expert weights untouched
+        alex = persona_result(results, 0)
+        assert alex["user_name"] == "Alex" and len(alex["daily_stress"]) == 10
+        assert isinstance(alex["improvement"], float)
+        assert all(not e.weights for e in coordinator.experts)
+
+        # Reproducible for a seed; cohort means only with keep_daily=False
+        again = run_cohort_simulation(make_cohort(), days=10, seed=1, coordinator=make_coordinator(tmp))
+        assert np.array_equal(again["daily_completion_rates"], results["daily_completion_rates"])
+        means = run_cohort_simulation(PersonaCohort.random(50, np.random.default_rng(0)), days=3, seed=0,
+                                      coordinator=coordinator, keep_daily=False)
+        assert means["daily_energy"].shape == (3,) and means["improvement"].shape == (50,)
+
+        # The same days, streamed as they are simulated
+        days = list(iter_cohort_simulation(make_cohort(), days=10, seed=1, coordinator=make_coordinator(tmp)))
+        assert [d["day"] for d in days] == list(range(1, 11))
+        assert np.allclose(np.stack([d["completion_rate"] for d in days], axis=1), results["daily_completion_rates"])
+    print("[PASS] Cohort results mirror run_simulation per persona.")
+
+def test_cohort_streams_are_independent():
+    print("--- Testing Cohort Seed Streams ---")
+    noise = {}
+    real_next_day = PersonaCohort.next_day
+
+    def record_next_day(cohort, rng):
+        real_next_day(cohort, rng)
+        if not noise:
+            noise["base"] = cohort.base_stress.copy()
+            noise["day_1"] = cohort.current_stress - cohort.base_stress
+
+    with mock.patch.object(PersonaCohort, "next_day", autospec=True, side_effect=record_next_day):
+        run_cohort_simulation(days=1, seed=5, coordinator=OnlineCoordinator.in_memory(seed=0), keep_daily=False)
+    # Base traits (population stream) and daily noise (dynamics stream) must not replay each other
+    assert abs(np.corrcoef(noise["base"], noise["day_1"])[0, 1]) < 0.15
+
+    population, dynamics, coordinator_seed = cohort_seeds(5)
+    assert population.entropy == dynamics.entropy and population.spawn_key != dynamics.spawn_key
+    assert cohort_seeds(5)[2] == coordinator_seed
+    print("[PASS] Population, dynamics and coordinator draw from independent streams.")
+
+if __name__ == "__main__":
+    test_cohort_reactions_match_persona()
+    test_cohort_simulation_results()
+    test_cohort_streams_are_independent()
@@ -0,0 +1,57 @@
+import sys
+import os
+import tempfile
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.online_coordinator import OnlineCoordinator
+from ml.snapshot import export_snapshot
+from processor.research_engine import ResearchEngine
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.run_simulation import run_simulation, simulation_seeds
+from simulated_testing.result_cache import ResultCache
+from simulated_testing.sweep_runner import sweep_plan, run_sweep
+
+def test_result_cache_reuses_and_invalidates_runs():
+    print("--- Testing Simulation Result Cache ---")
+    engine = ResearchEngine()
+    template = OnlineCoordinator.in_memory()
+    _, coordinator_seed = simulation_seeds(7)
+
+    def simulate(cache, coordinator=None):
+        user = UserPersona("Cached", base_stress=0.7, base_energy=0.4)
+        return run_simulation(user, seed=7, coordinator=coordinator or template.fork(coordinator_seed),
+                              engine=engine, verbose=False, days=10, cache=cache)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(os.path.join(tmp, "cache"))
+        first = simulate(cache)
+        assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+        assert simulate(cache) == first
+        assert cache.hits == 1
+
+        # Different model state -> different key
+        changed = template.fork(coordinator_seed)
+        changed.log_outcome(engine.strategies[0]["name"], True)
+        simulate(cache, changed)
+        assert len(cache) == 2 and cache.hits == 1
+
+        # Size bound: only the most recently used entries survive
+        small = ResultCache(os.path.join(tmp, "small"), max_bytes=1)
+        for i in range(3):
+            small.put(f"k{i}", {"i": i})
+        assert len(small) == 1 and small.get("k2") == {"i": 2} and small.get("k0") is None
+
+        # A repeated sweep is answered from the cache and matches the uncached runs
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        export_snapshot(snapshot_dir, weights_dir=os.path.join(tmp, "no_weights"))
+        plan = sweep_plan([0.2, 0.8], [0.5], [0.3], runs_per_point=2, master_seed=3)
+        sweep_cache = os.path.join(tmp, "sweep")
+        fresh = run_sweep(plan, workers=1, snapshot_dir=snapshot_dir, cache_dir=sweep_cache)
+        assert len(ResultCache(sweep_cache)) == len(plan)
+        assert run_sweep(plan, workers=1, snapshot_dir=snapshot_dir, cache_dir=sweep_cache) == fresh
+    print("[PASS] Repeated runs come from the cache; changes invalidate it.")
+
+if __name__ == "__main__":
+    test_result_cache_reuses_and_invalidates_runs()
@@ -0,0 +1,63 @@
+import sys
+import os
+import tempfile
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.online_coordinator import OnlineCoordinator
+from processor.research_engine import ResearchEngine
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.run_simulation import SimulationStream, run_simulation, simulation_seeds
+
+SEED = 123
+
+def make_run(**kwargs):
+    coordinator = OnlineCoordinator.in_memory(seed=simulation_seeds(SEED)[1])
+    return dict(user=UserPersona("Alex", 0.75, 0.4), seed=SEED, coordinator=coordinator, **kwargs)
+
+def test_stream_yields_days_and_resumes_from_checkpoint():
+    print("--- Testing Streaming, Resumable Simulation ---")
+    engine = ResearchEngine()
+    expected = run_simulation(engine=engine, days=40, verbose=False, **make_run())
+
+    # Per-day metrics arrive as they are produced
+    days = [m["day"] for m in SimulationStream(engine=engine, days=40, **make_run())]
+    assert days == list(range(1, 41))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.json")
+        # Interrupted on day 12; the last checkpoint is from day 10
+        for metrics in SimulationStream(engine=engine, days=40, checkpoint_path=path, checkpoint_every=5, **make_run()):
+            if metrics["day"] == 12:
+                break
+
+        resumed = SimulationStream(engine=engine, days=40, checkpoint_path=path, checkpoint_every=5, resume=True, **make_run())
+        assert resumed.day == 10
+        assert [m["day"] for m in resumed] == list(range(11, 41))
+        assert resumed.results() == expected
+
+        # A finished run resumes straight to its results
+        done = SimulationStream(engine=engine, days=40, checkpoint_path=path, resume=True, **make_run())
+        assert list(done) == [] and done.results() == expected
+    print("[PASS] Resumed run matches the uninterrupted run exactly.")
+
+def test_stream_leaves_caller_clock_and_short_runs():
+    print("--- Testing SimulationStream Side Effects ---")
+    engine = ResearchEngine()
+    run = make_run()
+    clock = run["coordinator"].preprocessor.clock
+    stream = SimulationStream(engine=engine, days=3, **run)
+    assert next(iter(stream))["day"] == 1
+    assert run["coordinator"].preprocessor.clock is clock  # Restored after each day, even mid-run
+    list(stream)
+
+    # Fewer than 7 days: the "weeks" average the days there are
+    results = stream.results()
+    rates = results["daily_completion_rates"]
+    assert len(rates) == 3 and results["week_1_avg"] == results["week_4_avg"] == sum(rates) / 3
+    print("[PASS] The caller's coordinator keeps its clock and short runs average correctly.")
+
+if __name__ == "__main__":
+    test_stream_yields_days_and_resumes_from_checkpoint()
+    test_stream_leaves_caller_clock_and_short_runs()
@@ -0,0 +1,59 @@
+import sys
+import os
+import tempfile
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.snapshot import export_snapshot, snapshot_digest
+from ml.online_coordinator import OnlineCoordinator
+from processor.research_engine import ResearchEngine
+from simulated_testing.sweep_runner import sweep_plan, run_sweep, run_point, snapshot_weights, aggregate
+
+def test_sweep_is_parallel_and_reproducible():
+    print("--- Testing Parallel Sweep Runner ---")
+    plan = sweep_plan([0.2, 0.8], [0.5], [0.3], runs_per_point=3, master_seed=42)
+    assert len(plan) == 6
+    assert len({run["seed"] for run in plan}) == 6
+    assert plan == sweep_plan([0.2, 0.8], [0.5], [0.3], runs_per_point=3, master_seed=42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        export_snapshot(snapshot_dir, weights_dir=os.path.join(tmp, "no_weights"))
+        results = run_sweep(plan, workers=2, snapshot_dir=snapshot_dir, chunk_size=2)
+        assert [r["seed"] for r in results] == [run["seed"] for run in plan]
+
+        # Every row names the weights it started from and replays exactly from that snapshot alone
+        assert {r["weights"] for r in results} == {snapshot_digest(snapshot_dir)}
+        assert {r["snapshot_dir"] for r in results} == {os.path.abspath(snapshot_dir)}
+        assert run_point(results[0]) == results[0]
+
+        # ...and from its plan entry with an explicit template, in or out of the pool
+        engine = ResearchEngine()
+        template = OnlineCoordinator.from_snapshot(snapshot_dir)
+        for run, result in zip(plan, results):
+            assert run_point(dict(run, weights=result["weights"], snapshot_dir=result["snapshot_dir"]),
+                             template, engine) == result
+
+        # A snapshot that changed under a recorded run is refused rather than silently replayed
+        stale = dict(results[1], weights="0" * 64)
+        try:
+            run_point(stale)
+            assert False, "replaying against different weights should fail"
+        except ValueError:
+            pass
+
+        # Default snapshots are content-addressed and kept: identical weights reuse one directory
+        root = os.path.join(tmp, "snapshots")
+        first = snapshot_weights(os.path.join(tmp, "no_weights"), root=root)
+        assert snapshot_weights(os.path.join(tmp, "no_weights"), root=root) == first
+        assert os.listdir(root) == [os.path.basename(first)]
+
+    table = aggregate(results)
+    assert [(row["base_stress"], row["runs"]) for row in table] == [(0.2, 3), (0.8, 3)]
+    ci = table[0]["improvement"]
+    assert ci["ci_low"] <= ci["mean"] <= ci["ci_high"]
+    print("[PASS] Sweep runs are independent, reproducible and aggregated.")
+
+if __name__ == "__main__":
+    test_sweep_is_parallel_and_reproducible()
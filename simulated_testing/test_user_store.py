@@ -0,0 +1,106 @@
+import sys
+import os
+import json
+import tempfile
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulated_testing.user_manager import UserManager
+from simulated_testing.user_store import JsonUserStore, SqliteUserStore
+
+def test_sqlite_user_store_and_migration():
+    print("--- Testing Indexed User Store ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Existing users.json is migrated into a new SQLite database next to it
+        with open(os.path.join(tmp, "users.json"), 'w') as f:
+            json.dump([{"name": "Legacy", "base_stress": 0.9, "base_energy": 0.1, "streak": 4},
+                       {"name": "Legacy", "base_stress": 0.1, "base_energy": 0.1}], f)
+        mgr = UserManager(db_path=os.path.join(tmp, "users.db"))
+        assert isinstance(mgr.store, SqliteUserStore)
+        legacy = mgr.get_user("Legacy")
+        assert (legacy.base_stress, legacy.streak, len(mgr)) == (0.9, 4, 1)
+
+        # Bulk create / per-record update / bulk delete
+        created = mgr.create_users([(f"P{i}", 0.5, i / 1000) for i in range(1000)])
+        assert len(created) == 1000 and len(mgr) == 1001
+        user = mgr.get_user("P7")
+        user.streak = 3
+        mgr.update_user(user)
+        mgr.delete_users([f"P{i}" for i in range(500)])
+
+        reopened = UserManager(db_path=os.path.join(tmp, "users.db"))
+        assert len(reopened) == 501 and reopened.get_user("P7") is None
+        assert reopened.get_user("P700").base_energy == 0.7
+        first_id = reopened.store.id_of("P500")
+        assert reopened.get_user_by_id(first_id).name == "P500"
+
+        # Names index the SQLite store: re-creating one is refused and writes nothing
+        try:
+            reopened.create_users([("New", 0.2, 0.2), ("P500", 0.2, 0.2)])
+            assert False, "duplicate name accepted"
+        except ValueError:
+            pass
+        assert reopened.get_user("New") is None and reopened.get_user("P500").base_stress == 0.5
+        assert reopened.store.id_of("P500") == first_id
+        reopened.store.close()
+
+        # .json paths keep the original format
+        json_mgr = UserManager(db_path=os.path.join(tmp, "plain.json"))
+        assert isinstance(json_mgr.store, JsonUserStore)
+        json_mgr.create_users([("A", 0.1, 0.2), ("B", 0.3, 0.4)])
+        json_mgr.create_user("A", 0.9, 0.9)  # Appended, as in the original list
+        assert json_mgr.get_user("A").base_stress == 0.1 and len(json_mgr) == 3
+        with open(os.path.join(tmp, "plain.json")) as f:
+            assert [u["name"] for u in json.load(f)] == ["A", "B", "A"]
+    print("[PASS] Users are indexed, updated per record and migrated from JSON.")
+
+def test_mutations_persist_on_save():
+    print("--- Testing Persona Identity and save_users ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        for db in ("users.db", "users.json"):
+            path = os.path.join(tmp, db)
+            mgr = UserManager(db_path=path)
+            mgr.create_users([("Ann", 0.2, 0.8), ("Bob", 0.7, 0.3)])
+
+            # One object per persona, as with the original list
+            ann = mgr.get_user("Ann")
+            assert ann is mgr.get_user("Ann") and ann in mgr.users
+            assert next(mgr.iter_users(name_prefix="Ann")) is ann
+            ann.streak = 5
+            ann.base_energy = 0.6
+            mgr.get_all_users()[1].current_stress = 0.9
+            mgr.page_users(0, 10)[0][1].resilience = 0.8  # The same Bob object
+            mgr.save_users()
+
+            reopened = UserManager(db_path=path)
+            ann, bob = reopened.get_user("Ann"), reopened.get_user("Bob")
+            assert (ann.streak, ann.base_energy) == (5, 0.6)
+            assert (bob.current_stress, bob.resilience) == (0.9, 0.8)
+            if isinstance(reopened.store, SqliteUserStore):
+                reopened.store.close()
+                mgr.store.close()
+    print("[PASS] Personas keep their identity and save_users persists their changes.")
+
+def test_paged_filtered_iteration():
+    print("--- Testing Paged User Iteration ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        for db in ("users.db", "users.json"):
+            mgr = UserManager(db_path=os.path.join(tmp, db))
+            mgr.create_users([(f"{'Ann' if i % 2 else 'Bob'}{i:03d}", i / 100, 1 - i / 100) for i in range(100)])
+
+            assert [u.name for u in mgr.iter_users(page_size=7)] == [u.name for u in mgr.get_all_users()]
+            anns = list(mgr.iter_users(name_prefix="Ann", stress_range=(0.2, 0.5), page_size=4))
+            assert [u.name for u in anns] == [f"Ann{i:03d}" for i in range(21, 51, 2)]
+            assert mgr.count_users(name_prefix="Ann", stress_range=(0.2, 0.5)) == len(anns)
+            assert len(list(mgr.iter_users(energy_range=(None, 0.105)))) == 10
+
+            page, has_more = mgr.page_users(1, 30, name_prefix="Bob")
+            assert [u.name for u in page][:2] == ["Bob060", "Bob062"] and not has_more
+            assert mgr.page_users(0, 30, name_prefix="Bob")[1]
+    print("[PASS] Users are paged and filtered without loading the whole database.")
+
+if __name__ == "__main__":
+    test_sqlite_user_store_and_migration()
+    test_paged_filtered_iteration()
+    test_mutations_persist_on_save()
@@ -1,69 +1,205 @@
-import json
 import os
-from typing import List, Optional
+import weakref
+from typing import List, Optional, Iterable, Iterator, Tuple
 from .user_persona import UserPersona
+from .user_store import open_user_store, migrate_json, SqliteUserStore
 
 class UserManager:
     """
     Manages the database of simulated users.
+
+    The backend follows the file extension: `.json` is the original JSON list (rewritten
+    on every change), anything else (the default `users.db`) is an indexed SQLite store
+    that writes only the records that change. A new SQLite database is seeded from the
+    `.json` file next to it, if there is one.
+
+    As with the original in-memory list, a persona is one object for the lifetime of the
+    manager (`get_user(name) is get_user(name)`), and `save_users` persists every persona
+    that was changed since it was loaded or last saved. `update_user` writes one persona
+    through immediately. Personas handed out by `get_user`/`get_all_users`/`create_user`
+    are kept for the next `save_users`; those from `iter_users`/`page_users` are tracked
+    only while the caller holds them, so paging a large database stays lazy.
+
+    Duplicate names: the JSON backend appends them as before (lookups find the first);
+    SQLite indexes personas by name, so `create_user` raises ValueError for a name that
+    already exists there.
     """
-    def __init__(self, db_path="simulated_testing/users.json"):
+    def __init__(self, db_path="simulated_testing/users.db"):
         # Ensure path is absolute or relative to project root
         if not os.path.isabs(db_path):
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             self.db_path = os.path.join(base_dir, db_path)
         else:
             self.db_path = db_path
-            
-        self.users: List[UserPersona] = []
+
+        self.store = None
         self.load_users()
 
+    def _forget(self):
+        # name -> persona handed out (weakly held) / kept for save_users / to_dict() as stored
+        self._live = weakref.WeakValueDictionary()
+        self._kept = {}
+        self._stored = {}
+
+    def _track(self, user: UserPersona, keep: bool = True) -> UserPersona:
+        self._live[user.name] = user
+        self._stored[user.name] = user.to_dict()
+        if keep:
+            self._kept[user.name] = user
+        return user
+
+    def _persona(self, data, keep: bool = True) -> UserPersona:
+        """The live persona for a stored record (the record is only read the first time)."""
+        user = self._live.get(data["name"])
+        if user is None:
+            return self._track(UserPersona.from_dict(data), keep)
+        if keep:
+            self._kept[user.name] = user
+        return user
+
     def load_users(self):
-        """Load users from JSON file."""
-        if os.path.exists(self.db_path):
-            try:
-                with open(self.db_path, 'r') as f:
-                    data = json.load(f)
-                    self.users = [UserPersona.from_dict(u) for u in data]
-                print(f"[UserManager] Loaded {len(self.users)} users.")
-            except Exception as e:
-                print(f"[UserManager] Error loading users: {e}")
-                self.users = []
+        """Open the user database (migrating a sibling users.json into a new SQLite file)."""
+        if self.store is not None:
+            self.store.close()
+        self._forget()
+        is_new = not os.path.exists(self.db_path)
+        try:
+            self.store = open_user_store(self.db_path)
+        except Exception as e:
+            print(f"[UserManager] Error loading users: {e}")
+            self.store = open_user_store(":memory:")
+            return
+        json_path = os.path.splitext(self.db_path)[0] + ".json"
+        if is_new and isinstance(self.store, SqliteUserStore) and os.path.exists(json_path):
+            print(f"[UserManager] Migrated {migrate_json(json_path, self.store)} users from {json_path}.")
+        if self.store.exists():
+            print(f"[UserManager] Loaded {len(self.store)} users.")
         else:
             print("[UserManager] No user database found. Starting fresh.")
-            self.users = []
+
+    def _dirty(self):
+        """(stored name, persona) for every live persona whose state differs from the store."""
+        dirty = []
+        for name, stored in list(self._stored.items()):
+            user = self._live.get(name)
+            if user is None:
+                del self._stored[name]  # Released by the caller, so never modified
+            elif user.to_dict() != stored:
+                dirty.append((name, user))
+        return dirty
 
     def save_users(self):
-        """Save all users to JSON file."""
+        """Save all users: writes the personas that were modified since they were loaded."""
         try:
-            data = [u.to_dict() for u in self.users]
-            with open(self.db_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            print(f"[UserManager] Saved {len(self.users)} users.")
+            dirty = self._dirty()
+            renamed = [name for name, user in dirty if user.name != name]
+            if renamed:
+                self.store.delete_many(renamed)
+            if dirty:
+                self.store.put_many(user.to_dict() for _, user in dirty)
+            for name, user in dirty:
+                keep = name in self._kept
+                self._untrack(name)
+                self._track(user, keep)
+            self.store.save()
+            print(f"[UserManager] Saved {len(self.store)} users ({len(dirty)} modified).")
         except Exception as e:
             print(f"[UserManager] Error saving users: {e}")
 
+    @property
+    def users(self) -> List[UserPersona]:
+        return self.get_all_users()
+
     def create_user(self, name, stress, energy, resilience=0.3) -> UserPersona:
         """Create and save a new user."""
-        new_user = UserPersona(name, stress, energy, resilience)
-        self.users.append(new_user)
-        self.save_users()
-        return new_user
+        return self.create_users([(name, stress, energy, resilience)])[0]
+
+    def create_users(self, specs: Iterable[tuple]) -> List[UserPersona]:
+        """
+        Bulk `create_user`: `specs` are (name, stress, energy[, resilience]) tuples, saved in
+        one commit. Raises ValueError (and creates none) if SQLite already has one of the names.
+        """
+        new_users = [UserPersona(*spec) for spec in specs]
+        self.store.add_many(u.to_dict() for u in new_users)
+        for user in new_users:
+            if user.name not in self._live:
+                self._track(user)
+        return new_users
+
+    def update_user(self, user: UserPersona):
+        """Persist a user's current state now (only that record is written)."""
+        self.store.put_many([user.to_dict()])
+        # `user` becomes the live persona for its name (replacing any other copy)
+        keep = user.name in self._kept
+        self._untrack(user.name)
+        self._track(user, keep)
+
+    def _untrack(self, name):
+        self._live.pop(name, None)
+        self._kept.pop(name, None)
+        self._stored.pop(name, None)
 
     def get_user(self, name) -> Optional[UserPersona]:
         """Find a user by name."""
-        for user in self.users:
-            if user.name == name:
-                return user
-        return None
-    
+        user = self._live.get(name)
+        if user is not None:
+            self._kept[name] = user
+            return user
+        data = self.store.get(name)
+        return self._persona(data) if data else None
+
+    def get_user_by_id(self, user_id) -> Optional[UserPersona]:
+        data = self.store.get_by_id(user_id)
+        return self._persona(data) if data else None
+
     def delete_user(self, name):
         """Delete a user by name."""
-        self.users = [u for u in self.users if u.name != name]
-        self.save_users()
+        self.delete_users([name])
+
+    def delete_users(self, names: Iterable[str]):
+        """Bulk `delete_user`, saved in one commit."""
+        names = list(names)
+        self.store.delete_many(names)
+        for name in names:
+            self._untrack(name)
 
     def get_all_users(self) -> List[UserPersona]:
-        return self.users
+        users, seen = [], set()
+        for data in self.store.all():
+            if data["name"] in seen:
+                # A later JSON duplicate: lookups by name never reach it, so it is not tracked
+                users.append(UserPersona.from_dict(data))
+            else:
+                seen.add(data["name"])
+                users.append(self._persona(data))
+        return users
+
+    def iter_users(self, name_prefix=None, stress_range=None, energy_range=None, page_size=500) -> Iterator[UserPersona]:
+        """
+        Lazily yields the users matching the filters (name prefix, inclusive (lo, hi)
+        base_stress/base_energy ranges), reading `page_size` records at a time, so only
+        one page is in memory however large the database is.
+        """
+        after_id = 0
+        while True:
+            rows = self.store.query(name_prefix, stress_range, energy_range, after_id=after_id, limit=page_size)
+            for _, data in rows:
+                yield self._persona(data, keep=False)
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1][0]
+
+    def page_users(self, page=0, page_size=50, name_prefix=None, stress_range=None,
+                   energy_range=None) -> Tuple[List[UserPersona], bool]:
+        """Page `page` (0-based) of the matching users, and whether there are more pages after it."""
+        rows = self.store.query(name_prefix, stress_range, energy_range, offset=page * page_size, limit=page_size + 1)
+        return [self._persona(data, keep=False) for _, data in rows[:page_size]], len(rows) > page_size
+
+    def count_users(self, name_prefix=None, stress_range=None, energy_range=None) -> int:
+        return self.store.count(name_prefix=name_prefix, stress_range=stress_range, energy_range=energy_range)
+
+    def __len__(self):
+        return len(self.store)
 
 if __name__ == "__main__":
     # Test
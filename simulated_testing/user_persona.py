@@ -5,8 +5,10 @@ class UserPersona:
     """
     Simulates a specific user type with dynamic internal states.
     """
-    def __init__(self, name, base_stress=0.5, base_energy=0.5, resilience=0.3):
+    def __init__(self, name, base_stress=0.5, base_energy=0.5, resilience=0.3, rng=None):
         self.name = name
+        # Source of randomness (a random.Random for reproducible runs; defaults to the global module)
+        self.rng = rng if rng is not None else random
         self.base_stress = base_stress
         self.base_energy = base_energy
         self.resilience = resilience # Ability to bounce back
@@ -19,8 +21,8 @@ class UserPersona:
     def next_day(self):
         """Reset/Evolve state for a new day."""
         # Random fluctuation around base
-        self.current_stress = max(0.0, min(1.0, self.base_stress + random.uniform(-0.2, 0.2)))
-        self.current_energy = max(0.0, min(1.0, self.base_energy + random.uniform(-0.2, 0.2)))
+        self.current_stress = max(0.0, min(1.0, self.base_stress + self.rng.uniform(-0.2, 0.2)))
+        self.current_energy = max(0.0, min(1.0, self.base_energy + self.rng.uniform(-0.2, 0.2)))
         
     def get_context(self):
         """Return context dict for the ML model."""
@@ -71,7 +73,7 @@ class UserPersona:
             prob_success += 0.1 # Novelty bonus
             
         # Determine Outcome
-        roll = random.random()
+        roll = self.rng.random()
         if roll < prob_success:
             self.streak += 1
             self.current_energy = max(0, self.current_energy - 0.1) # Work costs energy
@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+from typing import Dict, Any, Iterable, List, Optional
+
+# Persona fields, in column order (see UserPersona.to_dict)
+FIELDS = ["name", "base_stress", "base_energy", "resilience", "current_stress", "current_energy", "streak"]
+
+def _record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """A persona dict with every field filled in, as UserPersona.from_dict would read it."""
+    return {
+        "name": data["name"],
+        "base_stress": data["base_stress"],
+        "base_energy": data["base_energy"],
+        "resilience": data.get("resilience", 0.3),
+        "current_stress": data.get("current_stress", data["base_stress"]),
+        "current_energy": data.get("current_energy", data["base_energy"]),
+        "streak": data.get("streak", 0)
+    }
+
+def _in_range(value, bounds):
+    lo, hi = bounds if bounds is not None else (None, None)
+    return (lo is None or value >= lo) and (hi is None or value <= hi)
+
+def _matches(record, name_prefix=None, stress_range=None, energy_range=None):
+    return ((not name_prefix or record["name"].startswith(name_prefix))
+            and _in_range(record["base_stress"], stress_range)
+            and _in_range(record["base_energy"], energy_range))
+
+class JsonUserStore:
+    """
+    The original `users.json` format: a list of persona dicts, rewritten as a whole
+    (indent=2) on every change. As before, names may repeat (lookups return the first
+    match); a name -> position index replaces the linear scan. IDs are positions.
+    Fine for a handful of personas; use SqliteUserStore for large populations.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.records: List[Dict[str, Any]] = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.records = [_record(data) for data in json.load(f)]
+        self._reindex()
+
+    def _reindex(self):
+        self.index: Dict[str, int] = {}
+        for i, record in enumerate(self.records):
+            self.index.setdefault(record["name"], i)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        i = self.index.get(name)
+        return None if i is None else self.records[i]
+
+    def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self.records[user_id - 1] if 0 < user_id <= len(self.records) else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self.records)
+
+    def query(self, name_prefix=None, stress_range=None, energy_range=None, after_id=0, offset=0, limit=None):
+        """(id, record) pairs matching the filters, in ID order (see SqliteUserStore.query)."""
+        matches = [(i, r) for i, r in enumerate(self.records, 1)
+                   if i > after_id and _matches(r, name_prefix, stress_range, energy_range)]
+        return matches[offset:None if limit is None else offset + limit]
+
+    def count(self, **filters) -> int:
+        return sum(1 for r in self.records if _matches(r, **filters))
+
+    def add_many(self, records: Iterable[Dict[str, Any]]):
+        """Appends the records (duplicate names allowed, as in the original list)."""
+        for data in records:
+            self.records.append(_record(data))
+            self.index.setdefault(data["name"], len(self.records) - 1)
+        self.save()
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        """Updates the first record of each name, appending unknown names."""
+        for data in records:
+            i = self.index.get(data["name"])
+            if i is None:
+                self.records.append(_record(data))
+                self.index[data["name"]] = len(self.records) - 1
+            else:
+                self.records[i] = _record(data)
+        self.save()
+
+    def delete_many(self, names: Iterable[str]):
+        names = set(names)
+        self.records = [r for r in self.records if r["name"] not in names]
+        self._reindex()
+        self.save()
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.records, f, indent=2)
+
+    def close(self):
+        pass
+
+class SqliteUserStore:
+    """
+    Personas in a SQLite table with an integer ID and a unique index on name, so lookups
+    are index probes and every change writes only the affected rows. Each call is one
+    transaction: bulk creates/deletes commit once, however many records they touch.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " name TEXT NOT NULL UNIQUE,"
+            " base_stress REAL NOT NULL, base_energy REAL NOT NULL, resilience REAL NOT NULL,"
+            " current_stress REAL NOT NULL, current_energy REAL NOT NULL, streak INTEGER NOT NULL)")
+        # For the range filters of `query`
+        self.conn.execute("CREATE INDEX IF NOT EXISTS users_base_stress ON users(base_stress)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS users_base_energy ON users(base_energy)")
+        self.conn.commit()
+
+    def exists(self) -> bool:
+        return True
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def _select(self, where="", params=()):
+        cursor = self.conn.execute(f"SELECT {', '.join(FIELDS)} FROM users {where}", params)
+        return [dict(zip(FIELDS, row)) for row in cursor]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        rows = self._select("WHERE name = ?", (name,))
+        return rows[0] if rows else None
+
+    def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._select("WHERE id = ?", (user_id,))
+        return rows[0] if rows else None
+
+    def id_of(self, name: str) -> Optional[int]:
+        row = self.conn.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._select("ORDER BY id")
+
+    @staticmethod
+    def _where(name_prefix=None, stress_range=None, energy_range=None):
+        clauses, params = [], []
+        if name_prefix:
+            # A range on the name index instead of LIKE (which cannot use it)
+            clauses.append("name >= ? AND name < ?")
+            params += [name_prefix, name_prefix[:-1] + chr(ord(name_prefix[-1]) + 1)]
+        for column, bounds in (("base_stress", stress_range), ("base_energy", energy_range)):
+            lo, hi = bounds if bounds is not None else (None, None)
+            if lo is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(lo)
+            if hi is not None:
+                clauses.append(f"{column} <= ?")
+                params.append(hi)
+        return clauses, params
+
+    def query(self, name_prefix=None, stress_range=None, energy_range=None, after_id=0, offset=0, limit=None):
+        """
+        (id, record) pairs matching the filters, in ID order. `name_prefix` matches the start
+        of the name; the ranges are inclusive (lo, hi) bounds on base_stress/base_energy
+        (None for open). Page with `after_id` (keyset: resume after the last ID seen) or
+        `offset`/`limit`. Only the requested rows are read.
+        """
+        clauses, params = self._where(name_prefix, stress_range, energy_range)
+        clauses.append("id > ?")
+        params.append(after_id)
+        cursor = self.conn.execute(
+            f"SELECT id, {', '.join(FIELDS)} FROM users WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset])
+        return [(row[0], dict(zip(FIELDS, row[1:]))) for row in cursor]
+
+    def count(self, **filters) -> int:
+        clauses, params = self._where(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(f"SELECT COUNT(*) FROM users {where}", params).fetchone()[0]
+
+    def add_many(self, records: Iterable[Dict[str, Any]]):
+        """
+        Inserts new records in one transaction. Names are the index key, so a name that
+        already exists raises ValueError and nothing of the batch is written.
+        """
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO users ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                    ([r[f] for f in FIELDS] for r in map(_record, records)))
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"User names must be unique in {self.path}: {e}") from e
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        """Inserts or updates (by name, keeping the ID) all records in one transaction."""
+        updates = ", ".join(f"{f} = excluded.{f}" for f in FIELDS[1:])
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO users ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))}) "
+                f"ON CONFLICT(name) DO UPDATE SET {updates}",
+                ([r[f] for f in FIELDS] for r in map(_record, records)))
+
+    def delete_many(self, names: Iterable[str]):
+        with self.conn:
+            self.conn.executemany("DELETE FROM users WHERE name = ?", ((name,) for name in names))
+
+    def save(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def open_user_store(path: str):
+    """The backend for a database path, chosen by extension: `.json` keeps the JSON list, anything else is SQLite."""
+    if path.lower().endswith(".json"):
+        return JsonUserStore(path)
+    return SqliteUserStore(path)
+
+def migrate_json(json_path: str, store) -> int:
+    """Copies every persona from a `users.json` file into `store` (one bulk write). Returns the count."""
+    with open(json_path, 'r') as f:
+        records = {}
+        for data in json.load(f):
+            records.setdefault(data["name"], data)  # get_user always returned the first match
+    store.put_many(records.values())
+    return len(records)
@@ -11,11 +11,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ml.online_coordinator import OnlineCoordinator
 from processor.research_engine import ResearchEngine
 from simulated_testing.user_manager import UserManager
-from simulated_testing.run_simulation import run_simulation
+from simulated_testing.user_persona import UserPersona
+from simulated_testing.run_simulation import run_simulation, simulation_seeds
+from simulated_testing.result_cache import ResultCache
 
 # Configuration
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
+# Seed of Simulation Lab runs: re-running a persona gives the same (cached) result
+SIM_SEED = 0
+# Personas shown per page in the user list, and at most in the simulation dropdown
+USER_PAGE_SIZE = 50
+SIM_DROPDOWN_SIZE = 100
 
 class App(ctk.CTk):
     def __init__(self):
@@ -25,6 +32,7 @@ class App(ctk.CTk):
         self.engine = ResearchEngine()
         self.coordinator = OnlineCoordinator()
         self.user_manager = UserManager()
+        self.result_cache = ResultCache()
         self.all_strategies = self.engine.strategies
         
         # Window Setup
@@ -70,7 +78,10 @@ class App(ctk.CTk):
         self.pilot_strat_title.pack(pady=(20, 5))
         
         self.pilot_strat_desc = ctk.CTkLabel(self.pilot_card, text="...", wraplength=400)
-        self.pilot_strat_desc.pack(pady=(0, 20))
+        self.pilot_strat_desc.pack(pady=(0, 10))
+        
+        self.pilot_strat_alts = ctk.CTkLabel(self.pilot_card, text="", wraplength=400, text_color="gray")
+        self.pilot_strat_alts.pack(pady=(0, 20))
         
         # Controls
         self.pilot_sim_btn = ctk.CTkButton(self.tab_pilot, text="Simulate Drift Event", command=self.run_pilot_sim, height=40)
@@ -87,12 +98,15 @@ class App(ctk.CTk):
         self.current_pilot_context = {"energy": energy, "stress": stress}
         self.pilot_context_label.configure(text=f"State: Energy={energy.upper()}, Stress={stress.upper()}")
         
-        # Get Strategy
-        strat = self.coordinator.select_strategy(self.current_pilot_context, self.all_strategies)
+        # Get Strategy (plus ranked alternatives for the card)
+        ranked = self.coordinator.recommend(self.current_pilot_context, self.engine.catalog, k=3)
+        strat = ranked[0]["strategy"]
         self.current_pilot_strat = strat
         
         self.pilot_strat_title.configure(text=strat["name"])
         self.pilot_strat_desc.configure(text=strat["logic"])
+        alternatives = [f"{r['strategy']['name']} ({r['score']:.2f})" for r in ranked[1:]]
+        self.pilot_strat_alts.configure(text=("Alternatives: " + " · ".join(alternatives)) if alternatives else "")
         self.pilot_feedback_frame.pack(pady=10)
 
     def pilot_feedback(self, success):
@@ -100,6 +114,7 @@ class App(ctk.CTk):
         self.pilot_feedback_frame.pack_forget()
         self.pilot_sim_btn.pack(pady=10)
         self.pilot_strat_title.configure(text="Feedback Recorded")
+        self.pilot_strat_alts.configure(text="")
 
     # ==========================================================================
     # TAB 2: USER MANAGER
@@ -132,9 +147,23 @@ class App(ctk.CTk):
         right_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
         
         ctk.CTkLabel(right_frame, text="Existing Users", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
+        self.user_filter = ctk.CTkEntry(right_frame, placeholder_text="Filter by name prefix (Enter)")
+        self.user_filter.pack(pady=5, padx=10, fill="x")
+        self.user_filter.bind("<Return>", lambda _: self.refresh_user_list(page=0))
         self.user_list_box = ctk.CTkTextbox(right_frame)
         self.user_list_box.pack(fill="both", expand=True, padx=10, pady=10)
-        
+
+        # Pager: only one page of personas is read from the database at a time
+        nav_frame = ctk.CTkFrame(right_frame)
+        nav_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.btn_prev_page = ctk.CTkButton(nav_frame, text="< Prev", width=70, command=lambda: self.refresh_user_list(self.user_page - 1))
+        self.btn_prev_page.pack(side="left")
+        self.btn_next_page = ctk.CTkButton(nav_frame, text="Next >", width=70, command=lambda: self.refresh_user_list(self.user_page + 1))
+        self.btn_next_page.pack(side="right")
+        self.lbl_user_page = ctk.CTkLabel(nav_frame, text="")
+        self.lbl_user_page.pack(side="left", expand=True)
+
+        self.user_page = 0
         self.refresh_user_list()
 
     def create_user(self):
@@ -143,17 +172,30 @@ class App(ctk.CTk):
         stress = self.slider_stress.get()
         energy = self.slider_energy.get()
         
-        self.user_manager.create_user(name, stress, energy)
+        try:
+            self.user_manager.create_user(name, stress, energy)
+        except ValueError as e:
+            print(f"[Dashboard] {e}")
+            return
         self.refresh_user_list()
         self.refresh_sim_dropdown() # Update sim tab too
 
-    def refresh_user_list(self):
+    def refresh_user_list(self, page=None):
+        self.user_page = max(0, self.user_page if page is None else page)
+        prefix = self.user_filter.get() or None
+        users, has_more = self.user_manager.page_users(self.user_page, USER_PAGE_SIZE, name_prefix=prefix)
+        if not users and self.user_page > 0:
+            # The page emptied (e.g. users were deleted); show the previous one
+            return self.refresh_user_list(self.user_page - 1)
+
         self.user_list_box.configure(state="normal")
         self.user_list_box.delete("0.0", "end")
-        users = self.user_manager.get_all_users()
         for u in users:
             self.user_list_box.insert("end", f"• {u.name}\n  Stress: {u.base_stress:.2f} | Energy: {u.base_energy:.2f}\n\n")
         self.user_list_box.configure(state="disabled")
+        self.lbl_user_page.configure(text=f"Page {self.user_page + 1}")
+        self.btn_prev_page.configure(state="normal" if self.user_page > 0 else "disabled")
+        self.btn_next_page.configure(state="normal" if has_more else "disabled")
 
     # ==========================================================================
     # TAB 3: SIMULATION LAB
@@ -166,6 +208,9 @@ class App(ctk.CTk):
         ctrl_frame.pack(fill="x", padx=10, pady=10)
         
         ctk.CTkLabel(ctrl_frame, text="Select User:").pack(side="left", padx=10)
+        self.sim_user_filter = ctk.CTkEntry(ctrl_frame, width=120, placeholder_text="Name prefix")
+        self.sim_user_filter.pack(side="left", padx=5)
+        self.sim_user_filter.bind("<Return>", lambda _: self.refresh_sim_dropdown())
         self.sim_user_dropdown = ctk.CTkOptionMenu(ctrl_frame, values=[])
         self.sim_user_dropdown.pack(side="left", padx=10)
         
@@ -178,7 +223,9 @@ class App(ctk.CTk):
         self.refresh_sim_dropdown()
 
     def refresh_sim_dropdown(self):
-        users = [u.name for u in self.user_manager.get_all_users()]
+        # First page of matching personas only; narrow it down with the name filter
+        page, _ = self.user_manager.page_users(0, SIM_DROPDOWN_SIZE, name_prefix=self.sim_user_filter.get() or None)
+        users = [u.name for u in page]
         if not users: users = ["No Users Found"]
         self.sim_user_dropdown.configure(values=users)
         self.sim_user_dropdown.set(users[0])
@@ -193,8 +240,12 @@ class App(ctk.CTk):
         self.sim_results_box.insert("end", f"Running simulation for {name}...\n")
         self.update() # Force redraw
         
-        # Run Sim
-        results = run_simulation(user)
+        # Run Sim (on an in-memory fork, so the pilot's learned weights are untouched).
+        # Repeats for the same persona, research and weights come from the result cache.
+        _, coordinator_seed = simulation_seeds(SIM_SEED)
+        # The persona is simulated as a copy, so its saved state (and the cache key) stays put.
+        results = run_simulation(UserPersona.from_dict(user.to_dict()), seed=SIM_SEED, coordinator=self.coordinator.fork(coordinator_seed),
+                                 engine=self.engine, cache=self.result_cache)
         
         # Display Results
         text = f"\n=== RESULTS ===\n"